@@ -0,0 +1,43 @@
+"""Add unique keys for upserts
+
+Revision ID: 3c1f0a7d2b94
+Revises: 9ee56fa29f3d
+Create Date: 2025-08-02 10:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f0a7d2b94'
+down_revision: Union[str, None] = '9ee56fa29f3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+UNIQUE_KEYS = {
+    'equities': ('uq_equities_equity_week', ['equity', 'week']),
+    'rates': ('uq_rates_rate_week', ['rate', 'week']),
+    'credit': ('uq_credit_credit_week', ['credit', 'week']),
+    'commodities': ('uq_commodities_commodity_week', ['commodity', 'week']),
+    'exchange_rates': ('uq_exchange_rates_exchange_rate_week', ['exchange_rate', 'week']),
+    'major_events': ('uq_major_events_country_indicator_event_week', ['country', 'indicator_event', 'week']),
+}
+
+
+def upgrade() -> None:
+    for table_name, (constraint_name, columns) in UNIQUE_KEYS.items():
+        # Keep only the latest row of any key that was stored twice before the constraint existed
+        key_match = ' AND '.join(f'newer.{col} = {table_name}.{col}' for col in columns)
+        op.execute(
+            f'DELETE FROM {table_name} WHERE EXISTS ('
+            f'SELECT 1 FROM {table_name} AS newer WHERE {key_match} AND newer.id > {table_name}.id)'
+        )
+        op.create_unique_constraint(constraint_name, table_name, columns)
+
+
+def downgrade() -> None:
+    for table_name, (constraint_name, _) in UNIQUE_KEYS.items():
+        op.drop_constraint(constraint_name, table_name, type_='unique')
@@ -0,0 +1,83 @@
+"""Unify market tables into market_snapshot
+
+Revision ID: 7b2e4c9d1f06
+Revises: 3c1f0a7d2b94
+Create Date: 2026-10-18 10:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c9d1f06'
+down_revision: Union[str, None] = '3c1f0a7d2b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Old table (now market_type) -> its instrument and level columns
+MARKET_TABLES = {
+    'equities': ('equity', 'price'),
+    'rates': ('rate', 'yield_percent'),
+    'credit': ('credit', 'oas_bp'),
+    'commodities': ('commodity', 'price'),
+    'exchange_rates': ('exchange_rate', 'price'),
+}
+METRIC_COLUMNS = ['m1', 'm3', 'm6', 'm12', 'ytd', 'qtd']
+
+
+def upgrade() -> None:
+    op.create_table('market_snapshot',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('market_type', sa.String(), nullable=False),
+    sa.Column('instrument', sa.String(), nullable=False),
+    sa.Column('level', sa.Float(), nullable=True),
+    *(sa.Column(column, sa.Float(), nullable=True) for column in METRIC_COLUMNS),
+    sa.Column('week', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('market_type', 'instrument', 'week', name='uq_market_snapshot_market_type_instrument_week')
+    )
+
+    metrics = ', '.join(METRIC_COLUMNS)
+    for table_name, (instrument_column, level_column) in MARKET_TABLES.items():
+        op.execute(
+            f"INSERT INTO market_snapshot (market_type, instrument, level, {metrics}, week) "
+            f"SELECT '{table_name}', {instrument_column}, {level_column}, {metrics}, week FROM {table_name} ORDER BY id"
+        )
+        op.drop_table(table_name)
+        # Same name and columns as the table it replaces, so existing readers keep working
+        op.execute(
+            f"CREATE VIEW {table_name} AS SELECT id, instrument AS {instrument_column}, level AS {level_column}, "
+            f"{metrics}, week FROM market_snapshot WHERE market_type = '{table_name}'"
+        )
+
+    # Built after the copy, which is faster than maintaining them row by row
+    op.create_index('ix_market_snapshot_week_market_type', 'market_snapshot', ['week', 'market_type'])
+    op.create_index('ix_market_snapshot_instrument_week', 'market_snapshot', ['instrument', 'week'])
+
+
+def downgrade() -> None:
+    metrics = ', '.join(METRIC_COLUMNS)
+    for table_name, (instrument_column, level_column) in MARKET_TABLES.items():
+        op.execute(f'DROP VIEW {table_name}')
+        op.create_table(table_name,
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column(instrument_column, sa.String(), nullable=False),
+        sa.Column(level_column, sa.Float(), nullable=True),
+        *(sa.Column(column, sa.Float(), nullable=True) for column in METRIC_COLUMNS),
+        sa.Column('week', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(instrument_column, 'week', name=f'uq_{table_name}_{instrument_column}_week')
+        )
+        op.execute(
+            f"INSERT INTO {table_name} ({instrument_column}, {level_column}, {metrics}, week) "
+            f"SELECT instrument, level, {metrics}, week FROM market_snapshot WHERE market_type = '{table_name}' "
+            f"ORDER BY id"
+        )
+
+    op.drop_index('ix_market_snapshot_instrument_week', table_name='market_snapshot')
+    op.drop_index('ix_market_snapshot_week_market_type', table_name='market_snapshot')
+    op.drop_table('market_snapshot')
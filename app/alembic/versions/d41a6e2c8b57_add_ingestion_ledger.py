@@ -0,0 +1,38 @@
+"""Add ingestion ledger
+
+Revision ID: d41a6e2c8b57
+Revises: 7b2e4c9d1f06
+Create Date: 2026-10-18 21:40:27.513094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a6e2c8b57'
+down_revision: Union[str, None] = '7b2e4c9d1f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_ledger',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('pdf_hash', sa.String(length=64), nullable=False),
+    sa.Column('report_date', sa.Date(), nullable=False),
+    sa.Column('week', sa.DateTime(), nullable=False),
+    sa.Column('pdf_name', sa.String(), nullable=True),
+    sa.Column('rows_written', sa.Integer(), nullable=False),
+    sa.Column('ingested_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('pdf_hash', 'report_date', name='uq_ingestion_ledger_pdf_hash_report_date')
+    )
+    op.create_index('ix_ingestion_ledger_report_date', 'ingestion_ledger', ['report_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ingestion_ledger_report_date', table_name='ingestion_ledger')
+    op.drop_table('ingestion_ledger')
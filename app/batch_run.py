@@ -0,0 +1,269 @@
+import argparse
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from extraction_backends import BACKENDS, ExtractionBackend
+from extraction_cache import file_sha256
+from pdf_tables_parser import PDFMarketParser
+from profiling import StageTiming, record_stages
+from bulk_ingest import ingest_documents
+from database import get_engine, get_session_factory
+from history_store import history_store_from_env
+from ingestion_ledger import ingested_hashes, new_ledger_entry, report_week, store_document
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ParseResult:
+    pdf_path: str
+    dfs: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    report_date: Optional[date] = None
+    pdf_hash: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    stages: List[StageTiming] = field(default_factory=list)
+
+
+@dataclass
+class BatchSummary:
+    parsed: List[ParseResult] = field(default_factory=list)
+    failed: List[ParseResult] = field(default_factory=list)
+    # Already in the ingestion ledger (or copies of another PDF of the batch), not parsed
+    skipped: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def pdfs_per_minute(self) -> float:
+        total = len(self.parsed) + len(self.failed)
+        return 60 * total / self.elapsed if self.elapsed else 0.0
+
+
+def collect_pdf_paths(inputs: List[str]) -> List[str]:
+    """
+    Expands each input (a directory, a glob pattern or a single file) into a sorted, de-duplicated
+    list of PDF paths.
+    """
+    pdf_paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, "*.pdf")) + glob.glob(os.path.join(item, "*.PDF"))
+        else:
+            matches = glob.glob(item)
+        pdf_paths.update(path for path in matches if path.lower().endswith(".pdf") and os.path.isfile(path))
+    return sorted(pdf_paths)
+
+
+@lru_cache(maxsize=None)
+def worker_backend(name: str) -> ExtractionBackend:
+    """
+    One backend per worker process and name, so what a backend learns (e.g. the row_tol memo of
+    camelot_auto_row_tol) carries over to the next PDF the worker parses.
+    """
+    return BACKENDS[name]()
+
+
+def parse_pdf(pdf_path: str, markets_at_a_glance_page: Optional[int] = None, major_events_page: Optional[int] = None,
+              year: Optional[int] = None, backend: str = "camelot", output_dir: Optional[str] = None) -> ParseResult:
+    """
+    Parses a single PDF inside a worker process, exporting its CSVs (and the top/bottom markets) to output_dir
+    if given. Errors are returned rather than raised, so one broken document never aborts the batch.
+    """
+    start = time.perf_counter()
+    result = ParseResult(pdf_path=pdf_path)
+    try:
+        parser = PDFMarketParser(pdf_path=pdf_path, year=year, backend=worker_backend(backend))
+        with record_stages() as stages:
+            parser.parse_pages(markets_at_a_glance_page, major_events_page)
+            if output_dir is not None:
+                os.makedirs(output_dir, exist_ok=True)
+                parser.consolidate_and_export_top_bottom_markets(output_dir)
+                parser.export_dfs_to_csv(output_dir)
+        result.stages = stages
+        result.report_date = parser.report_date
+        # DataFrame.name does not survive pickling back to the parent process, the dict keys keep it
+        result.dfs = dict(parser._current_processed_dfs)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _parse_pool(workers: Optional[int]) -> Executor:
+    # Spawned, as the database engine and the ledger session already exist in this process
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def run_batch(pdf_paths: List[str], workers: Optional[int] = None, markets_at_a_glance_page: Optional[int] = None,
+              major_events_page: Optional[int] = None, year: Optional[int] = None, store: bool = True,
+              backend: str = "camelot", backfill: bool = False, output_dir: Optional[str] = None) -> BatchSummary:
+    """
+    Fans the PDFs out to a process pool and funnels every successful parse into a single DB writer
+    (and the history store, if configured) in the parent process, as results arrive. Each PDF is stored
+    under the week of its report date, writing only the rows that changed.
+
+    When storing, PDFs already in the ingestion ledger (by the hash of their bytes) are skipped before any
+    parsing, so sweeping an archive where nothing is new only costs hashing the files and one query.
+
+    With backfill, parses are kept until the batch is done and then loaded in one transaction with
+    bulk_ingest.ingest_documents (COPY on Postgres): much faster for large batches, and either every
+    PDF is stored or none is.
+
+    With output_dir, the CSVs and top/bottom markets of each PDF are also exported to a directory of
+    output_dir named after the PDF, as the watch-folder daemon does.
+    """
+    summary = BatchSummary()
+    start = time.perf_counter()
+    pdf_hashes = {}
+    if store:
+        with get_session_factory()() as ledger_session:
+            pdf_hashes, summary.skipped = new_documents(ledger_session, pdf_paths)
+        pdf_paths = list(pdf_hashes)
+        if summary.skipped:
+            logger.info(f"Skipping {len(summary.skipped)} PDFs already ingested")
+
+    session = get_session_factory()() if store and not backfill else None
+    history_store = history_store_from_env() if store else None
+
+    try:
+        # Worker processes only start with the first PDF, an archive without new ones parses nothing
+        with _parse_pool(workers) as executor:
+            futures = [
+                executor.submit(
+                    parse_pdf, pdf_path, markets_at_a_glance_page, major_events_page, year, backend,
+                    None if output_dir is None else os.path.join(
+                        output_dir, os.path.splitext(os.path.basename(pdf_path))[0]
+                    ),
+                )
+                for pdf_path in pdf_paths
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                result.pdf_hash = pdf_hashes.get(result.pdf_path)
+                if result.error is None and session is not None:
+                    try:
+                        stored = store_document(session, result.dfs, result.pdf_hash, result.report_date,
+                                                os.path.basename(result.pdf_path))
+                        if history_store is not None and stored is not None:
+                            history_store.append(result.dfs, report_week(result.report_date))
+                    except Exception as e:
+                        session.rollback()
+                        result.error = f"Storing failed: {type(e).__name__}: {e}"
+
+                if result.error is None:
+                    summary.parsed.append(result)
+                    stages = ", ".join(f"{timing.stage} {timing.seconds:.2f}s" for timing in result.stages)
+                    logger.info(f"Parsed '{result.pdf_path}' in {result.elapsed:.2f}s ({stages})")
+                else:
+                    summary.failed.append(result)
+                    logger.error(f"Failed '{result.pdf_path}' after {result.elapsed:.2f}s: {result.error}")
+    finally:
+        if session is not None:
+            session.close()
+
+    if store and backfill and summary.parsed:
+        _ingest_backfill(summary, history_store)
+
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def new_documents(session: Session, pdf_paths: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    The PDFs to parse with the hash of their bytes, one per distinct content that isn't in the ingestion ledger
+    yet, and the PDFs skipped.
+    """
+    hashes = {pdf_path: file_sha256(pdf_path) for pdf_path in pdf_paths}
+    seen = ingested_hashes(session, set(hashes.values()))
+    new, skipped = {}, []
+    for pdf_path, pdf_hash in hashes.items():
+        if pdf_hash in seen:
+            skipped.append(pdf_path)
+        else:
+            new[pdf_path] = pdf_hash
+            seen.add(pdf_hash)
+    return new, skipped
+
+
+def _ingest_backfill(summary: BatchSummary, history_store) -> None:
+    try:
+        ingest_documents(
+            get_engine(),
+            [(result.dfs, report_week(result.report_date)) for result in summary.parsed],
+            [new_ledger_entry(result.pdf_hash, result.report_date, os.path.basename(result.pdf_path),
+                              sum(len(df) for df in result.dfs.values())) for result in summary.parsed],
+        )
+        if history_store is not None:
+            for result in summary.parsed:
+                history_store.append(result.dfs, report_week(result.report_date))
+    except Exception as e:
+        for result in summary.parsed:
+            result.error = f"Storing failed: {type(e).__name__}: {e}"
+        summary.failed += summary.parsed
+        summary.parsed = []
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    arg_parser = argparse.ArgumentParser(description="Parse a batch of weekly PDFs and store them in the database.")
+    arg_parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of parser processes")
+    arg_parser.add_argument("--markets-at-a-glance-page", type=int, help="Located in each PDF by default")
+    arg_parser.add_argument("--major-events-page", type=int, help="Located in each PDF by default")
+    arg_parser.add_argument("--year", type=int,
+                            help="Year of the event dates, placed around each report's own date by default")
+    arg_parser.add_argument(
+        "--backend", choices=sorted(BACKENDS), default="camelot",
+        help="Table extraction backend, word_boxes falls back to Camelot when its output fails validation"
+    )
+    arg_parser.add_argument("--no-store", action="store_true", help="Parse only, skip the database writes")
+    arg_parser.add_argument(
+        "--output-dir",
+        help="Also export the CSVs and top/bottom markets of each PDF, to a directory named after it in this one"
+    )
+    arg_parser.add_argument(
+        "--backfill", action="store_true",
+        help="Store every PDF at the end in a single transaction (COPY on Postgres), for large batches"
+    )
+    args = arg_parser.parse_args()
+
+    pdf_paths = collect_pdf_paths(args.inputs)
+    if not pdf_paths:
+        arg_parser.error("No PDF files found for the given inputs")
+
+    logger.info(f"Processing {len(pdf_paths)} PDFs with {args.workers} workers")
+    summary = run_batch(
+        pdf_paths,
+        workers=args.workers,
+        markets_at_a_glance_page=args.markets_at_a_glance_page,
+        major_events_page=args.major_events_page,
+        year=args.year,
+        store=not args.no_store,
+        backend=args.backend,
+        backfill=args.backfill,
+        output_dir=args.output_dir,
+    )
+
+    logger.info(
+        f"Done in {summary.elapsed:.1f}s: {len(summary.parsed)} parsed, {len(summary.failed)} failed, "
+        f"{len(summary.skipped)} already ingested "
+        f"({summary.pdfs_per_minute:.1f} PDFs/min)"
+    )
+    for result in summary.failed:
+        logger.error(f"  {result.pdf_path}: {result.error}")
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+import io
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import Connection, Engine, column, insert, select, table, text, true
+
+from bulk_writer import BATCH_SIZE, TABLE_SPECS, TableSpec, dataframe_to_rows, frame_to_records, insert_for_dialect
+from models import IngestedDocument
+
+logger = logging.getLogger(__name__)
+
+# A parsed document: its processed dataframes (keyed by PDFMarketParser's names) and the week they belong to
+Document = Tuple[Dict[str, pd.DataFrame], datetime]
+
+
+def stage_documents(documents: Iterable[Document]) -> Dict[str, Tuple[TableSpec, pd.DataFrame]]:
+    """
+    The rows of every document grouped by target table (the five market tables all land in market_snapshot),
+    one row per key. When documents repeat a key the later one wins, as if they had been stored in order.
+    """
+    # Each dataframe kind is converted once for all documents, per-frame pandas overhead would dominate otherwise
+    parts: Dict[str, List[pd.DataFrame]] = defaultdict(list)
+    weeks: Dict[str, List[datetime]] = defaultdict(list)
+    for dfs, week in documents:
+        for df_name, df in dfs.items():
+            if df_name not in TABLE_SPECS:
+                logger.warning(f"No table registered for dataframe '{df_name}', skipping.")
+                continue
+            parts[df_name].append(df[list(TABLE_SPECS[df_name].column_map)])
+            weeks[df_name] += [week] * len(df)
+
+    by_table: Dict[str, List[pd.DataFrame]] = defaultdict(list)
+    specs: Dict[str, TableSpec] = {}
+    for df_name, frames in parts.items():
+        spec = TABLE_SPECS[df_name]
+        specs[spec.model.__tablename__] = spec
+        by_table[spec.model.__tablename__].append(
+            dataframe_to_rows(pd.concat(frames, ignore_index=True), spec, weeks[df_name])
+        )
+    return {
+        table_name: (specs[table_name], pd.concat(frames, ignore_index=True)) for table_name, frames in by_table.items()
+    }
+
+
+# What COPY reads as NULL. Its CSV default, an unquoted empty field, would also turn empty strings into NULL,
+# where the ORM path stores '' (and Country and the indicator are NOT NULL)
+COPY_NULL = r"\N"
+
+
+def _copy_rows(connection: Connection, stage_name: str, rows: pd.DataFrame) -> None:
+    """
+    Streams the rows into the stage table with COPY FROM STDIN (psycopg2), as CSV with missing values written
+    as COPY_NULL, so they load as NULL and empty strings as ''.
+    """
+    buffer = io.StringIO()
+    rows.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL, date_format="%Y-%m-%d %H:%M:%S.%f")
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {stage_name} ({', '.join(rows.columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _stage_table(spec: TableSpec, stage_name: str, columns: List[str]):
+    # Typed like the target, so values are bound the way the ORM binds them (e.g. SQLite's datetime strings)
+    target_columns = spec.model.__table__.columns
+    return table(stage_name, *(column(col, target_columns[col].type) for col in columns))
+
+
+def _insert_rows(connection: Connection, spec: TableSpec, stage_name: str, rows: pd.DataFrame) -> None:
+    stage = _stage_table(spec, stage_name, list(rows.columns))
+    records = frame_to_records(rows)
+    for start in range(0, len(records), BATCH_SIZE):
+        connection.execute(stage.insert(), records[start:start + BATCH_SIZE])
+
+
+def _merge_stage(connection: Connection, spec: TableSpec, stage_name: str, columns: List[str]) -> None:
+    stage = _stage_table(spec, stage_name, columns)
+    insert = insert_for_dialect(connection.dialect.name)
+    # The WHERE keeps SQLite from reading ON CONFLICT as part of the SELECT's join
+    stmt = insert(spec.model).from_select(columns, select(*stage.c).where(true()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(spec.conflict_cols),
+        set_={col: stmt.excluded[col] for col in columns if col not in spec.conflict_cols},
+    )
+    connection.execute(stmt)
+
+
+def ingest_documents(engine: Engine, documents: Iterable[Document],
+                     ledger_entries: Sequence[IngestedDocument] = ()) -> Dict[str, int]:
+    """
+    Loads many parsed documents at once, for backfills, in a single transaction: either every row of every
+    document is stored or none is. Each target table gets a temporary stage table, filled with COPY FROM STDIN
+    on Postgres (multi-row INSERTs on SQLite), then merged into the table with one INSERT ... SELECT ...
+    ON CONFLICT DO UPDATE. ledger_entries are added to the ingestion ledger in the same transaction.
+    Returns the number of rows merged per table.
+    """
+    staged = stage_documents(documents)
+    written = {}
+    with engine.begin() as connection:
+        postgres = connection.dialect.name == "postgresql"
+        for table_name, (spec, rows) in staged.items():
+            start = time.perf_counter()
+            stage_name = f"stage_{table_name}"
+            columns = list(rows.columns)
+            # Stage tables take the target's column types, but none of its constraints or its id sequence
+            connection.execute(text(
+                f"CREATE TEMP TABLE {stage_name} {'ON COMMIT DROP ' if postgres else ''}AS "
+                f"SELECT {', '.join(columns)} FROM {table_name} {'WITH NO DATA' if postgres else 'WHERE 0'}"
+            ))
+            if postgres:
+                _copy_rows(connection, stage_name, rows)
+            else:
+                _insert_rows(connection, spec, stage_name, rows)
+            _merge_stage(connection, spec, stage_name, columns)
+            if not postgres:
+                connection.execute(text(f"DROP TABLE {stage_name}"))
+            written[table_name] = len(rows)
+            logger.info(f"Staged and merged {len(rows)} rows into '{table_name}' in {time.perf_counter() - start:.2f}s")
+        if ledger_entries:
+            table_columns = IngestedDocument.__table__.columns
+            connection.execute(insert(IngestedDocument), [
+                {col.name: getattr(entry, col.name) for col in table_columns if col.name != "id"}
+                for entry in ledger_entries
+            ])
+    return written
@@ -0,0 +1,193 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+import pandas as pd
+from sqlalchemy import Float, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import Base, IngestedDocument, MajorEvents, MarketSnapshot
+from report_sections import REPORT_SECTIONS, StoreTarget
+
+logger = logging.getLogger(__name__)
+
+# Postgres caps a statement at 65535 bind parameters and SQLite at 32766, so very large
+# frames are sent as several multi-row INSERTs of this many rows each.
+BATCH_SIZE = 1000
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """
+    Describes how one processed dataframe maps onto its database table. fixed_values are columns with the
+    same value for every row of the dataframe (e.g. the market_type of a market table).
+    """
+    model: Type[Base]
+    column_map: Dict[str, str]
+    conflict_cols: Tuple[str, ...]
+    fixed_values: Dict[str, str] = field(default_factory=dict)
+
+
+# The model of every table a section can be stored in, by table name
+MODELS: Dict[str, Type[Base]] = {model.__tablename__: model for model in (MarketSnapshot, MajorEvents)}
+
+
+def table_spec(target: StoreTarget) -> TableSpec:
+    return TableSpec(MODELS[target.table], target.column_map, target.conflict_cols, target.fixed_values)
+
+
+# Keyed by the dataframe names produced by PDFMarketParser, for every table of the report sections with a store
+# target. The five market tables all go to market_snapshot.
+TABLE_SPECS: Dict[str, TableSpec] = {
+    table.name: table_spec(table.store)
+    for section in REPORT_SECTIONS.values() for table in section.tables if table.store is not None
+}
+
+
+def dataframe_to_rows(df: pd.DataFrame, spec: TableSpec, week: Union[datetime, Sequence[datetime]]) -> pd.DataFrame:
+    """
+    Converts a processed dataframe into a frame shaped like its table: columns renamed to the table's, numeric
+    columns coerced, one row per key, plus the fixed values and the week (one for every row, or one per row
+    when several weeks are converted at once).
+    """
+    table_columns = spec.model.__table__.columns
+    records_df = df[list(spec.column_map)].rename(columns=spec.column_map)
+
+    for col in records_df.columns:
+        if isinstance(table_columns[col].type, Float):
+            records_df[col] = pd.to_numeric(records_df[col], errors="coerce")
+    records_df = records_df.assign(**spec.fixed_values, week=week)
+
+    # Rows repeating a key would make ON CONFLICT touch the same row twice in one statement,
+    # the last occurrence wins as it did with the old query-then-update loop
+    return records_df.drop_duplicates(subset=list(spec.conflict_cols), keep="last")
+
+
+def dataframe_to_records(df: pd.DataFrame, spec: TableSpec, week: datetime) -> List[dict]:
+    """
+    Converts a processed dataframe into a list of row dicts keyed by the table's column names,
+    ready to be passed as the VALUES of a multi-row INSERT.
+    """
+    return frame_to_records(dataframe_to_rows(df, spec, week))
+
+
+def frame_to_records(records_df: pd.DataFrame) -> List[dict]:
+    # NaN/NaT must reach the driver as NULL, and timestamps as plain datetimes
+    records_df = records_df.astype(object).where(records_df.notna(), None)
+    records = records_df.to_dict("records")
+    for record in records:
+        for col, value in record.items():
+            if isinstance(value, pd.Timestamp):
+                record[col] = value.to_pydatetime()
+    return records
+
+
+def insert_for_dialect(dialect: str) -> Callable:
+    """
+    The dialect's insert() construct, the one with on_conflict_do_update.
+    """
+    if dialect not in _INSERT_BY_DIALECT:
+        raise ValueError(f"Bulk upsert is not supported for dialect '{dialect}'")
+    return _INSERT_BY_DIALECT[dialect]
+
+
+def changed_rows(session: Session, spec: TableSpec, rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    The rows (shaped by dataframe_to_rows) that aren't stored yet or differ from the stored row with the same key,
+    found with one query for the stored rows of the same weeks (and fixed values).
+    """
+    if rows.empty:
+        return rows
+    table_columns = spec.model.__table__.columns
+    query = select(*(table_columns[col] for col in rows.columns)).where(
+        table_columns["week"].in_([week.to_pydatetime() for week in pd.to_datetime(rows["week"].unique())])
+    )
+    for col, value in spec.fixed_values.items():
+        query = query.where(table_columns[col] == value)
+    stored = pd.DataFrame(session.execute(query).all(), columns=list(rows.columns))
+    if stored.empty:
+        return rows
+
+    # Keys are unique in the table, so the left merge keeps one row per row, in order
+    merged = rows.merge(stored, on=list(spec.conflict_cols), how="left", suffixes=("", "_stored"), indicator=True)
+    changed = merged["_merge"] == "left_only"
+    for col in rows.columns.difference(spec.conflict_cols):
+        new, old = merged[col], merged[f"{col}_stored"]
+        changed |= ~((new == old) | (new.isna() & old.isna()))
+    return rows[changed.to_numpy()]
+
+
+def upsert_dataframe(session: Session, spec: TableSpec, df: pd.DataFrame, week: datetime,
+                     only_changed: bool = False) -> int:
+    """
+    Writes a dataframe into its table with batched INSERT ... ON CONFLICT DO UPDATE statements. With only_changed,
+    rows identical to the stored ones are left out (see changed_rows). Returns the number of rows written.
+    """
+    insert = insert_for_dialect(session.get_bind().dialect.name)
+
+    rows = dataframe_to_rows(df, spec, week)
+    if only_changed:
+        rows = changed_rows(session, spec, rows)
+    records = frame_to_records(rows)
+    if not records:
+        return 0
+
+    stmt = insert(spec.model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(spec.conflict_cols),
+        set_={col: stmt.excluded[col] for col in records[0] if col not in spec.conflict_cols},
+    )
+    # Executing with a list of parameter sets lets SQLAlchemy compile the statement once and
+    # render it as multi-row VALUES batches ("insertmanyvalues") instead of one round trip per row
+    for start in range(0, len(records), BATCH_SIZE):
+        session.execute(stmt, records[start:start + BATCH_SIZE])
+    return len(records)
+
+
+def store_parsed_dfs(session: Session, dfs: Dict[str, pd.DataFrame], week: datetime, only_changed: bool = False,
+                     document: Optional[IngestedDocument] = None) -> Dict[str, int]:
+    """
+    Upserts every processed dataframe that has a known table, in a single transaction so a failure never leaves
+    part of a week stored. With only_changed, only the rows that differ from the stored ones are written. document,
+    if given, is added to the ingestion ledger in the same transaction, with the number of rows written.
+    Returns the number of rows written per dataframe name.
+    """
+    written = {}
+    try:
+        for df_name, df in dfs.items():
+            if df_name not in TABLE_SPECS:
+                logger.warning(f"No table registered for dataframe '{df_name}', skipping.")
+                continue
+            written[df_name] = upsert_dataframe(session, TABLE_SPECS[df_name], df, week, only_changed)
+        if document is not None:
+            document.rows_written = sum(written.values())
+            session.add(document)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    for df_name, rows in written.items():
+        logger.info(f"Stored {rows} rows from '{df_name}' into '{TABLE_SPECS[df_name].model.__tablename__}'")
+    return written
+
+
+async def store_parsed_dfs_async(session: AsyncSession, dfs: Dict[str, pd.DataFrame], week: datetime) -> Dict[str, int]:
+    """
+    store_parsed_dfs on an AsyncSession. The upserts run on the session's async connection, so the event loop
+    keeps serving other requests while the driver waits on the database.
+    """
+    return await session.run_sync(store_parsed_dfs, dfs, week)
+
+
+def get_week_start(date: datetime) -> datetime:
+    week_start = date - timedelta(days=date.weekday())
+    return week_start.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -0,0 +1,85 @@
+import os
+from functools import lru_cache
+
+from sqlalchemy import Engine, create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+DATABASE_URL = os.environ.get("DATABASE_URL", "postgresql://user:pass@db:5432/markets_weekly")
+
+# Connections kept open per process, and how many more may be opened under load. Postgres allows 100
+# connections by default, so with several API workers plus batch runs the defaults stay well below that.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+# Recycled before Postgres or a proxy in between drops them for being idle
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
+# Sync driver -> its asyncio counterpart
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    The same database with an asyncio driver (asyncpg for Postgres, aiosqlite for SQLite).
+    """
+    parsed = make_url(url)
+    drivername = _ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def pool_options(url: str) -> dict:
+    """
+    Pool settings for an engine on url. SQLite engines keep SQLAlchemy's defaults, its pools don't take them.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """
+    The process-wide sync engine, for the scripts and worker processes.
+    """
+    return create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+
+
+@lru_cache
+def get_session_factory() -> sessionmaker:
+    return sessionmaker(bind=get_engine())
+
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    """
+    The process-wide async engine the API uses, so queries and writes never block the event loop.
+    """
+    url = async_database_url(DATABASE_URL)
+    return create_async_engine(url, **pool_options(url))
+
+
+@lru_cache
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    # Objects stay usable after commit, there's nothing to reload them from once the request is over
+    return async_sessionmaker(get_async_engine(), expire_on_commit=False)
+
+
+async def dispose_engines() -> None:
+    """
+    Closes the pooled connections, on API shutdown.
+    """
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
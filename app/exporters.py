@@ -0,0 +1,183 @@
+import io
+import zipfile
+from typing import BinaryIO, Dict, List, NamedTuple, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from lazy_imports import LazyModule
+
+# Only the typed formats need them, and not every process exports
+feather = LazyModule("pyarrow.feather")
+pq = LazyModule("pyarrow.parquet")
+
+# The report prints at most 6-7 significant digits, which float32 keeps (as in the history store)
+NUMERIC_TYPE = pa.float32()
+DATE_TYPE = pa.timestamp("ns")
+# Country codes and market types: a few distinct values repeated on every row
+CATEGORY_TYPE = pa.dictionary(pa.int16(), pa.string())
+
+Target = Union[str, BinaryIO]
+
+
+class ExportTable(NamedTuple):
+    """
+    A processed dataframe and the columns typed formats store as float32, datetime64 and categories. Other
+    columns keep the type pyarrow infers from the dataframe (strings for text).
+    """
+    df: pd.DataFrame
+    numeric_columns: Sequence[str] = ()
+    date_columns: Sequence[str] = ()
+    categorical_columns: Sequence[str] = ()
+
+    @property
+    def schema(self) -> pa.Schema:
+        fields = []
+        for field in pa.Schema.from_pandas(self.df, preserve_index=False):
+            if field.name in self.numeric_columns:
+                field = field.with_type(NUMERIC_TYPE)
+            elif field.name in self.date_columns:
+                field = field.with_type(DATE_TYPE)
+            elif field.name in self.categorical_columns:
+                field = field.with_type(CATEGORY_TYPE)
+            fields.append(field)
+        return pa.schema(fields)
+
+    def to_arrow(self) -> pa.Table:
+        # Without the pandas metadata (a few KB per table, more than the data of most report tables): the
+        # schema alone reads back as the same dtypes
+        return pa.Table.from_pandas(self.df, schema=self.schema, preserve_index=False).replace_schema_metadata(None)
+
+
+class Exporter:
+    """
+    Writes the tables of a report in one format: one file per table in a directory, or all of them in a single
+    archive (a ZIP of the same files) for the API.
+    """
+    name: str
+    extension: str
+    # Entries of formats compressed on their own are stored as they are
+    zip_compression = zipfile.ZIP_STORED
+    archive_extension = "zip"
+    archive_media_type = "application/zip"
+
+    def write_table(self, table: ExportTable, target: Target) -> None:
+        raise NotImplementedError
+
+    def export(self, tables: Dict[str, ExportTable], output_path: str, bundle_name: str) -> List[str]:
+        """
+        Writes the tables to output_path and returns the paths written. bundle_name names the file of formats
+        that hold every table in one.
+        """
+        output_paths = []
+        for name, table in tables.items():
+            file_path = f"{output_path}/{name}.{self.extension}"
+            self.write_table(table, file_path)
+            output_paths.append(file_path)
+        return output_paths
+
+    def export_archive(self, tables: Dict[str, ExportTable], stream: BinaryIO) -> List[str]:
+        """
+        Writes the tables as a single archive to stream, each table straight into its entry. Returns the names
+        of the tables' entries.
+        """
+        arcnames = []
+        with zipfile.ZipFile(stream, "w", self.zip_compression) as zip_file:
+            for name, table in tables.items():
+                arcname = f"{name}.{self.extension}"
+                with zip_file.open(arcname, "w") as entry:
+                    self.write_table(table, entry)
+                arcnames.append(arcname)
+        return arcnames
+
+
+class CsvExporter(Exporter):
+    """
+    Plain CSV, readable by anything but untyped: dates and numbers are text again for whoever reads them.
+    """
+    name = "csv"
+    extension = "csv"
+    zip_compression = zipfile.ZIP_DEFLATED
+
+    def write_table(self, table: ExportTable, target: Target) -> None:
+        if isinstance(target, str):
+            table.df.to_csv(target, index=False)
+            return
+        with io.TextIOWrapper(target, encoding="utf-8", newline="") as csv_stream:
+            table.df.to_csv(csv_stream, index=False)
+
+
+class ParquetExporter(Exporter):
+    """
+    Parquet compressed with zstd: the most compact of the typed formats, for storage and data warehouses.
+    """
+    name = "parquet"
+    extension = "parquet"
+
+    def write_table(self, table: ExportTable, target: Target) -> None:
+        pq.write_table(table.to_arrow(), target, compression="zstd")
+
+
+class ArrowExporter(Exporter):
+    """
+    Arrow IPC files (Feather v2), uncompressed so readers can memory-map them: the fastest to load.
+    """
+    name = "arrow"
+    extension = "arrow"
+
+    def write_table(self, table: ExportTable, target: Target) -> None:
+        feather.write_feather(table.to_arrow(), target, compression="uncompressed")
+
+
+class BundleExporter(Exporter):
+    """
+    Every table in a single zstd-compressed Arrow IPC file: one row, one column per table holding its rows as a
+    list of structs, so each table keeps its own schema. read_bundle turns it back into dataframes.
+    """
+    name = "bundle"
+    extension = "arrow"
+    archive_extension = "arrow"
+    archive_media_type = "application/vnd.apache.arrow.file"
+
+    def export(self, tables: Dict[str, ExportTable], output_path: str, bundle_name: str) -> List[str]:
+        file_path = f"{output_path}/{bundle_name}.{self.extension}"
+        with open(file_path, "wb") as f:
+            self.export_archive(tables, f)
+        return [file_path]
+
+    def export_archive(self, tables: Dict[str, ExportTable], stream: BinaryIO) -> List[str]:
+        columns = []
+        for table in tables.values():
+            rows = table.to_arrow().combine_chunks()
+            struct = pa.StructArray.from_arrays(
+                [column.chunk(0) if column.num_chunks else pa.array([], column.type) for column in rows.columns],
+                fields=list(rows.schema),
+            )
+            columns.append(pa.ListArray.from_arrays(pa.array([0, len(rows)], pa.int32()), struct))
+        bundle = pa.Table.from_arrays(columns, names=list(tables))
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.ipc.new_file(stream, bundle.schema, options=options) as writer:
+            writer.write_table(bundle)
+        return list(tables)
+
+
+def read_bundle(source: Union[str, BinaryIO, bytes]) -> Dict[str, pd.DataFrame]:
+    """
+    The tables of a bundle written by BundleExporter, name -> dataframe with the dtypes they were exported with.
+    """
+    if isinstance(source, bytes):
+        source = pa.BufferReader(source)
+    bundle = pa.ipc.open_file(source).read_all()
+    return {
+        name: pa.Table.from_struct_array(bundle.column(name).chunk(0).values).to_pandas()
+        for name in bundle.column_names
+    }
+
+
+EXPORTERS = {exporter.name: exporter for exporter in (CsvExporter, ParquetExporter, ArrowExporter, BundleExporter)}
+
+
+def exporter_for(export_format: str) -> Exporter:
+    if export_format not in EXPORTERS:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {sorted(EXPORTERS)}")
+    return EXPORTERS[export_format]()
@@ -0,0 +1,327 @@
+import hashlib
+import logging
+import os
+import time
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pypdfium2 as pdfium
+
+from extraction_cache import ExtractionCache, cache_from_env
+from lazy_imports import LazyModule
+from page_index import normalise_text
+from page_layouts import PageLayout, extract_tables, load_page_layouts, open_pdf
+
+logger = logging.getLogger(__name__)
+
+# Imported on first use, like the pdfminer and camelot internals of page_layouts (see pdf_processing.warm_up)
+camelot = LazyModule("camelot")
+
+
+def pdf_name(pdf: Union[str, BinaryIO]) -> str:
+    if isinstance(pdf, str):
+        return pdf
+    return str(getattr(pdf, "name", None) or "upload.pdf")
+
+
+def single_table(tables) -> pd.DataFrame:
+    if tables.n != 1:
+        # From experimentation we know Camelot detects the 5 "Markets at a glance" tables as one big table,
+        # and we need futher filtering to separate them in 5:
+        raise Exception(f"Unexpected number of tables found: {tables.n}")
+
+    return tables[0].df
+
+
+class TableTarget(NamedTuple):
+    """
+    What the table on a page is expected to look like, for backends that search their parameters.
+    score rates a raw table, higher is better; its first element is the share of structural checks passed
+    (1.0 when the table has the expected shape). anchors are the title/header texts that identify the layout.
+    """
+    score: Callable[[pd.DataFrame], Tuple]
+    anchors: Sequence[str]
+
+
+class ExtractionBackend:
+    """
+    Turns a page of the PDF into its raw table: a dataframe of strings with positional column labels, which
+    is what the section cleaners of PDFMarketParser expect. The Camelot parameters of the section are passed
+    along, backends that don't use Camelot are free to ignore them.
+    """
+    name = "base"
+
+    @classmethod
+    def from_env(cls) -> "ExtractionBackend":
+        return cls()
+
+    def read_table(self, pdf: Union[str, BinaryIO], page: int, camelot_params: dict) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def read_tables(self, pdf: Union[str, BinaryIO], page_params: Dict[int, dict],
+                    targets: Optional[Dict[int, TableTarget]] = None) -> Dict[int, pd.DataFrame]:
+        """
+        Raw tables of several pages, each page with its own Camelot parameters. Backends override this
+        when reading the pages together is cheaper than one at a time. targets are only used by backends
+        that tune their parameters per page.
+        """
+        return {page: self.read_table(pdf, page, camelot_params) for page, camelot_params in page_params.items()}
+
+
+class CamelotBackend(ExtractionBackend):
+    """
+    Camelot stream parsing. Slow (the pdfminer layout analysis takes over a second per page), but it is the
+    reference output the section cleaners were written against.
+    """
+    name = "camelot"
+
+    def read_table(self, pdf: Union[str, BinaryIO], page: int, camelot_params: dict) -> pd.DataFrame:
+        if not isinstance(pdf, str):
+            pdf.seek(0)
+        tables = camelot.read_pdf(pdf, pages=str(page), **camelot_params)
+        return single_table(tables)
+
+    def read_tables(self, pdf: Union[str, BinaryIO], page_params: Dict[int, dict],
+                    targets: Optional[Dict[int, TableTarget]] = None) -> Dict[int, pd.DataFrame]:
+        """
+        Analyses the layout of all pages in one go, then extracts each page's table with its own parameters.
+        """
+        start = time.perf_counter()
+        layouts = load_page_layouts(pdf, page_params)
+        logger.info(f"Analysed layout of pages {sorted(page_params)} in {time.perf_counter() - start:.2f}s")
+
+        raw_tables = {}
+        for page, camelot_params in page_params.items():
+            if layouts[page].rotation:
+                # Rotated pages need Camelot's own handling, which rewrites the page before the analysis
+                raw_tables[page] = self.read_table(pdf, page, camelot_params)
+            else:
+                raw_tables[page] = self._table_from_layout(
+                    layouts[page], pdf_name(pdf), camelot_params, (targets or {}).get(page)
+                )
+        return raw_tables
+
+    def _table_from_layout(self, page_layout: PageLayout, name: str, camelot_params: dict,
+                           target: Optional[TableTarget]) -> pd.DataFrame:
+        return single_table(extract_tables(page_layout, name, **camelot_params))
+
+
+def layout_fingerprint(page_layout: PageLayout, anchors: Sequence[str]) -> str:
+    """
+    Identifies the layout of a page by its size and the positions of its anchor texts (titles and column
+    headers), to the nearest point. Data changes from week to week, the template of the page doesn't.
+    A header split over two lines (e.g. "UniCredit / estimates") is matched by its first word.
+    """
+    wanted = {normalise_text(anchor) for anchor in anchors} | {normalise_text(anchor).split()[0] for anchor in anchors}
+    marks = sorted(
+        (text, round(line.x0), round(line.y0)) for line in page_layout.horizontal_text
+        if (text := normalise_text(line.get_text())) in wanted
+    )
+    dimensions = tuple(round(size) for size in page_layout.dimensions)
+    return hashlib.sha256(repr((dimensions, marks)).encode()).hexdigest()
+
+
+class AutoRowTolCamelotBackend(CamelotBackend):
+    """
+    Camelot with the row_tol of each page picked automatically: every candidate is extracted from the same
+    layout analysis (tens of milliseconds each, against over a second for the analysis) and the best scoring
+    table wins, ties going to the candidate closest to the section's configured row_tol.
+
+    The winner is memoized per layout fingerprint, in memory and in memo_cache if given, so later reports
+    built from the same template skip the search. A memoized row_tol is only reused while its table still
+    scores as structurally complete, otherwise the search runs again.
+    """
+    name = "camelot_auto_row_tol"
+
+    ROW_TOL_CANDIDATES = range(2, 21)
+
+    def __init__(self, memo_cache: Optional[ExtractionCache] = None):
+        self.memo_cache = memo_cache
+        self._memo: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "AutoRowTolCamelotBackend":
+        return cls(memo_cache=cache_from_env())
+
+    def _table_from_layout(self, page_layout: PageLayout, name: str, camelot_params: dict,
+                           target: Optional[TableTarget]) -> pd.DataFrame:
+        if target is None:
+            return super()._table_from_layout(page_layout, name, camelot_params, target)
+
+        fingerprint = layout_fingerprint(page_layout, target.anchors)
+        memo_row_tol = self._memo_get(fingerprint)
+        if memo_row_tol is not None:
+            try:
+                raw_table = self._extract_with_row_tol(page_layout, name, camelot_params, memo_row_tol)
+                if target.score(raw_table)[0] == 1:
+                    return raw_table
+            except Exception:
+                pass
+            logger.info(f"Memoized row_tol={memo_row_tol} no longer fits page {page_layout.page}, searching again")
+
+        start = time.perf_counter()
+        best = None
+        candidates = sorted(self.ROW_TOL_CANDIDATES, key=lambda row_tol: abs(row_tol - camelot_params["row_tol"]))
+        for row_tol in candidates:
+            try:
+                raw_table = self._extract_with_row_tol(page_layout, name, camelot_params, row_tol)
+            except Exception:
+                continue
+            score = target.score(raw_table)
+            if best is None or score > best[0]:
+                best = (score, row_tol, raw_table)
+
+        if best is None:
+            # No candidate finds a single table, report it the way plain Camelot does
+            return super()._table_from_layout(page_layout, name, camelot_params, target)
+        score, row_tol, raw_table = best
+        logger.info(
+            f"Picked row_tol={row_tol} (score {score}) for page {page_layout.page} out of {len(candidates)} "
+            f"candidates in {time.perf_counter() - start:.2f}s"
+        )
+        self._memo_put(fingerprint, row_tol)
+        return raw_table
+
+    def _extract_with_row_tol(self, page_layout: PageLayout, name: str, camelot_params: dict,
+                              row_tol: int) -> pd.DataFrame:
+        return single_table(extract_tables(page_layout, name, **{**camelot_params, "row_tol": row_tol}))
+
+    def _memo_key(self, fingerprint: str) -> str:
+        return ExtractionCache.make_key("row_tol", fingerprint)
+
+    def _memo_get(self, fingerprint: str) -> Optional[int]:
+        if fingerprint not in self._memo and self.memo_cache is not None:
+            cached = self.memo_cache.get(self._memo_key(fingerprint))
+            if cached is not None:
+                self._memo[fingerprint] = int(cached["row_tol"].at[0, "row_tol"])
+        return self._memo.get(fingerprint)
+
+    def _memo_put(self, fingerprint: str, row_tol: int) -> None:
+        self._memo[fingerprint] = row_tol
+        if self.memo_cache is not None:
+            self.memo_cache.put(self._memo_key(fingerprint), {"row_tol": pd.DataFrame({"row_tol": [row_tol]})})
+
+
+class TextBox(NamedTuple):
+    text: str
+    left: float
+    bottom: float
+    right: float
+    top: float
+
+
+class WordBoxBackend(ExtractionBackend):
+    """
+    Fast path: reads the positioned text runs of the page straight from PDFium (milliseconds per page) and
+    clusters them into a grid, rows by vertical overlap and columns by the horizontal extent of the cells.
+    No layout analysis, so tables come back in a few milliseconds, but nothing guarantees they are the tables
+    Camelot would find: PDFMarketParser validates the cleaned output and falls back to Camelot when it doesn't
+    look right.
+
+    Every line of text becomes its own row, so camelot_params (row_tol) are ignored.
+    """
+    name = "word_boxes"
+
+    # Runs on the same line closer than this (in points) belong to the same cell, e.g. a minus sign and its number
+    CELL_GAP = 4.0
+
+    def read_table(self, pdf: Union[str, BinaryIO], page: int, camelot_params: dict) -> pd.DataFrame:
+        return self.read_tables(pdf, {page: camelot_params})[page]
+
+    def read_tables(self, pdf: Union[str, BinaryIO], page_params: Dict[int, dict],
+                    targets: Optional[Dict[int, TableTarget]] = None) -> Dict[int, pd.DataFrame]:
+        with open_pdf(pdf) as f:
+            document = pdfium.PdfDocument(f)
+            try:
+                missing_pages = [page for page in page_params if not 1 <= page <= len(document)]
+                if missing_pages:
+                    raise ValueError(f"Pages {sorted(missing_pages)} not found in the PDF")
+                return {page: self._grid(self._text_boxes(document[page - 1])) for page in page_params}
+            finally:
+                document.close()
+
+    @staticmethod
+    def _text_boxes(pdf_page) -> List[TextBox]:
+        text_page = pdf_page.get_textpage()
+        boxes = []
+        for i in range(text_page.count_rects()):
+            left, bottom, right, top = text_page.get_rect(i)
+            text = text_page.get_text_bounded(left, bottom, right, top)
+            if text.strip():
+                boxes.append(TextBox(text, left, bottom, right, top))
+        return boxes
+
+    def _lines(self, boxes: List[TextBox]) -> List[List[TextBox]]:
+        """
+        Groups the boxes into lines, top to bottom: a box whose vertical centre falls inside the current
+        line's extent belongs to it. Within a line, boxes closer than CELL_GAP are merged into one cell.
+        """
+        lines = []
+        for box in sorted(boxes, key=lambda b: -b.top):
+            centre = (box.bottom + box.top) / 2
+            if lines and lines[-1][0] <= centre <= lines[-1][1]:
+                lines[-1][2].append(box)
+                lines[-1][0] = min(lines[-1][0], box.bottom)
+            else:
+                lines.append([box.bottom, box.top, [box]])
+
+        merged_lines = []
+        for _, _, line_boxes in lines:
+            cells = []
+            for box in sorted(line_boxes, key=lambda b: b.left):
+                if cells and box.left - cells[-1].right < self.CELL_GAP:
+                    last = cells[-1]
+                    cells[-1] = TextBox(last.text + box.text, last.left, min(last.bottom, box.bottom),
+                                        max(last.right, box.right), max(last.top, box.top))
+                else:
+                    cells.append(box)
+            merged_lines.append(cells)
+        return merged_lines
+
+    def _grid(self, boxes: List[TextBox]) -> pd.DataFrame:
+        lines = self._lines(boxes)
+        if not lines:
+            raise ValueError("No text found on the page")
+
+        # Table-like lines have at least half as many cells as the fullest line. The page header and
+        # footer above and below them are cut off.
+        min_cells = max(len(cells) for cells in lines) / 2
+        table_lines = [i for i, cells in enumerate(lines) if len(cells) >= min_cells]
+        lines = lines[table_lines[0]:table_lines[-1] + 1]
+
+        # Columns are the horizontal extents of the cells of the table-like lines merged wherever they
+        # overlap. Titles and footnotes spanning several columns have too few cells to take part.
+        extents = sorted((cell.left, cell.right) for cells in lines if len(cells) >= min_cells for cell in cells)
+        columns = [list(extents[0])]
+        for left, right in extents[1:]:
+            if left <= columns[-1][1]:
+                columns[-1][1] = max(columns[-1][1], right)
+            else:
+                columns.append([left, right])
+        boundaries = [(previous[1] + following[0]) / 2 for previous, following in zip(columns, columns[1:])]
+
+        rows = []
+        for cells in lines:
+            row = [""] * len(columns)
+            for cell in cells:
+                col = int(np.searchsorted(boundaries, (cell.left + cell.right) / 2))
+                row[col] = " ".join(filter(None, [row[col], cell.text.strip()]))
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+BACKENDS = {backend.name: backend for backend in (CamelotBackend, AutoRowTolCamelotBackend, WordBoxBackend)}
+
+
+def backend_from_env() -> Optional[ExtractionBackend]:
+    """
+    Builds the backend named in EXTRACTION_BACKEND (one of BACKENDS). Unset or empty leaves the parser's
+    default.
+    """
+    name = os.environ.get("EXTRACTION_BACKEND", "")
+    if not name:
+        return None
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown EXTRACTION_BACKEND '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name].from_env()
@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Dict, Optional, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cleaning steps change, so stale cleaned tables are not served from disk
+CACHE_VERSION = 2
+
+RAW_TABLE_NAME = "raw"
+
+
+def file_sha256(pdf: Union[str, BinaryIO], chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file, given its path or a binary file object (which is left rewound).
+    """
+    digest = hashlib.sha256()
+    f = open(pdf, "rb") if isinstance(pdf, (str, os.PathLike)) else pdf
+    try:
+        f.seek(0)
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    finally:
+        if f is not pdf:
+            f.close()
+        else:
+            f.seek(0)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    On-disk cache of extracted tables, shared by every process pointing at the same directory.
+
+    Each entry is a directory holding one Parquet file per DataFrame. Entries are written to a temporary
+    directory and renamed into place, so concurrent workers never read half-written entries. Reads refresh
+    the entry's mtime, which is what the LRU eviction orders by once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        key_source = "|".join(str(part) for part in (CACHE_VERSION, *parts))
+        return hashlib.sha256(key_source.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[Dict[str, pd.DataFrame]]:
+        entry_path = self._entry_path(key)
+        try:
+            file_names = os.listdir(entry_path)
+            dfs = {}
+            for file_name in sorted(file_names):
+                # Files are prefixed with their position so the dict comes back in the order it was stored
+                name = file_name.removesuffix(".parquet").split("_", 1)[1]
+                df = pd.read_parquet(os.path.join(entry_path, file_name))
+                if name == RAW_TABLE_NAME:
+                    # Parquet needs string column names, Camelot tables use positional integers
+                    df.columns = df.columns.astype(int)
+                dfs[name] = df
+            os.utime(entry_path)
+        except FileNotFoundError:
+            # Missing, or evicted by another worker while we were reading it
+            return None
+        logger.info(f"Extraction cache hit for {key[:12]}")
+        return dfs
+
+    def put(self, key: str, dfs: Dict[str, pd.DataFrame]) -> None:
+        entry_path = self._entry_path(key)
+        if os.path.exists(entry_path):
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=".tmp_", dir=self.cache_dir)
+        try:
+            for position, (name, df) in enumerate(dfs.items()):
+                if name == RAW_TABLE_NAME:
+                    df = df.rename(columns=str)
+                df.to_parquet(os.path.join(tmp_path, f"{position:03d}_{name}.parquet"), compression="zstd")
+            os.rename(tmp_path, entry_path)
+        except OSError:
+            # Another worker stored the same entry first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_dir() or entry.name.startswith(".tmp_"):
+                continue
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, size, entry.path))
+            except FileNotFoundError:
+                continue
+            total_size += size
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total_size -= size
+            logger.info(f"Evicted extraction cache entry {os.path.basename(path)[:12]}")
+
+    def clear(self) -> None:
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def cache_from_env() -> Optional[ExtractionCache]:
+    """
+    Builds the cache configured through EXTRACTION_CACHE_DIR / EXTRACTION_CACHE_MAX_MB.
+    An empty EXTRACTION_CACHE_DIR disables caching.
+    """
+    cache_dir = os.environ.get("EXTRACTION_CACHE_DIR", "/data/cache")
+    if not cache_dir:
+        return None
+    max_mb = int(os.environ.get("EXTRACTION_CACHE_MAX_MB", "512"))
+    return ExtractionCache(cache_dir, max_bytes=max_mb * 1024 * 1024)
@@ -0,0 +1,291 @@
+import fcntl
+import functools
+import logging
+import operator
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from bulk_writer import TABLE_SPECS
+from report_sections import MARKET_TABLES
+
+logger = logging.getLogger(__name__)
+
+METRIC_COLUMNS = ["m1", "m3", "m6", "m12", "ytd", "qtd"]
+
+
+@dataclass(frozen=True)
+class HistoryTable:
+    """
+    One market table of the history store: the processed dataframe it comes from and its columns, named as
+    in market_snapshot except for the level, which keeps its name from the table's view (price, yield_percent
+    or oas_bp).
+    """
+    name: str
+    df_name: str
+    level_column: str
+
+    @property
+    def column_map(self) -> Dict[str, str]:
+        column_map = TABLE_SPECS[self.df_name].column_map
+        return {src: self.level_column if dst == "level" else dst for src, dst in column_map.items()}
+
+    @property
+    def schema(self) -> pa.Schema:
+        # Instrument names repeat every week (dictionary encoded) and weeks are dates. The report prints
+        # at most 6-7 significant digits, which float32 keeps (see as_printed)
+        return pa.schema(
+            [("instrument", pa.dictionary(pa.int16(), pa.string())), ("week", pa.date32())]
+            + [(column, pa.float32()) for column in [self.level_column, *METRIC_COLUMNS]]
+        )
+
+
+# Keyed by market_type, which is what the API exposes
+HISTORY_TABLES: Dict[str, HistoryTable] = {
+    market_type: HistoryTable(market_type, table.name, table.store.view_columns.get("level", "level"))
+    for market_type, table in MARKET_TABLES.items()
+}
+
+
+class RowGroupBounds(NamedTuple):
+    """
+    Min/max statistics of a row group of a partition file.
+    """
+    first_instrument: str
+    last_instrument: str
+    first_week: date
+    last_week: date
+
+    def matches(self, instrument: Optional[str], start: Optional[date], end: Optional[date]) -> bool:
+        if instrument is not None and not self.first_instrument <= instrument <= self.last_instrument:
+            return False
+        if start is not None and self.last_week < start:
+            return False
+        return end is None or self.first_week <= end
+
+
+class HistoryStore:
+    """
+    Weekly market snapshots as Parquet, one directory per table and one hive partition per year
+    (root_dir/equities/year=2025/data.parquet). Each file is sorted by instrument then week, with one row group
+    per instrument, so the row group statistics pin down exactly where an instrument's series is.
+
+    Series queries only open the year partitions overlapping the requested range, and only read the row groups
+    whose statistics match the instrument and week range (predicate push-down). Footers and decoded row groups
+    are kept in memory until their file changes, so repeated queries don't decode anything.
+
+    Appending a week rewrites its year's file (a few thousand rows at most) under a per-table lock, replacing
+    any rows already stored for that week, so re-ingesting a report is idempotent.
+    """
+
+    FILE_NAME = "data.parquet"
+
+    def __init__(self, root_dir: str, row_group_cache_size: int = 4096):
+        """
+        row_group_cache_size bounds how many decoded row groups (one instrument-year each, a few KB) are kept
+        in memory, least recently used first out.
+        """
+        self.root_dir = root_dir
+        self.row_group_cache_size = row_group_cache_size
+        self._cache_lock = threading.Lock()
+        self._footers: Dict[str, Tuple[Tuple[int, int], pq.FileMetaData, List[RowGroupBounds]]] = {}
+        self._row_group_cache: "OrderedDict[Tuple[str, Tuple[int, int], int], pa.Table]" = OrderedDict()
+
+    def _table_dir(self, table: str) -> str:
+        return os.path.join(self.root_dir, table)
+
+    def _partition_path(self, table: str, year: int) -> str:
+        return os.path.join(self._table_dir(table), f"year={year}", self.FILE_NAME)
+
+    @contextmanager
+    def _lock(self, table: str) -> Iterator[None]:
+        os.makedirs(self._table_dir(table), exist_ok=True)
+        with open(os.path.join(self._table_dir(table), ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, dfs: Dict[str, pd.DataFrame], week: datetime) -> Dict[str, int]:
+        """
+        Adds the processed dataframes of one week (keyed by PDFMarketParser's names, tables without history
+        are ignored). Returns the number of rows written per table.
+        """
+        written = {}
+        for table in HISTORY_TABLES.values():
+            if table.df_name not in dfs:
+                continue
+            rows = self._to_rows(table, dfs[table.df_name], week)
+            with self._lock(table.name):
+                self._write_year(table, week.year, rows)
+            written[table.name] = len(rows)
+        return written
+
+    def _to_rows(self, table: HistoryTable, df: pd.DataFrame, week: datetime) -> pd.DataFrame:
+        column_map = table.column_map
+        rows = df[list(column_map)].rename(columns=column_map)
+        rows = rows.drop_duplicates(subset="instrument", keep="last")
+        # Like the database writer, whatever the cleaner could not read as a number becomes NaN
+        value_cols = [table.level_column, *METRIC_COLUMNS]
+        rows[value_cols] = rows[value_cols].apply(pd.to_numeric, errors="coerce")
+        rows.insert(1, "week", pd.Timestamp(week).normalize())
+        return rows
+
+    def _write_year(self, table: HistoryTable, year: int, rows: pd.DataFrame) -> None:
+        path = self._partition_path(table.name, year)
+        if os.path.exists(path):
+            with pq.ParquetFile(path) as parquet_file:
+                existing = parquet_file.read().to_pandas()
+            existing["week"] = pd.to_datetime(existing["week"])
+            existing["instrument"] = existing["instrument"].astype(str)
+            existing = existing[~existing["week"].isin(rows["week"])]
+            if not existing.empty:
+                rows = pd.concat([existing, rows], ignore_index=True)
+
+        rows = rows.sort_values(["instrument", "week"], ignore_index=True)
+        rows["week"] = rows["week"].dt.date
+        arrow_table = pa.Table.from_pandas(rows, schema=table.schema, preserve_index=False)
+        _, group_starts = np.unique(rows["instrument"].to_numpy(), return_index=True)
+        group_ends = [*group_starts[1:], len(rows)]
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            with pq.ParquetWriter(tmp_path, table.schema, compression="zstd") as writer:
+                for group_start, group_end in zip(group_starts, group_ends):
+                    writer.write_table(arrow_table.slice(group_start, group_end - group_start))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _read_row_groups(self, path: str, instrument: Optional[str], start: Optional[date],
+                         end: Optional[date]) -> List[pa.Table]:
+        """
+        The row groups of a partition file whose statistics match the filters. Footers and row groups already
+        read from the same version of the file (inode and mtime) come from memory.
+        """
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            version = (stat.st_ino, stat.st_mtime_ns)
+            with self._cache_lock:
+                footer = self._footers.get(path)
+            if footer is None or footer[0] != version:
+                metadata = pq.ParquetFile(f).metadata
+                bounds = []
+                for i in range(metadata.num_row_groups):
+                    instruments, weeks = (metadata.row_group(i).column(column).statistics for column in (0, 1))
+                    bounds.append(RowGroupBounds(instruments.min, instruments.max, weeks.min, weeks.max))
+                footer = (version, metadata, bounds)
+                with self._cache_lock:
+                    self._footers[path] = footer
+
+            tables = []
+            parquet_file = None
+            for i, group in enumerate(footer[2]):
+                if not group.matches(instrument, start, end):
+                    continue
+                key = (path, version, i)
+                with self._cache_lock:
+                    table = self._row_group_cache.get(key)
+                    if table is not None:
+                        self._row_group_cache.move_to_end(key)
+                if table is None:
+                    parquet_file = parquet_file or pq.ParquetFile(f, metadata=footer[1])
+                    table = parquet_file.read_row_group(i, use_threads=False)
+                    with self._cache_lock:
+                        self._row_group_cache[key] = table
+                        while len(self._row_group_cache) > self.row_group_cache_size:
+                            self._row_group_cache.popitem(last=False)
+                tables.append(table)
+        return tables
+
+    def _years(self, table: str) -> List[int]:
+        if not os.path.isdir(self._table_dir(table)):
+            return []
+        return sorted(
+            int(entry.name.removeprefix("year=")) for entry in os.scandir(self._table_dir(table))
+            if entry.name.startswith("year=")
+        )
+
+    def query(self, table: str, instrument: Optional[str] = None, start: Optional[date] = None,
+              end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Rows of the table for one instrument (or all of them) with week in [start, end], sorted by instrument
+        and week. Metrics come back as float64, at the precision they were printed in the report.
+        """
+        if table not in HISTORY_TABLES:
+            raise KeyError(f"Unknown history table '{table}'")
+        schema = HISTORY_TABLES[table].schema
+
+        pieces = []
+        for year in self._years(table):
+            if (start is not None and year < start.year) or (end is not None and year > end.year):
+                continue
+            try:
+                pieces += self._read_row_groups(self._partition_path(table, year), instrument, start, end)
+            except FileNotFoundError:
+                continue
+        result = pa.concat_tables(pieces) if pieces else schema.empty_table()
+
+        # Statistics only bound what a row group holds, the rows themselves are filtered here
+        conditions = []
+        if instrument is not None:
+            conditions.append(pc.field("instrument") == instrument)
+        if start is not None:
+            conditions.append(pc.field("week") >= pa.scalar(start, pa.date32()))
+        if end is not None:
+            conditions.append(pc.field("week") <= pa.scalar(end, pa.date32()))
+        if conditions:
+            result = result.filter(functools.reduce(operator.and_, conditions))
+
+        columns = {}
+        for field in schema:
+            column = result[field.name]
+            if pa.types.is_float32(field.type):
+                columns[field.name] = as_printed(column.to_numpy())
+            elif pa.types.is_dictionary(field.type):
+                columns[field.name] = column.cast(field.type.value_type).to_pandas()
+            else:
+                columns[field.name] = column.to_pandas()
+        df = pd.DataFrame(columns)
+        if instrument is None:
+            # Partitions are read in year order and each one is sorted, one instrument's rows are already in order
+            df = df.sort_values(["instrument", "week"], ignore_index=True)
+        return df
+
+
+def as_printed(values: np.ndarray) -> np.ndarray:
+    """
+    float32 values as the float64 of their decimal to 7 significant digits (all float32 holds), so 1.08 comes
+    back as 1.08 rather than 1.0800000429153442.
+    """
+    values = values.astype("float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    # Dividing the rounded integer by an exact power of ten gives the float64 closest to the decimal
+    scale = 10.0 ** np.clip(6 - np.nan_to_num(magnitude, nan=0, neginf=0, posinf=0), 0, 22)
+    return np.round(values * scale) / scale
+
+
+def history_store_from_env() -> Optional[HistoryStore]:
+    """
+    Builds the store under HISTORY_DIR (/data/history by default). An empty HISTORY_DIR disables it.
+    """
+    root_dir = os.environ.get("HISTORY_DIR", "/data/history")
+    if not root_dir:
+        return None
+    return HistoryStore(root_dir)
@@ -0,0 +1,69 @@
+import logging
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Set
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from bulk_writer import BATCH_SIZE, get_week_start, store_parsed_dfs
+from models import IngestedDocument
+
+logger = logging.getLogger(__name__)
+
+
+def report_week(report_date: date) -> datetime:
+    """
+    The week a report's rows are stored under: the Monday of the week it was published.
+    """
+    return get_week_start(datetime.combine(report_date, datetime.min.time()))
+
+
+def ingested_hashes(session: Session, pdf_hashes: Iterable[str]) -> Set[str]:
+    """
+    The hashes among pdf_hashes that are in the ingestion ledger, a few indexed lookups however many there are.
+    """
+    pdf_hashes = list(pdf_hashes)
+    found = set()
+    for start in range(0, len(pdf_hashes), BATCH_SIZE):
+        batch = pdf_hashes[start:start + BATCH_SIZE]
+        found.update(session.scalars(select(IngestedDocument.pdf_hash).where(IngestedDocument.pdf_hash.in_(batch))))
+    return found
+
+
+def is_ingested(session: Session, pdf_hash: str) -> bool:
+    return bool(ingested_hashes(session, [pdf_hash]))
+
+
+def new_ledger_entry(pdf_hash: str, report_date: date, pdf_name: Optional[str] = None,
+                     rows_written: int = 0) -> IngestedDocument:
+    return IngestedDocument(
+        pdf_hash=pdf_hash, report_date=report_date, week=report_week(report_date), pdf_name=pdf_name,
+        rows_written=rows_written, ingested_at=datetime.now(),
+    )
+
+
+def store_document(session: Session, dfs: Dict[str, pd.DataFrame], pdf_hash: str, report_date: date,
+                   pdf_name: Optional[str] = None) -> Optional[Dict[str, int]]:
+    """
+    Stores a parsed document under the week of its report date, unless it is already in the ingestion ledger
+    (returns None then). Only the rows that differ from the stored ones are written, so a corrected edition of a
+    stored report only rewrites what it corrects. The rows and the ledger entry go in a single transaction.
+    Returns the number of rows written per dataframe name.
+    """
+    if is_ingested(session, pdf_hash):
+        logger.info(f"'{pdf_name or pdf_hash}' was already ingested, skipping.")
+        return None
+    entry = new_ledger_entry(pdf_hash, report_date, pdf_name)
+    written = store_parsed_dfs(session, dfs, entry.week, only_changed=True, document=entry)
+    logger.info(f"Ingested '{pdf_name or pdf_hash}' ({report_date}): {entry.rows_written} rows changed")
+    return written
+
+
+async def store_document_async(session: AsyncSession, dfs: Dict[str, pd.DataFrame], pdf_hash: str,
+                               report_date: date, pdf_name: Optional[str] = None) -> Optional[Dict[str, int]]:
+    """
+    store_document on an AsyncSession, on the session's async connection.
+    """
+    return await session.run_sync(store_document, dfs, pdf_hash, report_date, pdf_name)
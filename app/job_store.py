@@ -0,0 +1,234 @@
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+IN_FLIGHT_STATUSES = (QUEUED, RUNNING)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    markets_at_a_glance_page INTEGER,
+    major_events_page INTEGER,
+    status TEXT NOT NULL,
+    pdf_path TEXT NOT NULL,
+    result_path TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_content_hash_status ON jobs (content_hash, status);
+CREATE TABLE IF NOT EXISTS owners (
+    id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+# Columns added since the first version of the table, added to job tables that predate them
+MIGRATIONS = {"owner": "ALTER TABLE jobs ADD COLUMN owner TEXT"}
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+@dataclass
+class Job:
+    id: str
+    content_hash: str
+    filename: str
+    markets_at_a_glance_page: Optional[int]
+    major_events_page: Optional[int]
+    status: str
+    pdf_path: str
+    result_path: Optional[str]
+    error: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    # The API process awaiting the job, see JobStore.heartbeat
+    owner: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """
+        Public view of the job for the API, with timings instead of local paths.
+        """
+        job = asdict(self)
+        del job["pdf_path"], job["result_path"], job["owner"]
+        for key in ("created_at", "started_at", "finished_at"):
+            job[key] = _isoformat(job[key])
+
+        queued_until = self.started_at or self.finished_at or time.time()
+        job["queued_seconds"] = round(queued_until - self.created_at, 3)
+        job["running_seconds"] = None
+        if self.started_at is not None:
+            job["running_seconds"] = round((self.finished_at or time.time()) - self.started_at, 3)
+        return job
+
+
+class JobStore:
+    """
+    Persistent job table in a local SQLite file. Every method opens its own connection, so the same store
+    can be used from the API process and from the worker processes that update job status.
+
+    Each job is owned by the API process that queued it, which alone awaits its result. Owners prove they are
+    alive with heartbeat, so any of them can fail the jobs of an owner that is gone (reap_orphans) while the
+    jobs of the others, e.g. the workers still running in a rolling restart, carry on.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.executescript(SCHEMA)
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    connection.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**row) if row else None
+
+    def find_or_create(self, content_hash: str, filename: str, markets_at_a_glance_page: Optional[int],
+                       major_events_page: Optional[int], jobs_dir: str,
+                       owner: Optional[str] = None) -> Tuple[Job, bool]:
+        """
+        Returns the in-flight job for the same content and pages if there is one, otherwise creates a queued
+        job owned by owner. The lookup and insert share one write transaction, so concurrent API workers can't
+        both create it. Pages are None when they are located automatically. Returns the job and whether it was
+        created.
+        """
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                f"SELECT * FROM jobs WHERE content_hash = ? AND markets_at_a_glance_page IS ? "
+                f"AND major_events_page IS ? AND status IN ({', '.join('?' * len(IN_FLIGHT_STATUSES))}) "
+                f"ORDER BY created_at LIMIT 1",
+                (content_hash, markets_at_a_glance_page, major_events_page, *IN_FLIGHT_STATUSES),
+            ).fetchone()
+            if row:
+                connection.execute("COMMIT")
+                return Job(**row), False
+
+            job_id = uuid.uuid4().hex
+            job = Job(
+                id=job_id,
+                content_hash=content_hash,
+                filename=filename,
+                markets_at_a_glance_page=markets_at_a_glance_page,
+                major_events_page=major_events_page,
+                status=QUEUED,
+                pdf_path=os.path.join(jobs_dir, job_id, "upload.pdf"),
+                result_path=None,
+                error=None,
+                created_at=time.time(),
+                started_at=None,
+                finished_at=None,
+                owner=owner,
+            )
+            fields = asdict(job)
+            connection.execute(
+                f"INSERT INTO jobs ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+                tuple(fields.values()),
+            )
+            connection.execute("COMMIT")
+            return job, True
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def _update(self, job_id: str, **fields) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as connection:
+            connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def mark_running(self, job_id: str) -> None:
+        self._update(job_id, status=RUNNING, started_at=time.time())
+
+    def mark_done(self, job_id: str, result_path: str) -> None:
+        self._update(job_id, status=DONE, result_path=result_path, finished_at=time.time())
+
+    def mark_failed(self, job_id: str, error: str) -> None:
+        self._update(job_id, status=FAILED, error=error, finished_at=time.time())
+
+    def in_flight(self) -> List[Job]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                f"SELECT * FROM jobs WHERE status IN ({', '.join('?' * len(IN_FLIGHT_STATUSES))})",
+                IN_FLIGHT_STATUSES,
+            ).fetchall()
+        return [Job(**row) for row in rows]
+
+    def heartbeat(self, owner: str) -> None:
+        """
+        Records that owner is alive. Owners call it more often than the lease given to reap_orphans.
+        """
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "INSERT INTO owners (id, heartbeat_at) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (owner, time.time()),
+            )
+
+    def reap_orphans(self, lease: float, error: str) -> int:
+        """
+        Fails the in-flight jobs whose owner has sent no heartbeat for lease seconds (or that have no owner, as
+        jobs queued before owners were recorded), and forgets those owners. Returns the number of jobs failed.
+        """
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("DELETE FROM owners WHERE heartbeat_at < ?", (now - lease,))
+            reaped = connection.execute(
+                f"UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                f"WHERE status IN ({', '.join('?' * len(IN_FLIGHT_STATUSES))}) "
+                f"AND (owner IS NULL OR owner NOT IN (SELECT id FROM owners))",
+                (FAILED, error, now, *IN_FLIGHT_STATUSES),
+            ).rowcount
+            connection.execute("COMMIT")
+            return reaped
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def release(self, owner: str, error: str) -> int:
+        """
+        Fails the in-flight jobs of owner, which is shutting down and won't see them finish, and forgets it.
+        Returns the number of jobs failed.
+        """
+        with closing(self._connect()) as connection:
+            connection.execute("DELETE FROM owners WHERE id = ?", (owner,))
+            return connection.execute(
+                f"UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                f"WHERE owner = ? AND status IN ({', '.join('?' * len(IN_FLIGHT_STATUSES))})",
+                (FAILED, error, time.time(), owner, *IN_FLIGHT_STATUSES),
+            ).rowcount
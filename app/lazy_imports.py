@@ -0,0 +1,32 @@
+import importlib
+from types import ModuleType
+from typing import Iterable
+
+
+class LazyModule:
+    """
+    Stands in for a module that is only imported on first attribute access, for heavy dependencies that only
+    some code paths use (camelot takes a few hundred milliseconds to import, and the API process never parses).
+    Attributes set on it (e.g. by mock.patch) shadow the module's own.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def _load(self) -> ModuleType:
+        # Cached in sys.modules after the first call
+        return importlib.import_module(self._name)
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self._name}'>"
+
+
+def preload(module_names: Iterable[str]) -> None:
+    """
+    Imports the modules now, e.g. in a worker initializer, so the first job doesn't pay for them.
+    """
+    for name in module_names:
+        importlib.import_module(name)
@@ -1,14 +1,29 @@
 import logging
-from pdf_tables_parser import PDFMarketParser
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
-from fastapi.responses import StreamingResponse
+import asyncio
+import hashlib
+import socket
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from exporters import EXPORTERS, exporter_for
+from functools import lru_cache
+from pdf_processing import ProcessedPdf, execute_job, locate_pdf_sections, process_pdf_document, warm_up
+from database import dispose_engines, get_async_session_factory
+from history_store import HISTORY_TABLES, HistoryStore, history_store_from_env
+from ingestion_ledger import report_week, store_document_async
+from market_queries import latest_week, top_bottom_markets
+from metrics import PipelineMetrics
+from profiling import StageTiming, record_stages, stage
+from rankings import METRICS
+from job_store import DONE, JobStore
+from worker_pool import BoundedWorkerPool, PoolSaturatedError
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Header, Query
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 import os
-import tempfile
-import zipfile
-import io
-from pathlib import Path
+import time
 import uuid
-import shutil
+from pathlib import Path
+from typing import Iterator, List, Optional
+from starlette.concurrency import run_in_threadpool
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,79 +33,376 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-OUTPUT_PATH = "/data/output"
-INPUT_PATH = "/data/input"
-PDF_PATH = f"{INPUT_PATH}/241025 Unicredit Macro & Markets Weekly Focus - python.pdf"
+# Camelot is CPU-bound, so parsing runs in a process pool. Uploads beyond PDF_MAX_PENDING (running + queued)
+# get a 429 instead of waiting in an unbounded queue.
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", os.cpu_count() or 1))
+PDF_MAX_PENDING = int(os.environ.get("PDF_MAX_PENDING", 2 * PDF_WORKERS))
+
+worker_pool = BoundedWorkerPool(max_workers=PDF_WORKERS, max_pending=PDF_MAX_PENDING, initializer=warm_up)
+
+# Uploads and results of asynchronous jobs, plus the SQLite job table
+JOBS_DIR = os.environ.get("JOBS_DIR", "/data/jobs")
+
+# Every API process sharing JOBS_DIR sends a heartbeat this often, and fails the jobs of the processes that
+# missed JOB_OWNER_LEASE_SECONDS of them (they died without failing their jobs themselves)
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("JOB_HEARTBEAT_SECONDS", 10))
+JOB_OWNER_LEASE_SECONDS = float(os.environ.get("JOB_OWNER_LEASE_SECONDS", 6 * JOB_HEARTBEAT_SECONDS))
+# This process, as the owner of the jobs it queues
+JOB_OWNER = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# Per-request cProfile dumps (X-Profile: 1) are written here, empty disables them
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+
+pipeline_metrics = PipelineMetrics()
+
+# Keeps a reference to the tasks awaiting job results, so they aren't garbage collected mid-flight
+_job_tasks: set = set()
+
+
+@lru_cache
+def get_job_store() -> JobStore:
+    return JobStore(os.path.join(JOBS_DIR, "jobs.sqlite3"))
+
+
+@lru_cache
+def get_history_store() -> Optional[HistoryStore]:
+    return history_store_from_env()
 
 
-app = FastAPI(title="PDF Processing API", version="1.0.0")
+def _keep_jobs_alive(job_store: JobStore) -> None:
+    job_store.heartbeat(JOB_OWNER)
+    # Jobs of a process that died lost their worker, fail them so clients can resubmit
+    reaped = job_store.reap_orphans(JOB_OWNER_LEASE_SECONDS, "Interrupted by a server restart, please resubmit")
+    if reaped:
+        logger.warning(f"Failed {reaped} jobs left in flight by a stopped server process")
+
+
+async def _job_heartbeat(job_store: JobStore) -> None:
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            await run_in_threadpool(_keep_jobs_alive, job_store)
+        except Exception as e:
+            logger.error(f"Job heartbeat failed: {type(e).__name__}: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    worker_pool.start()
+    job_store = get_job_store()
+    _keep_jobs_alive(job_store)
+    heartbeat = asyncio.ensure_future(_job_heartbeat(job_store))
+    yield
+    heartbeat.cancel()
+    worker_pool.shutdown()
+    job_store.release(JOB_OWNER, "Interrupted by a server restart, please resubmit")
+    await dispose_engines()
+
+
+app = FastAPI(title="PDF Processing API", version="1.0.0", lifespan=lifespan)
+
+def _iter_chunks(data: bytes, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Yields the response body in chunks, so it is sent with chunked transfer encoding.
+    """
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+async def _persist(result: ProcessedPdf, filename: str) -> dict:
+    """
+    Stores the parsed tables under the week of the report's date through the shared async engine, writing only
+    the rows that changed, then appends them to the history store (file I/O, so in the threadpool). PDFs already
+    in the ingestion ledger aren't stored again. Returns the rows written per table.
+    """
+    with stage("store"):
+        async with get_async_session_factory()() as session:
+            written = await store_document_async(session, result.dfs, result.pdf_hash, result.report_date, filename)
+    if written is None:
+        return {}
+    history_store = get_history_store()
+    if history_store is not None:
+        with stage("history_append"):
+            await run_in_threadpool(history_store.append, result.dfs, report_week(result.report_date))
+    return written
+
+
+def _save_profile(stats: bytes) -> str:
+    """
+    Writes marshalled cProfile stats as a .prof file in PROFILE_DIR (open it with pstats or snakeviz) and
+    returns its name.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    file_name = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.prof"
+    with open(os.path.join(PROFILE_DIR, file_name), "wb") as f:
+        f.write(stats)
+    return file_name
+
+
+def _server_timing(stages: List[StageTiming]) -> str:
+    return ", ".join(f"{timing.stage};dur={timing.seconds * 1000:.1f}" for timing in stages)
+
 
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "PDF Processing API is running"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Stage timings, memory high-water marks and document counts of this API process, in the Prometheus text
+    format.
+    """
+    body = pipeline_metrics.render(gauges={
+        "pdf_worker_pool_pending": ("PDFs running or queued in the worker pool.", worker_pool.pending),
+        "pdf_worker_pool_max_pending": ("PDFs the worker pool accepts before answering 429.", worker_pool.max_pending),
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/process-pdf/")
 async def process_pdf(
     file: UploadFile = File(..., description="PDF file to process"),
-    markets_at_a_glance_page: int = Form(default=2, description="Page number for markets at a glance section"),
-    major_events_page: int = Form(default=3, description="Page number for major events section"),
+    markets_at_a_glance_page: Optional[int] = Form(
+        default=None, description="Page number for markets at a glance section, located automatically if omitted"
+    ),
+    major_events_page: Optional[int] = Form(
+        default=None, description="Page number for major events section, located automatically if omitted"
+    ),
+    persist: bool = Form(default=False, description="Also store the parsed tables in the database"),
+    export_format: str = Form(
+        default="csv", alias="format",
+        description="csv, parquet or arrow (a ZIP of one file per table) or bundle (one Arrow file with every table)",
+    ),
+    x_profile: bool = Header(default=False, description="Profile the parse with cProfile (needs PROFILE_DIR)"),
     ):
     """
-    Takes a PDF file and return a ZIP containing generated csv files.
+    Takes a PDF file and return a ZIP containing generated csv files, or the tables in another format: format is
+    one of exporters.EXPORTERS, and the typed ones keep dates, float32 numbers and categories. With persist, the
+    tables are also stored for the week of the report's date (and appended to the history store, if enabled)
+    before responding, and the X-Persisted-Rows header says how many rows changed (0 for a PDF that was already
+    ingested).
+
+    The Server-Timing header gives the duration of each stage. With an "X-Profile: 1" header the parse runs
+    under cProfile, and X-Profile-File names the dump written to PROFILE_DIR.
     """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-    if markets_at_a_glance_page < 1 or major_events_page < 1:
+    if any(page is not None and page < 1 for page in (markets_at_a_glance_page, major_events_page)):
         raise HTTPException(status_code=400, detail="Page numbers must be positive")
 
-    # Unique dir for process, to store pdf and output csvs
-    temp_dir = tempfile.mkdtemp(prefix=f"pdf_processing_{uuid.uuid4().hex[:8]}_")
+    if export_format not in EXPORTERS:
+        raise HTTPException(status_code=400, detail=f"Unknown format, expected one of {sorted(EXPORTERS)}")
+
+    if x_profile and not PROFILE_DIR:
+        raise HTTPException(status_code=400, detail="Profiling is disabled, set PROFILE_DIR to enable it")
+
+    if worker_pool.is_saturated():
+        raise HTTPException(status_code=429, detail="Too many PDFs being processed, retry later",
+                            headers={"Retry-After": "5"})
 
     try:
         logger.info("Parsing PDF file into CSV files")
 
-        pdf_path = os.path.join(temp_dir, file.filename)
-        with open(pdf_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        parser = PDFMarketParser(
-            pdf_path=pdf_path,
-            year=2025
+        # The upload is spooled by Starlette, read once here since it has to be sent to the worker process
+        content = await file.read()
+        result = await worker_pool.run(
+            process_pdf_document, content, markets_at_a_glance_page, major_events_page, keep_dfs=persist,
+            profile=x_profile, export_format=export_format,
         )
+        del content
 
-        # Process the PDF and generate files
-        parser.parse_markets_at_a_glance(markets_at_a_glance_page)
-        parser.parse_major_events_next_week(major_events_page)
-        generated_files = parser.export_dfs_to_csv(temp_dir)
-
-        if not generated_files:
-            raise HTTPException(status_code=500, detail="No files were generated during processing")
-
-        # ZIP file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_path in generated_files:
-                if os.path.exists(file_path):
-                    # Add file to ZIP with relative path
-                    arcname = os.path.relpath(file_path, temp_dir)
-                    zip_file.write(file_path, arcname)
-        # After adding all files, we must rewind the internal pointer to beggining to save the zip to disk
-        zip_buffer.seek(0)
+        stages = list(result.stages)
+        headers = {}
+        if persist:
+            with record_stages() as persist_stages:
+                headers["X-Persisted-Rows"] = str(sum((await _persist(result, file.filename)).values()))
+            stages += persist_stages
+        if result.profile is not None:
+            headers["X-Profile-File"] = _save_profile(result.profile)
+        headers["Server-Timing"] = _server_timing(stages)
+        pipeline_metrics.observe_stages(stages)
+        pipeline_metrics.count_document("process_pdf", "ok")
+        archive_bytes = result.archive_bytes
 
+        exporter = exporter_for(export_format)
         base_filename = Path(file.filename).stem
-        zip_filename = f"{base_filename}_processed_files.zip"
+        archive_filename = f"{base_filename}_processed_files.{exporter.archive_extension}"
 
         return StreamingResponse(
-            io.BytesIO(zip_buffer.read()),
-            media_type="application/zip",
-            headers={"Content-Disposition": f"attachment; filename={zip_filename}"}
+            _iter_chunks(archive_bytes),
+            media_type=exporter.archive_media_type,
+            headers={"Content-Disposition": f"attachment; filename={archive_filename}", **headers}
         )
+    except PoolSaturatedError:
+        raise HTTPException(status_code=429, detail="Too many PDFs being processed, retry later",
+                            headers={"Retry-After": "5"})
     except Exception as e:
+        pipeline_metrics.count_document("process_pdf", "error")
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
-    finally:
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+@app.post("/page-index/")
+async def page_index(file: UploadFile = File(..., description="PDF file to index")):
+    """
+    Page count and the page each section was found on (null when missing), from a text-only pass over the
+    PDF. Cached per document hash, and the same lookup /process-pdf/ does when pages are omitted.
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+    try:
+        content = await file.read()
+        index = await worker_pool.run(locate_pdf_sections, content)
+    except PoolSaturatedError:
+        raise HTTPException(status_code=429, detail="Too many PDFs being processed, retry later",
+                            headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error indexing PDF: {str(e)}")
+    return {"filename": file.filename, **index}
+
+
+async def _await_job(job_id: str, future: asyncio.Future) -> None:
+    try:
+        stages = await future
+    except Exception as e:
+        # execute_job records its own failures, this catches the worker process itself dying
+        await run_in_threadpool(get_job_store().mark_failed, job_id, str(e))
+        pipeline_metrics.count_document("jobs", "error")
+        return
+    pipeline_metrics.observe_stages(stages)
+    pipeline_metrics.count_document("jobs", "ok" if stages else "error")
+
+
+def _save_upload(pdf_path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
+    with open(pdf_path, "wb") as buffer:
+        buffer.write(content)
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile = File(..., description="PDF file to process"),
+    markets_at_a_glance_page: Optional[int] = Form(
+        default=None, description="Page number for markets at a glance section, located automatically if omitted"
+    ),
+    major_events_page: Optional[int] = Form(
+        default=None, description="Page number for major events section, located automatically if omitted"
+    ),
+    ):
+    """
+    Queues a PDF for processing and returns its job id straight away. Uploading the same content while a
+    job for it is still queued or running returns that job instead of parsing the PDF again.
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    if any(page is not None and page < 1 for page in (markets_at_a_glance_page, major_events_page)):
+        raise HTTPException(status_code=400, detail="Page numbers must be positive")
+
+    content = await file.read()
+    job_store = get_job_store()
+    # SQLite and file I/O, kept off the event loop like every other job store call
+    job, created = await run_in_threadpool(
+        job_store.find_or_create, hashlib.sha256(content).hexdigest(), file.filename, markets_at_a_glance_page,
+        major_events_page, JOBS_DIR, JOB_OWNER,
+    )
+    if not created:
+        logger.info(f"Upload of '{file.filename}' attached to in-flight job {job.id}")
+        return {"job_id": job.id, "status": job.status, "attached": True}
+
+    try:
+        await run_in_threadpool(_save_upload, job.pdf_path, content)
+        task = asyncio.ensure_future(_await_job(job.id, worker_pool.submit(execute_job, job_store.db_path, job.id)))
+    except PoolSaturatedError:
+        await run_in_threadpool(job_store.mark_failed, job.id, "Too many PDFs being processed")
+        raise HTTPException(status_code=429, detail="Too many PDFs being processed, retry later",
+                            headers={"Retry-After": "5"})
+    except Exception as e:
+        await run_in_threadpool(job_store.mark_failed, job.id, str(e))
+        raise HTTPException(status_code=500, detail=f"Error queueing PDF: {str(e)}")
+
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    return {"job_id": job.id, "status": job.status, "attached": False}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Status and timings of a job.
+    """
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """
+    The ZIP with the generated csv files, once the job is done.
+    """
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}", headers={"Retry-After": "5"})
+
+    zip_filename = f"{Path(job.filename).stem}_processed_files.zip"
+    return FileResponse(job.result_path, media_type="application/zip", filename=zip_filename)
+
+@app.get("/history/{table}")
+def get_history(
+    table: str,
+    instrument: Optional[str] = Query(default=None, description="Instrument as named in the report, all if omitted"),
+    start: Optional[date] = Query(default=None, alias="from", description="First week (inclusive)"),
+    end: Optional[date] = Query(default=None, alias="to", description="Last week (inclusive)"),
+    ):
+    """
+    Weekly series of a market table (equities, rates, credit, commodities, exchange_rates) from the columnar
+    history store, sorted by instrument and week.
+    """
+    if table not in HISTORY_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table, expected one of {sorted(HISTORY_TABLES)}")
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    history_store = get_history_store()
+    if history_store is None:
+        raise HTTPException(status_code=503, detail="History store is disabled")
+
+    df = history_store.query(table, instrument=instrument, start=start, end=end)
+    # NaN isn't valid JSON
+    rows = df.astype(object).where(df.notna(), None).to_dict("records")
+    return {"table": table, "instrument": instrument, "from": start, "to": end, "rows": rows}
+
+@app.get("/rankings")
+async def get_rankings(
+    metric: str = Query(default="12M", description=f"One of {', '.join(METRICS)}"),
+    n: int = Query(default=3, ge=1, le=100, description="Instruments per ranking"),
+    week: Optional[date] = Query(default=None, description="Week start (Monday), the latest stored week if omitted"),
+    ):
+    """
+    Top and bottom n instruments of a stored week across every market type, by metric, ranked in the database.
+    Rank 1 is the best instrument of "top" and the worst of "bottom".
+    """
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric, expected one of {list(METRICS)}")
+    async with get_async_session_factory()() as session:
+        week_start = datetime.combine(week, datetime.min.time()) if week is not None else await session.run_sync(
+            latest_week)
+        if week_start is None:
+            raise HTTPException(status_code=404, detail="No weeks stored yet")
+        df = await session.run_sync(top_bottom_markets, week_start, metric, n)
+    if df.empty:
+        raise HTTPException(status_code=404, detail=f"No {metric} values stored for week {week_start.date()}")
+
+    rankings = {
+        rank_group: group.drop(columns="rank_group").to_dict("records") for rank_group, group in df.groupby(
+            "rank_group", sort=False)
+    }
+    return {"metric": metric, "n": n, "week": week_start.date(), "top": rankings.get("top", []),
+            "bottom": rankings.get("bottom", [])}
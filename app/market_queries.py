@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.orm import Session
+
+from models import MarketSnapshot
+from rankings import METRICS
+
+
+def ranking_query(metric: str = "12M", n: int = 3, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> Select:
+    """
+    The n best and n worst instruments across every market type, by metric, for each week in [start, end],
+    as a single statement: row_number() windows partitioned by week rank the rows, so the database only
+    returns the rows that make it into a ranking. Week filters are served by the (week, market_type) index.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {list(METRICS)}")
+    column = getattr(MarketSnapshot, METRICS[metric])
+    conditions = [column.is_not(None)]
+    if start is not None:
+        conditions.append(MarketSnapshot.week >= start)
+    if end is not None:
+        conditions.append(MarketSnapshot.week <= end)
+
+    # Ties go to the row stored first in both rankings, as with nlargest/nsmallest in rankings.top_bottom
+    ranked = select(
+        MarketSnapshot.week, MarketSnapshot.market_type, MarketSnapshot.instrument, column.label("value"),
+        func.row_number().over(partition_by=MarketSnapshot.week,
+                               order_by=(column.desc(), MarketSnapshot.id)).label("top_rank"),
+        func.row_number().over(partition_by=MarketSnapshot.week,
+                               order_by=(column.asc(), MarketSnapshot.id)).label("bottom_rank"),
+    ).where(*conditions).subquery()
+    return (
+        select(ranked)
+        .where(or_(ranked.c.top_rank <= n, ranked.c.bottom_rank <= n))
+        .order_by(ranked.c.week, ranked.c.top_rank)
+    )
+
+
+def rank_weeks(session: Session, metric: str = "12M", n: int = 3, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Top and bottom n of each week in [start, end], one row per (week, rank_group, rank): rank 1 is the best
+    instrument of the "top" group and the worst of the "bottom" group. With fewer than 2n instruments in a week,
+    an instrument can be in both groups.
+    """
+    ranked = pd.DataFrame(session.execute(ranking_query(metric, n, start, end)).mappings().all(),
+                          columns=["week", "market_type", "instrument", "value", "top_rank", "bottom_rank"])
+    groups = []
+    for rank_group in ("top", "bottom"):
+        rank_column = f"{rank_group}_rank"
+        group = ranked[ranked[rank_column] <= n].rename(columns={rank_column: "rank", "value": metric})
+        groups.append(group.assign(rank_group=rank_group))
+    columns = ["week", "rank_group", "rank", "market_type", "instrument", metric]
+    df = pd.concat(groups, ignore_index=True)[columns]
+    df["rank_group"] = pd.Categorical(df["rank_group"], categories=["top", "bottom"], ordered=True)
+    return df.sort_values(["week", "rank_group", "rank"], ignore_index=True).astype({"rank_group": str})
+
+
+def top_bottom_markets(session: Session, week: datetime, metric: str = "12M", n: int = 3) -> pd.DataFrame:
+    """
+    rank_weeks for a single week.
+    """
+    return rank_weeks(session, metric, n, start=week, end=week).drop(columns="week")
+
+
+def latest_week(session: Session) -> Optional[datetime]:
+    return session.execute(select(func.max(MarketSnapshot.week))).scalar()
@@ -0,0 +1,89 @@
+import bisect
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from profiling import StageTiming
+
+# Seconds. Cleaning and exports take milliseconds, Camelot seconds per page
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class PipelineMetrics:
+    """
+    Stage timings and memory high-water marks of every PDF this API process parsed, plus document counts,
+    rendered in the Prometheus text exposition format. Each API process keeps its own, so with several
+    uvicorn workers every scrape sees one of them (label the targets per worker to tell them apart).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # stage -> per-bucket counts (not cumulative, the last one is +Inf), sum, count
+        self._durations: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._peak_rss: Dict[str, int] = {}
+        self._max_rss_growth: Dict[str, int] = {}
+        self._documents: Counter = Counter()
+
+    def observe_stages(self, stages: Iterable[StageTiming]) -> None:
+        with self._lock:
+            for timing in stages:
+                counts, totals = self._durations.setdefault(timing.stage, ([0] * (len(self.buckets) + 1), [0.0]))
+                counts[bisect.bisect_left(self.buckets, timing.seconds)] += 1
+                totals[0] += timing.seconds
+                self._peak_rss[timing.stage] = max(self._peak_rss.get(timing.stage, 0), timing.peak_rss_bytes)
+                self._max_rss_growth[timing.stage] = max(
+                    self._max_rss_growth.get(timing.stage, 0), timing.rss_growth_bytes
+                )
+
+    def count_document(self, endpoint: str, status: str) -> None:
+        with self._lock:
+            self._documents[(endpoint, status)] += 1
+
+    def render(self, gauges: Dict[str, Tuple[str, float]] = None) -> str:
+        """
+        The metrics as a /metrics response body. gauges adds point-in-time values, name -> (help, value).
+        """
+        lines = [
+            "# HELP pdf_stage_duration_seconds Wall time of each stage of the PDF pipeline.",
+            "# TYPE pdf_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for stage_name in sorted(self._durations):
+                counts, totals = self._durations[stage_name]
+                cumulative = 0
+                for upper_bound, count in zip((*self.buckets, float("inf")), counts):
+                    cumulative += count
+                    labels = _labels(stage=stage_name, le=_number(upper_bound))
+                    lines.append(f"pdf_stage_duration_seconds_bucket{labels} {cumulative}")
+                lines.append(f"pdf_stage_duration_seconds_sum{_labels(stage=stage_name)} {_number(totals[0])}")
+                lines.append(f"pdf_stage_duration_seconds_count{_labels(stage=stage_name)} {cumulative}")
+
+            lines += [
+                "# HELP pdf_stage_peak_rss_bytes Highest peak RSS of the process during a run of each stage.",
+                "# TYPE pdf_stage_peak_rss_bytes gauge",
+                *(f"pdf_stage_peak_rss_bytes{_labels(stage=name)} {value}"
+                  for name, value in sorted(self._peak_rss.items())),
+                "# HELP pdf_stage_rss_growth_bytes_max Largest rise of the RSS above its value at the start of a stage.",
+                "# TYPE pdf_stage_rss_growth_bytes_max gauge",
+                *(f"pdf_stage_rss_growth_bytes_max{_labels(stage=name)} {value}"
+                  for name, value in sorted(self._max_rss_growth.items())),
+                "# HELP pdf_documents_total PDFs processed, by endpoint and outcome.",
+                "# TYPE pdf_documents_total counter",
+                *(f"pdf_documents_total{_labels(endpoint=endpoint, status=status)} {count}"
+                  for (endpoint, status), count in sorted(self._documents.items())),
+            ]
+
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+        return "\n".join(lines) + "\n"
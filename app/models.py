@@ -1,12 +1,74 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
-from sqlalchemy.ext.declarative import declarative_base
+from contextlib import nullcontext
+from typing import Union
+
+from sqlalchemy import Column, Date, Integer, String, Float, DateTime, Index, UniqueConstraint, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import declarative_base
+
+from report_sections import MARKET_TABLES
 
 Base = declarative_base()
 
-class Equities(Base):
-    __tablename__ = "equities"
+# Every "Markets at a glance" table, keyed by its market_type in market_snapshot: the name of its instrument
+# column and of its level column (price, yield or spread) in the compatibility view named after it
+MARKET_TYPES = {
+    market_type: tuple(table.store.view_columns.get(column, column) for column in ("instrument", "level"))
+    for market_type, table in MARKET_TABLES.items()
+}
+
+
+class MarketSnapshot(Base):
+    """
+    One instrument of one market table in one week. Replaces the five per-market tables, which live on as views.
+    (week, market_type) serves cross-asset queries on a week, (instrument, week) the series of an instrument.
+    """
+    __tablename__ = "market_snapshot"
+    __table_args__ = (
+        UniqueConstraint("market_type", "instrument", "week", name="uq_market_snapshot_market_type_instrument_week"),
+        Index("ix_market_snapshot_week_market_type", "week", "market_type"),
+        Index("ix_market_snapshot_instrument_week", "instrument", "week"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
+    market_type = Column(String, nullable=False)
+    instrument = Column(String, nullable=False)
+    level = Column(Float, nullable=True)
+    m1 = Column(Float, nullable=True)
+    m3 = Column(Float, nullable=True)
+    m6 = Column(Float, nullable=True)
+    m12 = Column(Float, nullable=True)
+    ytd = Column(Float, nullable=True)
+    qtd = Column(Float, nullable=True)
+    week = Column(DateTime, nullable=False)
+
+
+def market_view_sql(market_type: str) -> str:
+    instrument_column, level_column = MARKET_TYPES[market_type]
+    return (
+        f"CREATE VIEW {market_type} AS SELECT id, instrument AS {instrument_column}, level AS {level_column}, "
+        f"m1, m3, m6, m12, ytd, qtd, week FROM market_snapshot WHERE market_type = '{market_type}'"
+    )
+
+
+def create_compatibility_views(bind: Union[Engine, Connection]) -> None:
+    """
+    The old per-market tables as read-only views over market_snapshot, for databases built with
+    Base.metadata.create_all (the alembic migration creates them itself).
+    """
+    with bind.begin() if isinstance(bind, Engine) else nullcontext(bind) as connection:
+        for market_type in MARKET_TYPES:
+            connection.execute(text(market_view_sql(market_type)))
+
+
+# Read-only mappings of the compatibility views. They have their own metadata so create_all never makes
+# tables out of them.
+ViewBase = declarative_base()
+
+
+class Equities(ViewBase):
+    __tablename__ = "equities"
+
+    id = Column(Integer, primary_key=True)
     equity = Column(String, nullable=False)
     price = Column(Float, nullable=True)
     m1 = Column(Float, nullable=True)
@@ -18,10 +80,10 @@ class Equities(Base):
     week = Column(DateTime, nullable=False)
 
 
-class Rates(Base):
+class Rates(ViewBase):
     __tablename__ = "rates"
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, primary_key=True)
     rate = Column(String, nullable=False)
     yield_percent = Column(Float, nullable=True)
     m1 = Column(Float, nullable=True)
@@ -33,10 +95,10 @@ class Rates(Base):
     week = Column(DateTime, nullable=False)
 
 
-class Credit(Base):
+class Credit(ViewBase):
     __tablename__ = "credit"
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, primary_key=True)
     credit = Column(String, nullable=False)
     oas_bp = Column(Float, nullable=True)
     m1 = Column(Float, nullable=True)
@@ -48,10 +110,10 @@ class Credit(Base):
     week = Column(DateTime, nullable=False)
 
 
-class Commodities(Base):
+class Commodities(ViewBase):
     __tablename__ = 'commodities'
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, primary_key=True)
     commodity = Column(String, nullable=False)
     price = Column(Float, nullable=True)
     m1 = Column(Float, nullable=True)
@@ -63,10 +125,10 @@ class Commodities(Base):
     week = Column(DateTime, nullable=False)
 
 
-class ExchangeRates(Base):
+class ExchangeRates(ViewBase):
     __tablename__ = "exchange_rates"
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, primary_key=True)
     exchange_rate = Column(String, nullable=False)
     price = Column(Float, nullable=True)
     m1 = Column(Float, nullable=True)
@@ -79,6 +141,9 @@ class ExchangeRates(Base):
 
 class MajorEvents(Base):
     __tablename__ = "major_events"
+    __table_args__ = (
+        UniqueConstraint("country", "indicator_event", "week", name="uq_major_events_country_indicator_event_week"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     date = Column(DateTime, nullable=False)
@@ -90,3 +155,24 @@ class MajorEvents(Base):
     consensus_bloomberg = Column(Float, nullable=True)
     previous = Column(Float, nullable=True)
     week = Column(DateTime, nullable=False)
+
+
+class IngestedDocument(Base):
+    """
+    Ingestion ledger: one row per PDF whose tables were stored, keyed by the SHA-256 of its bytes and the date
+    printed on it. Documents already in the ledger are skipped without being parsed. week is the week the rows
+    were stored under, rows_written how many rows actually changed.
+    """
+    __tablename__ = "ingestion_ledger"
+    __table_args__ = (
+        UniqueConstraint("pdf_hash", "report_date", name="uq_ingestion_ledger_pdf_hash_report_date"),
+        Index("ix_ingestion_ledger_report_date", "report_date"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    pdf_hash = Column(String(64), nullable=False)
+    report_date = Column(Date, nullable=False)
+    week = Column(DateTime, nullable=False)
+    pdf_name = Column(String, nullable=True)
+    rows_written = Column(Integer, nullable=False)
+    ingested_at = Column(DateTime, nullable=False)
@@ -0,0 +1,87 @@
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import BinaryIO, Callable, Dict, Optional, Union
+
+import pandas as pd
+import pypdfium2 as pdfium
+
+from page_layouts import open_pdf
+
+
+# Full dates as the report prints them in its page headers, on normalised text ("25 october 2024")
+DATE_PATTERN = re.compile(
+    r"\b(\d{1,2}) (january|february|march|april|may|june|july|august|september|october|november|december) "
+    r"(\d{4})\b"
+)
+
+
+def normalise_text(text: str) -> str:
+    """
+    Lowercase, with every run of whitespace (including line breaks inside table headers) as a single space.
+    """
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+@dataclass
+class PageIndex:
+    """
+    The page each section of the report was found on, None for sections that weren't found, and the date of the
+    report (see build_page_index), None if it prints none.
+    """
+    page_count: int
+    pages: Dict[str, Optional[int]] = field(default_factory=dict)
+    report_date: Optional[date] = None
+
+    def to_dict(self) -> dict:
+        return {"page_count": self.page_count, **self.pages, "report_date": self.report_date}
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        One-row frame, the form the extraction cache stores.
+        """
+        df = pd.DataFrame([{"page_count": self.page_count, **self.pages}]).astype("Int64")
+        df["report_date"] = pd.to_datetime([self.report_date])
+        return df
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PageIndex":
+        row = df.iloc[0]
+        pages = {
+            column: None if pd.isna(row[column]) else int(row[column])
+            for column in df.columns if column not in ("page_count", "report_date")
+        }
+        report_date = row.get("report_date")
+        return cls(page_count=int(row["page_count"]), pages=pages,
+                   report_date=None if pd.isna(report_date) else report_date.date())
+
+
+def build_page_index(pdf: Union[str, BinaryIO], matchers: Dict[str, Callable[[str], bool]]) -> PageIndex:
+    """
+    Finds the first page matching each section, reading only the text of the pages (a few milliseconds
+    each with PDFium, no layout analysis). Matchers get the normalised text of a page. Stops reading as
+    soon as every section is found.
+
+    The report date is the full date printed most often on the pages read, the first one on a tie: the
+    report repeats its date in every page header, while other dates (deadlines, event ranges) come and go.
+    """
+    with open_pdf(pdf) as f:
+        document = pdfium.PdfDocument(f)
+        try:
+            index = PageIndex(page_count=len(document), pages=dict.fromkeys(matchers))
+            dates: Counter = Counter()
+            for page_number in range(1, len(document) + 1):
+                text = normalise_text(document[page_number - 1].get_textpage().get_text_range())
+                dates.update(DATE_PATTERN.findall(text))
+                for section, matches in matchers.items():
+                    if index.pages[section] is None and matches(text):
+                        index.pages[section] = page_number
+                if all(page is not None for page in index.pages.values()) and dates:
+                    break
+            if dates:
+                (day, month, year), _ = dates.most_common(1)[0]
+                index.report_date = datetime.strptime(f"{day} {month} {year}", "%d %B %Y").date()
+            return index
+        finally:
+            document.close()
@@ -0,0 +1,129 @@
+import logging
+import os
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+if TYPE_CHECKING:
+    from camelot.core import TableList
+    from pdfminer.layout import LTImage, LTPage, LTTextLineHorizontal, LTTextLineVertical
+
+logger = logging.getLogger(__name__)
+
+# camelot and pdfminer are imported by the functions that use them, on the first parse rather than when the
+# API starts (see pdf_processing.warm_up, PDF_LIBRARIES)
+PDF_LIBRARIES = [
+    "camelot.core", "camelot.handlers", "camelot.utils", "pdfminer.converter", "pdfminer.layout",
+    "pdfminer.pdfdocument", "pdfminer.pdfinterp", "pdfminer.pdfpage", "pdfminer.pdfparser",
+]
+
+# The LAParams camelot.utils.get_page_layout uses by default, so tables match camelot.read_pdf
+CAMELOT_LAPARAMS = {
+    "line_overlap": 0.5,
+    "char_margin": 1.0,
+    "line_margin": 0.5,
+    "word_margin": 0.1,
+    "boxes_flow": 0.5,
+    "detect_vertical": True,
+    "all_texts": True,
+}
+
+
+class PageLayout(NamedTuple):
+    """
+    The pdfminer layout analysis of one page, which is all a Camelot stream parser needs to find tables.
+    """
+    page: int
+    layout: "LTPage"
+    dimensions: Tuple[float, float]
+    images: List["LTImage"]
+    horizontal_text: List["LTTextLineHorizontal"]
+    vertical_text: List["LTTextLineVertical"]
+    rotation: str
+
+
+@contextmanager
+def open_pdf(pdf: Union[str, BinaryIO]) -> Iterator[BinaryIO]:
+    """
+    Yields a binary file object for either a path or an already open file (rewound to the start).
+    """
+    if isinstance(pdf, (str, os.PathLike)):
+        with open(pdf, "rb") as f:
+            yield f
+    else:
+        pdf.seek(0)
+        yield pdf
+
+
+def load_page_layouts(pdf: Union[str, BinaryIO], pages: Iterable[int]) -> Dict[int, PageLayout]:
+    """
+    Opens the PDF (a path or a binary file object) once and runs the layout analysis on the requested
+    pages only.
+
+    camelot.read_pdf re-reads the whole file with pypdf for every call and writes each page out as a
+    single-page PDF before analysing it; here pdfminer reads the pages straight from the document.
+    """
+    from camelot.utils import get_image_char_and_text_objects, get_rotation
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    wanted_pages = set(pages)
+    layouts = {}
+
+    with open_pdf(pdf) as f:
+        document = PDFDocument(PDFParser(f))
+        resource_manager = PDFResourceManager()
+        device = PDFPageAggregator(resource_manager, laparams=LAParams(**CAMELOT_LAPARAMS))
+        interpreter = PDFPageInterpreter(resource_manager, device)
+
+        for page_number, page in enumerate(PDFPage.create_pages(document), start=1):
+            if page_number not in wanted_pages:
+                continue
+            interpreter.process_page(page)
+            layout = device.get_result()
+            images, chars, horizontal_text, vertical_text = get_image_char_and_text_objects(layout)
+            layouts[page_number] = PageLayout(
+                page=page_number,
+                layout=layout,
+                dimensions=(layout.bbox[2], layout.bbox[3]),
+                images=images,
+                horizontal_text=horizontal_text,
+                vertical_text=vertical_text,
+                rotation=get_rotation(chars, horizontal_text, vertical_text),
+            )
+            if len(layouts) == len(wanted_pages):
+                break
+
+    missing_pages = wanted_pages - set(layouts)
+    if missing_pages:
+        raise ValueError(f"Pages {sorted(missing_pages)} not found in the PDF")
+    return layouts
+
+
+def extract_tables(page_layout: PageLayout, pdf_name: str, flavor: str = "stream", **kwargs) -> "TableList":
+    """
+    Runs a Camelot parser over an already analysed page. Can be called repeatedly with different
+    parameters (e.g. row_tol) without touching the PDF again.
+    """
+    from camelot.core import TableList
+    from camelot.handlers import PARSERS
+
+    if flavor != "stream":
+        # Lattice and friends render the page to an image, which needs the single-page PDF on disk
+        raise ValueError(f"Only the stream flavor can run on a preloaded layout, got '{flavor}'")
+
+    parser = PARSERS[flavor](**kwargs)
+    parser.prepare_page_parse(
+        pdf_name,
+        page_layout.layout,
+        page_layout.dimensions,
+        page_layout.page,
+        page_layout.images,
+        page_layout.horizontal_text,
+        page_layout.vertical_text,
+        layout_kwargs={},
+    )
+    return TableList(sorted(parser.extract_tables()))
@@ -0,0 +1,132 @@
+import io
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from extraction_backends import backend_from_env
+from extraction_cache import cache_from_env
+from job_store import JobStore
+from lazy_imports import preload
+from page_layouts import PDF_LIBRARIES
+from pdf_tables_parser import PDFMarketParser, section_pool
+from profiling import StageTiming, profiled, record_stages
+
+logger = logging.getLogger(__name__)
+
+# Shared by every API worker through the filesystem, so an upload parsed once is served from disk afterwards
+extraction_cache = cache_from_env()
+extraction_backend = backend_from_env()
+
+# PDF_PARALLEL_SECTIONS=1 parses the sections of each upload concurrently (PDFMarketParser.parse_all): lower
+# latency per upload, for two more processes per worker. Worth it when there are more cores than PDF_WORKERS.
+PARALLEL_SECTIONS = os.environ.get("PDF_PARALLEL_SECTIONS", "") == "1"
+
+
+def warm_up() -> None:
+    """
+    Initializer of the API's worker processes: imports the PDF libraries that are otherwise only loaded by the
+    first parse, so the first upload a fresh worker gets is as fast as the next ones.
+    """
+    start = time.perf_counter()
+    preload(["camelot", *PDF_LIBRARIES])
+    if PARALLEL_SECTIONS:
+        # Starts the section workers, which preload the same libraries
+        for _ in PDFMarketParser.SECTIONS:
+            section_pool().submit(int)
+    logger.info(f"Worker ready in {time.perf_counter() - start:.2f}s")
+
+
+def _make_parser(pdf: Union[str, bytes]) -> PDFMarketParser:
+    return PDFMarketParser(
+        pdf_path=io.BytesIO(pdf) if isinstance(pdf, bytes) else pdf,
+        cache=extraction_cache,
+        backend=extraction_backend,
+    )
+
+
+def locate_pdf_sections(pdf: Union[str, bytes]) -> dict:
+    """
+    Page count and the page of each section of the PDF (a path or the uploaded bytes), None if not found.
+    """
+    return _make_parser(pdf).locate_sections().to_dict()
+
+
+@dataclass
+class ProcessedPdf:
+    """
+    What a worker sends back for a parsed PDF: the tables in a single archive (see exporters) and the timings of
+    its stages. dfs is only filled when asked for (e.g. to persist them), along with what the ingestion ledger
+    needs (the hash of the PDF and its report date), and profile holds marshalled cProfile stats when profiling
+    was asked for.
+    """
+    archive_bytes: bytes
+    stages: List[StageTiming]
+    dfs: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    pdf_hash: Optional[str] = None
+    report_date: Optional[date] = None
+    profile: Optional[bytes] = None
+
+
+def process_pdf_document(pdf: Union[str, bytes], markets_at_a_glance_page: Optional[int] = None,
+                         major_events_page: Optional[int] = None, keep_dfs: bool = False,
+                         profile: bool = False, export_format: str = "csv") -> ProcessedPdf:
+    """
+    Parses the PDF (a path or the uploaded bytes) and returns the tables in an archive of export_format (CSV files
+    in a ZIP by default, see exporters.EXPORTERS), built entirely in memory, with the timings of each stage. Runs
+    inside the API's worker processes, so everything in and out must be picklable. Sections without a page are
+    located automatically.
+    """
+    with record_stages() as stages, profiled(profile) as profile_stats:
+        parser = _make_parser(pdf)
+
+        # Process the PDF and generate files
+        if PARALLEL_SECTIONS:
+            errors = parser.parse_all(markets_at_a_glance_page, major_events_page)
+            if errors:
+                raise ValueError("; ".join(f"{section}: {error}" for section, error in errors.items()))
+        else:
+            parser.parse_pages(markets_at_a_glance_page, major_events_page)
+
+        archive = io.BytesIO()
+        if not parser.export_dfs_to_archive(archive, export_format):
+            raise ValueError("No files were generated during processing")
+    result = ProcessedPdf(archive.getvalue(), stages, profile=profile_stats[0] if profile_stats else None)
+    if keep_dfs:
+        result.dfs = parser._current_processed_dfs
+        result.pdf_hash = parser.pdf_hash
+        result.report_date = parser.report_date
+    return result
+
+
+def process_pdf_to_zip(pdf: Union[str, bytes], markets_at_a_glance_page: Optional[int] = None,
+                       major_events_page: Optional[int] = None) -> bytes:
+    """
+    The ZIP of process_pdf_document alone.
+    """
+    return process_pdf_document(pdf, markets_at_a_glance_page, major_events_page).archive_bytes
+
+
+def execute_job(job_db_path: str, job_id: str) -> List[StageTiming]:
+    """
+    Runs a queued job from the job store, recording its status and timings there as it goes. Returns the
+    timings of its stages, none if it failed.
+    """
+    store = JobStore(job_db_path)
+    job = store.get(job_id)
+    store.mark_running(job_id)
+    try:
+        result = process_pdf_document(job.pdf_path, job.markets_at_a_glance_page, job.major_events_page)
+        result_path = os.path.join(os.path.dirname(job.pdf_path), "result.zip")
+        with open(result_path, "wb") as f:
+            f.write(result.archive_bytes)
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        store.mark_failed(job_id, str(e))
+        return []
+    store.mark_done(job_id, result_path)
+    return result.stages
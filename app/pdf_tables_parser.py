@@ -1,188 +1,511 @@
 import pandas as pd
 import numpy as np
-import camelot
+import io
 import logging
-from typing import List
+import multiprocessing
+import time
+from datetime import date
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from extraction_backends import CamelotBackend, ExtractionBackend, TableTarget, pdf_name
+from extraction_cache import ExtractionCache, RAW_TABLE_NAME, file_sha256
+from exporters import ExportTable, exporter_for
+from lazy_imports import preload
+from page_index import PageIndex, build_page_index, normalise_text
+from page_layouts import PDF_LIBRARIES, open_pdf
+from profiling import StageTiming, extend_stages, record_stages, stage
+from rankings import top_bottom
+from report_sections import MARKET_PERIOD_COLS, MARKET_TABLES, REPORT_SECTIONS, ReportTable, SectionSpec
 
 logger = logging.getLogger(__name__)
 
 
 class PDFMarketParser:
-    MARKETS_AT_A_GLANCE_TITLES = [
-        "Equities", "Rates (government bonds)", "Credit", "Commodities", "Exchange rates"
-    ]
-    CLEAN_MAAG_TABLE_TITLES = [
-        name.lower().replace(" ", "_").replace("(", "").replace(")", "") for name in MARKETS_AT_A_GLANCE_TITLES
-    ]
-
-    MARKETS_AT_A_GLANCE_NUMERIC_COLS = [
-        "1M", "3M", "6M", "12M", "YTD", "QTD",
-        "Price", "Yield (%)", "QAS (bp)"
-    ]
-
-    MAJOR_EVENTS_COLS = [
-        "Date", "Time", "Country", "Indicator/Event", "Period", "UniCredit Estimates", "Consensus (Bloomberg)", "Previous"
-    ]
-
-    def __init__(self, pdf_path: str, year: int = 2025):
-        self.pdf_path = pdf_path
-        self.year = year
-        self._current_processed_dfs: dict[str, pd.DataFrame] = {}
+    # Every section of the report, in the order their dataframes are stored (see report_sections)
+    SECTIONS = list(REPORT_SECTIONS)
 
-    def parse_markets_at_a_glance(self, page: int = 2) -> None:
+    def __init__(self, pdf_path: Union[str, BinaryIO], year: Optional[int] = None,
+                 cache: Optional[ExtractionCache] = None, backend: Optional[ExtractionBackend] = None):
         """
-        Parses the tables found in the "Markets at a glance" page.
-        """
-        tables = camelot.read_pdf(self.pdf_path, pages=str(page), flavor="stream", row_tol=10)
+        pdf_path is either a path on disk or an open binary file object (e.g. an upload's SpooledTemporaryFile
+        or a BytesIO), so uploads can be parsed without writing them to disk first.
 
-        if tables.n != 1:
-            # From experimentation we know Camelot detects the 5 "Markets at a glance" tables as one big table,
-            # and we need futher filtering to separate them in 5:
-            raise Exception(f"Unexpected number of tables found: {tables.n}")
+        The report prints dates without a year. They are placed around the report's own date, unless year is
+        given, which puts them all in that year.
 
-        raw_table = tables[0].df
-        title_indexes = raw_table.index[raw_table[0].isin(self.MARKETS_AT_A_GLANCE_TITLES)].tolist()
-        title_indexes.append(len(raw_table))
+        backend turns pages into raw tables, Camelot by default. With any other backend, sections whose
+        output fails validation are extracted again with Camelot.
+        """
+        self.pdf_path = pdf_path
+        self.year = year
+        self.cache = cache
+        self.backend = backend or CamelotBackend()
+        self.fallback_backend = None if isinstance(self.backend, CamelotBackend) else CamelotBackend()
+        self._pdf_hash: Optional[str] = None
+        self._page_index: Optional[PageIndex] = None
+        self._current_processed_dfs: dict[str, pd.DataFrame] = {}
 
-        # Split raw df into the 5 desired tables
-        split_tables = []
-        for i in range(len(title_indexes)-1):
-            start, end = title_indexes[i], title_indexes[i+1]
-            df_part = raw_table.iloc[start:end].reset_index(drop=True)
-            split_tables.append(df_part)
+    @property
+    def pdf_name(self) -> str:
+        return pdf_name(self.pdf_path)
 
-        # Perform data cleanse on each df
-        cleaned_dfs = []
-        for df in split_tables:
-            # Keep only columns with non-empty header names in the first row
-            cols_to_keep = [col for col in df.columns if df.at[0, col].strip() != ""]
-            df = df[cols_to_keep]
+    @property
+    def pdf_hash(self) -> str:
+        if self._pdf_hash is None:
+            self._pdf_hash = file_sha256(self.pdf_path)
+        return self._pdf_hash
 
-            # First row as header
-            df.columns = df.iloc[0]
-            df = df.iloc[1:].reset_index(drop=True)
-
-            # Convert numeric columns
-            for col in self.MARKETS_AT_A_GLANCE_NUMERIC_COLS:
-                if col in df.columns:
-                    # !Remove thousand separator: ,
-                    df[col] = df[col].astype(str).str.replace(",", "", regex=False)
-                    df[col] = pd.to_numeric(df[col], errors="coerce")
+    def locate_sections(self) -> PageIndex:
+        """
+        Finds the page of each section with a text-only pass over the document, cached per document hash.
+        """
+        if self._page_index is not None:
+            return self._page_index
+
+        key = self.cache.make_key(self.pdf_hash, "page_index") if self.cache is not None else None
+        cached = self.cache.get(key) if key else None
+        # Indexes cached before a section was registered, or before report dates were looked for, are rebuilt
+        if cached is not None and {*self.SECTIONS, "report_date"} <= set(cached["page_index"].columns):
+            self._page_index = PageIndex.from_frame(cached["page_index"])
+        else:
+            start = time.perf_counter()
+            with stage("locate_sections"):
+                self._page_index = build_page_index(self.pdf_path, {
+                    name: partial(self._is_section_page, section) for name, section in REPORT_SECTIONS.items()
+                })
+            logger.info(f"Located sections {self._page_index.pages} in {time.perf_counter() - start:.2f}s")
+            if key:
+                self.cache.put(key, {"page_index": self._page_index.to_frame()})
+        return self._page_index
+
+    @property
+    def report_date(self) -> date:
+        """
+        The date printed on the report, found along with the sections.
+        """
+        report_date = self.locate_sections().report_date
+        if report_date is None:
+            raise ValueError(f"Could not find the report date in {self.pdf_name}")
+        return report_date
+
+    @staticmethod
+    def _is_section_page(section: SectionSpec, text: str) -> bool:
+        # For sections with a fixed header, the same rule as the header row search of the cleaner on the whole page
+        found = sum(normalise_text(anchor) in text for anchor in section.anchors)
+        return found >= (section.min_anchors or len(section.anchors))
+
+    def _section_page(self, section: str, page: Optional[int]) -> int:
+        if page is not None:
+            return page
+        located_page = self.locate_sections().pages[section]
+        if located_page is None:
+            raise ValueError(f"Could not locate the {section} section in {self.pdf_name}")
+        return located_page
+
+    def _section(self, section: str, page: Optional[int]) -> Tuple[str, int, dict, Callable]:
+        """
+        What _parse_sections needs to parse the section: its page (located unless given), Camelot parameters
+        and cleaner.
+        """
+        spec = REPORT_SECTIONS[section]
+        return section, self._section_page(section, page), spec.camelot_params, partial(self._clean_section, spec)
 
-            # We assume the YTD column will contain non-null data 
-            df = df[df["YTD"].notnull()]
+    def parse_markets_at_a_glance(self, page: Optional[int] = None) -> None:
+        """
+        Parses the tables found in the "Markets at a glance" page, located automatically unless given.
+        """
+        self._parse_sections([self._section("markets_at_a_glance", page)], single_pass=False)
 
-            cleaned_dfs.append(df)
+    def parse_major_events_next_week(self, page: Optional[int] = None) -> None:
+        self._parse_sections([self._section("major_events", page)], single_pass=False)
 
-        for df, name in zip(cleaned_dfs, self.CLEAN_MAAG_TABLE_TITLES):
-            df.name = name.lower().replace(" ", "_").replace("(", "").replace(")", "")
-            self._current_processed_dfs[df.name] = df
+    def _given_pages(self, pages: Tuple[Optional[int], ...]) -> Dict[str, Optional[int]]:
+        """
+        The pages given to parse_pages or parse_all by section name: one per section, in SECTIONS order.
+        """
+        if len(pages) > len(self.SECTIONS):
+            raise TypeError(f"Got {len(pages)} pages for the {len(self.SECTIONS)} sections {self.SECTIONS}")
+        return dict(zip(self.SECTIONS, pages))
 
-    def parse_major_events_next_week(self, page: int = 3) -> None:
-        # Tolerance values are VERY finnicky. The whole process can break very easily with small layout
-        # changes in the source pdf docs.
-        tables = camelot.read_pdf(self.pdf_path, pages=str(page), flavor="stream", row_tol=11)
+    def parse_pages(self, *pages: Optional[int]) -> None:
+        """
+        Single-pass mode: parses every section opening the PDF only once. The backend reads every page
+        that is not already cached in one go, each with its section's own Camelot parameters, and each
+        table is handed to its section cleaner. pages holds the page of each section in SECTIONS order
+        (markets at a glance, then major events); sections without one are located automatically.
+        """
+        pages = self._given_pages(pages)
+        self._parse_sections([self._section(section, pages.get(section)) for section in self.SECTIONS],
+                             single_pass=True)
 
-        if tables.n != 1:
-            raise Exception(f"Unexpected number of tables found: {tables.n}")
+    def parse_all(self, *pages: Optional[int], executor: Optional[Executor] = None) -> Dict[str, Exception]:
+        """
+        Parses every section concurrently: each section that isn't cached is a task of its own in a process
+        pool (section_pool() unless executor is given), so a document takes about as long as its slowest
+        section. Results are merged in SECTIONS order whatever order the tasks finish in, and a section that
+        fails doesn't stop the others: the errors are returned by section, and the dataframes of every other
+        section are stored as usual. pages are given as to parse_pages.
+        """
+        pages = self._given_pages(pages)
+        errors: Dict[str, Exception] = {}
+        futures = {}
+        pdf = None
+        pool = executor
+        for section in self.SECTIONS:
+            try:
+                _, page, camelot_params, _ = self._section(section, pages.get(section))
+                if self._load_cached_section(section, page, camelot_params):
+                    continue
+                if pdf is None:
+                    # Open files (e.g. uploads) can't be sent to other processes, their bytes can
+                    pdf = self.pdf_path if isinstance(self.pdf_path, str) else self._read_pdf_bytes()
+                    pool = pool or section_pool()
+                # The workers date the events from the index rather than scanning the document again
+                page_index = self.locate_sections() if self.year is None else self._page_index
+                futures[section] = pool.submit(
+                    _parse_section_task, pdf, self.year, self.cache, self.backend, section, page, page_index
+                )
+            except Exception as e:
+                errors[section] = e
+
+        for section, future in futures.items():
+            try:
+                dfs, stages = future.result()
+            except Exception as e:
+                logger.error(f"Parsing {section} of {self.pdf_name} failed: {type(e).__name__}: {e}")
+                errors[section] = e
+                continue
+            extend_stages(stages)
+            for name, df in dfs.items():
+                # Attributes other than the data don't survive pickling
+                df.name = name
+                self._current_processed_dfs[name] = df
+        return {section: errors[section] for section in self.SECTIONS if section in errors}
+
+    def _read_pdf_bytes(self) -> bytes:
+        with open_pdf(self.pdf_path) as f:
+            return f.read()
+
+    def _parse_sections(self, sections: List[Tuple[str, int, dict, Callable[[pd.DataFrame, int], List[pd.DataFrame]]]],
+                        single_pass: bool) -> None:
+        """
+        Reads each section's raw table and runs its cleaner, going through the extraction cache (if any) for
+        both the raw table and the cleaned dataframes. The backend is tried first, then the fallback backend
+        (if any) for the sections the backend failed on.
+        """
+        pending = [
+            (section, page, camelot_params, clean) for section, page, camelot_params, clean in sections
+            if not self._load_cached_section(section, page, camelot_params)
+        ]
+        backends = [self.backend] + ([self.fallback_backend] if self.fallback_backend else [])
+
+        for backend in backends:
+            is_last = backend is backends[-1]
+            try:
+                cleaned = self._extract_sections(backend, pending, single_pass, validate=not is_last)
+            except Exception as e:
+                if is_last:
+                    raise
+                logger.warning(f"{backend.name} backend failed ({type(e).__name__}: {e}), falling back")
+                continue
+
+            for section, page, camelot_params, _ in pending:
+                if section in cleaned:
+                    self._store_section(section, page, camelot_params, cleaned[section])
+            pending = [item for item in pending if item[0] not in cleaned]
+            if not pending:
+                break
 
-        raw_major_events_df = tables[0].df
-        major_events_df = raw_major_events_df
+    def _extract_sections(self, backend: ExtractionBackend, sections: list, single_pass: bool,
+                          validate: bool) -> Dict[str, List[pd.DataFrame]]:
+        """
+        Cleaned dataframes of every section the backend extracted successfully. With validate, sections whose
+        cleaned output fails validation are left out (and their raw table isn't cached) so they can be retried.
+        """
+        raw_tables = {
+            section: self._load_cached_raw_table(backend, page, camelot_params)
+            for section, page, camelot_params, _ in sections
+        }
+        page_params = {
+            page: camelot_params for section, page, camelot_params, _ in sections if raw_tables[section] is None
+        }
+        read_tables = {}
+        if page_params:
+            start = time.perf_counter()
+            with stage(f"extract.{backend.name}"):
+                if single_pass:
+                    targets = {
+                        page: self._table_target(section, page, clean)
+                        for section, page, _, clean in sections if page in page_params
+                    }
+                    read_tables = backend.read_tables(self.pdf_path, page_params, targets)
+                else:
+                    read_tables = {
+                        page: backend.read_table(self.pdf_path, page, camelot_params)
+                        for page, camelot_params in page_params.items()
+                    }
+            logger.info(f"Read pages {sorted(page_params)} with {backend.name} in {time.perf_counter() - start:.2f}s")
+
+        cleaned = {}
+        for section, page, camelot_params, clean in sections:
+            raw_table = raw_tables[section]
+            if raw_table is None:
+                raw_table = read_tables[page]
+            try:
+                with stage(f"clean.{section}"):
+                    cleaned_dfs = clean(raw_table, page)
+                if validate:
+                    self._validate_section(section, cleaned_dfs)
+            except Exception as e:
+                if not validate:
+                    raise
+                logger.warning(f"{backend.name} output for {section} on page {page} rejected: {e}")
+                continue
+
+            if raw_tables[section] is None:
+                self._cache_raw_table(backend, page, camelot_params, raw_table)
+            cleaned[section] = cleaned_dfs
+        return cleaned
+
+    def _validate_section(self, section: str, cleaned_dfs: List[pd.DataFrame]) -> None:
+        """
+        Sanity checks on a section's cleaned output, for backends whose tables aren't the reference
+        Camelot ones. Raises ValueError when the output doesn't look like the section at all.
+        """
+        spec = REPORT_SECTIONS[section]
+        names = [df.name for df in cleaned_dfs]
+        expected_names = [table.name for table in spec.tables]
+        if names != expected_names:
+            raise ValueError(f"Expected tables {expected_names}, got {names}")
+        complete_cols = list(spec.complete_columns)
+        for df in cleaned_dfs:
+            if df.empty or not set(complete_cols) <= set(df.columns):
+                raise ValueError(f"Table {df.name} is empty or misses some of the columns {complete_cols}")
+            if df[complete_cols].isna().any().any():
+                raise ValueError(f"Table {df.name} has missing values in {complete_cols}")
+            for column, pattern in spec.column_patterns.items():
+                if not df[column].str.fullmatch(pattern).all():
+                    raise ValueError(f"Table {df.name} has invalid values in {column}")
+
+    def _table_target(self, section: str, page: int,
+                      clean: Callable[[pd.DataFrame, int], List[pd.DataFrame]]) -> TableTarget:
+        return TableTarget(score=partial(self._score_raw_table, section, page, clean),
+                           anchors=REPORT_SECTIONS[section].anchors)
+
+    def _score_raw_table(self, section: str, page: int, clean: Callable[[pd.DataFrame, int], List[pd.DataFrame]],
+                         raw_table: pd.DataFrame) -> Tuple[float, int, float]:
+        """
+        How well a raw table cleans into the section, for backends that tune their parameters: the share of
+        structural checks passed (titles found, tables with the section's number of columns), then the number of
+        score_columns values parsed and the share of those cells that parsed. Rows merged or split by a bad row_tol
+        lose values either way.
+        """
+        try:
+            cleaned_dfs = clean(raw_table, page)
+        except Exception:
+            return 0.0, 0, 0.0
+
+        spec = REPORT_SECTIONS[section]
+        title_share = raw_table[0].isin(spec.titles).sum() / len(spec.titles) if spec.titles else 1.0
+        column_share = np.mean([df.shape[1] == spec.width for df in cleaned_dfs]) if cleaned_dfs else 0.0
+
+        numeric = [df.reindex(columns=list(spec.score_columns)) for df in cleaned_dfs]
+        parsed = sum(int(df.notna().sum().sum()) for df in numeric)
+        cells = sum(df.size for df in numeric)
+        return float((title_share + column_share) / 2), parsed, parsed / cells if cells else 0.0
+
+    def _raw_cache_key(self, backend: ExtractionBackend, page: int, camelot_params: dict) -> str:
+        return self.cache.make_key(
+            self.pdf_hash, page, backend.name, camelot_params["flavor"], camelot_params["row_tol"]
+        )
 
-        header_row_idx = None
-        for idx, row in raw_major_events_df.iterrows():
-            matches = sum(
-                any(str(cell).lower().strip().find(h.lower()) != -1 for cell in row)
-                for h in self.MAJOR_EVENTS_COLS
-            )
-            if matches >= 5:
-                header_row_idx = idx
-                break
+    def _cleaned_cache_key(self, section: str, page: int, camelot_params: dict) -> str:
+        return self.cache.make_key(self._raw_cache_key(self.backend, page, camelot_params), section, self.year)
+
+    def _load_cached_section(self, section: str, page: int, camelot_params: dict) -> bool:
+        if self.cache is None:
+            return False
+        cached_dfs = self.cache.get(self._cleaned_cache_key(section, page, camelot_params))
+        if cached_dfs is None:
+            return False
+        for name, df in cached_dfs.items():
+            df.name = name
+            self._current_processed_dfs[name] = df
+        return True
+
+    def _load_cached_raw_table(self, backend: ExtractionBackend, page: int,
+                               camelot_params: dict) -> Optional[pd.DataFrame]:
+        if self.cache is None:
+            return None
+        cached_raw = self.cache.get(self._raw_cache_key(backend, page, camelot_params))
+        return None if cached_raw is None else cached_raw[RAW_TABLE_NAME]
+
+    def _cache_raw_table(self, backend: ExtractionBackend, page: int, camelot_params: dict,
+                         raw_table: pd.DataFrame) -> None:
+        if self.cache is not None:
+            self.cache.put(self._raw_cache_key(backend, page, camelot_params), {RAW_TABLE_NAME: raw_table})
+
+    def _store_section(self, section: str, page: int, camelot_params: dict, cleaned_dfs: List[pd.DataFrame]) -> None:
+        for df in cleaned_dfs:
+            self._current_processed_dfs[df.name] = df
+        if self.cache is not None:
+            self.cache.put(self._cleaned_cache_key(section, page, camelot_params), {df.name: df for df in cleaned_dfs})
 
-        if header_row_idx is not None:
-            major_events_df.columns = major_events_df.iloc[header_row_idx]
+    def _clean_section(self, spec: SectionSpec, raw_table: pd.DataFrame, page: int) -> List[pd.DataFrame]:
+        """
+        The section's cleaned dataframes, named after its tables (see SectionSpec).
+        """
+        if spec.columns:
+            header_row_idx = self._find_header_row(raw_table, spec.columns, spec.min_anchors or len(spec.columns))
+            if header_row_idx is None:
+                raise RuntimeError(f"Could not find header row in page {page}!")
             # Delete rows until header row
-            major_events_df = major_events_df.iloc[header_row_idx+1:].reset_index(drop=True)
-            major_events_df.columns = self.MAJOR_EVENTS_COLS
+            df = raw_table.iloc[header_row_idx + 1:].reset_index(drop=True)
+            df.columns = list(spec.columns)
+            tables = [(spec.tables[0], df)]
         else:
-            raise RuntimeError(f"Could not find header row in page {page}!")
-
-        # Cleanup:
-        major_events_df["Date"] = major_events_df["Date"].replace("", np.nan)
-        major_events_df["Date"] = pd.to_datetime(
-            major_events_df["Date"], 
-            format="%a, %d %b", 
-            errors="coerce"
-        )
-        major_events_df["Date"] = major_events_df["Date"].apply(lambda dt: dt.replace(year=2025) if pd.notnull(dt) else dt)
-        major_events_df["Date"] = major_events_df["Date"].ffill()
+            tables = self._split_titled_tables(spec, raw_table)
 
-        # Ensure numeric columns are numeric:
-        cols_to_convert = ["UniCredit Estimates", "Consensus (Bloomberg)", "Previous"]
-        major_events_df[cols_to_convert] = major_events_df[cols_to_convert].apply(
-            pd.to_numeric, errors="coerce"
+        cleaned_dfs = []
+        for table, df in tables:
+            df = self._clean_table(spec, df)
+            df.name = table.name
+            cleaned_dfs.append(df)
+        return cleaned_dfs
+
+    @staticmethod
+    def _split_titled_tables(spec: SectionSpec, raw_table: pd.DataFrame) -> List[Tuple[ReportTable, pd.DataFrame]]:
+        # Split raw df into the titled tables: every title row starts a new one (and holds its header), and rows
+        # above the first title belong to none of them
+        tables_by_title = {table.title: table for table in spec.tables}
+        table_ids = raw_table[0].isin(tables_by_title).cumsum()
+        in_a_table = table_ids > 0
+
+        tables = []
+        for _, df in raw_table[in_a_table].groupby(table_ids[in_a_table]):
+            df = df.reset_index(drop=True)
+            # Keep only columns with non-empty header names in the first row
+            df = df.loc[:, df.iloc[0].str.strip() != ""]
+
+            # First row as header
+            df.columns = df.iloc[0]
+            tables.append((tables_by_title[df.iloc[0, 0]], df.iloc[1:].reset_index(drop=True)))
+        return tables
+
+    def _clean_table(self, spec: SectionSpec, df: pd.DataFrame) -> pd.DataFrame:
+        # Convert numeric columns, !removing the thousand separator: ,
+        numeric_cols = [col for col in df.columns if col in spec.numeric_columns]
+        df[numeric_cols] = df[numeric_cols].apply(
+            lambda col: pd.to_numeric(col.astype(str).str.replace(",", "", regex=False), errors="coerce")
         )
 
-        # We ensure we don't keep any null/empty values in the Indicator/Event column
-        major_events_df = major_events_df[major_events_df['Indicator/Event'].str.strip() != ''].reset_index(drop=True)
+        for col, date_format in spec.date_columns.items():
+            dates = pd.to_datetime(df[col].replace("", np.nan), format=date_format, errors="coerce")
+            # Rows without a date belong to the one above
+            df[col] = self._in_report_year(dates).ffill()
+
+        required = df[spec.required_column]
+        has_value = required.notna()
+        if required.dtype == object:
+            has_value &= required.astype(str).str.strip() != ""
+        return df[has_value].reset_index(drop=True)
 
-        major_events_df.name = "Major Events".lower().replace(" ", "_").replace("(", "").replace(")", "")
-        self._current_processed_dfs[major_events_df.name] = major_events_df
+    def _in_report_year(self, dates: pd.Series) -> pd.Series:
+        """
+        Dates parsed without a year (so in 1900) moved to the year they were printed for: the one that puts them
+        closest to the report's date, so the January events of a late-December report land in the next year.
+        """
+        if self.year is not None:
+            return dates + pd.DateOffset(years=self.year - 1900)
+        report_date = pd.Timestamp(self.report_date)
+        dates = dates + pd.DateOffset(years=report_date.year - 1900)
+        half_year = pd.Timedelta(days=183)
+        dates = dates.mask(dates < report_date - half_year, dates + pd.DateOffset(years=1))
+        return dates.mask(dates > report_date + half_year, dates - pd.DateOffset(years=1))
+
+    @staticmethod
+    def _find_header_row(raw_table: pd.DataFrame, columns: Sequence[str], min_matches: int,
+                         block_size: int = 64) -> Optional[int]:
+        """
+        Index of the first row where at least min_matches of the columns appear in some cell.
+        Each block of rows is matched at once on the stacked cells, stopping at the first block with a match.
+        """
+        for block_start in range(0, len(raw_table), block_size):
+            block = raw_table.iloc[block_start:block_start + block_size]
+            cells = block.astype(str).stack().str.lower().str.strip()
+            matches = sum(
+                cells.str.contains(h.lower(), regex=False).groupby(level=0).any()
+                for h in columns
+            )
+            header_rows = matches.index[matches >= min_matches]
+            if len(header_rows):
+                return header_rows[0]
+        return None
 
-    def consolidate_and_export_top_bottom_markets(self, output_path: str):
+    def consolidate_and_export_top_bottom_markets(self, output_path: str, export_format: str = "csv"):
         """
         For the 5 Market tables we extracted, we add a new column indicating the Market Type (the name of the table)
         and we rename the main column to Market, to be able to concatenate them and find top and bottom performer in the last 12M
+        (see rankings.top_bottom). The three tables are exported in export_format (one of exporters.EXPORTERS),
+        a single markets.arrow for bundle.
         """
         if not self._current_processed_dfs:
             raise ValueError("No processed dataframes available to consolidate.")
 
-        expected_names = set(self.CLEAN_MAAG_TABLE_TITLES)
+        expected_names = set(table.name for table in MARKET_TABLES.values())
         actual_names = set(df.name for df in self._current_processed_dfs.values())
 
         if not expected_names.issubset(actual_names):
             raise ValueError(f"Processed DataFrames names {actual_names} do not match expected {expected_names}")
 
-        rename_map = {
-            "Equities": "Market",
-            "Rates (government bonds)": "Market",
-            "Credit": "Market",
-            "Commodities": "Market",
-            "Exchange rates": "Market",
-        }
-
         dfs = []
-        for df, market_type_name in zip(self._current_processed_dfs.values(), self.MARKETS_AT_A_GLANCE_TITLES):
-            df = df.copy()
-            df["Market Type"] = market_type_name
-            df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
+        for table in MARKET_TABLES.values():
+            df = self._current_processed_dfs[table.name]
+            # Prices, yields and spreads don't compare across markets
+            df = df.drop(columns=table.store.source_column("level"), errors="ignore").rename(
+                columns={table.store.source_column("instrument"): "Market"}
+            )
+            df["Market Type"] = table.title
             dfs.append(df)
 
-        consolidated_df = pd.concat(dfs)
-        consolidated_df = consolidated_df.drop(["Price", "Yield (%)", "OAS (bp)"], axis=1)
-        consolidated_df.to_csv(f"{output_path}/performance_metrics.csv", index=False)
+        consolidated_df = pd.concat(dfs, ignore_index=True)
 
         if '12M' not in consolidated_df.columns:
             raise ValueError("12M column not found in consolidated performance metrics data")
 
-        consolidated_df['12M'] = pd.to_numeric(consolidated_df['12M'], errors='coerce')
-        valid_data = consolidated_df.dropna(subset=['12M'])
+        valid_count = pd.to_numeric(consolidated_df['12M'], errors='coerce').notna().sum()
+        if valid_count < 6:
+            raise Exception(f"Only {valid_count} valid entries found. Not have enough data for top 3 and bottom 3.")
+        top_3_df, bottom_3_df = top_bottom(consolidated_df, metric="12M", n=3)
 
-        if len(valid_data) < 6:
-            raise Exception(f"Only {len(valid_data)} valid entries found. Not have enough data for top 3 and bottom 3.")
-        sorted_df = valid_data.sort_values('12M', ascending=False)
+        tables = {
+            name: ExportTable(df, numeric_columns=MARKET_PERIOD_COLS, categorical_columns=("Market Type",))
+            for name, df in [("performance_metrics", consolidated_df), ("top_3_markets_12M", top_3_df),
+                             ("bottom_3_markets_12M", bottom_3_df)]
+        }
+        return exporter_for(export_format).export(tables, output_path, "markets")
 
-        top_3_df = sorted_df.head(3).copy()
-        bottom_3_df = sorted_df.tail(3).copy()
-        
-        top_3_df.to_csv(f"{output_path}/top_3_markets_12M.csv", index=False)
-        bottom_3_df.to_csv(f"{output_path}/bottom_3_markets_12M.csv", index=False)
+    def _export_tables(self) -> Dict[str, ExportTable]:
+        """
+        The processed dataframes with the column types of their section, for the exporters.
+        """
+        sections = {table.name: spec for spec in REPORT_SECTIONS.values() for table in spec.tables}
+        tables = {}
+        for df in self._current_processed_dfs.values():
+            spec = sections.get(df.name)
+            tables[df.name] = ExportTable(df) if spec is None else ExportTable(
+                df, spec.numeric_columns, tuple(spec.date_columns), spec.categorical_columns
+            )
+        return tables
 
-    def export_dfs_to_csv(self, output_path: str) -> List:
+    def export_dfs(self, output_path: str, export_format: str = "csv") -> List:
         """
-        Export the stored processed dataframes to CSV.
+        Export the stored processed dataframes to output_path in export_format (one of exporters.EXPORTERS): one
+        file per dataframe, or a single tables.arrow for bundle.
         """
-        output_paths = []
+        exporter = exporter_for(export_format)
         if not self._current_processed_dfs:
             logger.warning("No processed dataframes to export.")
             return
@@ -191,14 +514,43 @@ class PDFMarketParser:
             logger.error("Not a valid output path provided.")
             raise ValueError("Output path must not be empty.")
 
-        for df in self._current_processed_dfs.values():
-            file_path = f"{output_path}/{df.name}.csv"
-            output_paths.append(file_path)
-            df.to_csv(file_path, index=False)
-            logger.info(f"Exported dataframe '{df.name}' to '{file_path}'")
+        with stage(f"export_{export_format}"):
+            output_paths = exporter.export(self._export_tables(), output_path, "tables")
+        for file_path in output_paths:
+            logger.info(f"Exported '{file_path}'")
         logger.info(f"Exported {len(self._current_processed_dfs)} dataframes to {output_path}")
         return output_paths
 
+    def export_dfs_to_csv(self, output_path: str) -> List:
+        """
+        Export the stored processed dataframes to CSV.
+        """
+        return self.export_dfs(output_path, "csv")
+
+    def export_dfs_to_archive(self, stream: BinaryIO, export_format: str = "csv") -> List[str]:
+        """
+        Export the stored processed dataframes to stream as a single archive in export_format: a ZIP of one file
+        per dataframe, or the bundle file itself. Each table is serialized straight into the archive, nothing
+        touches the disk. Returns the names of the tables in the archive.
+        """
+        exporter = exporter_for(export_format)
+        if not self._current_processed_dfs:
+            logger.warning("No processed dataframes to export.")
+            return []
+
+        # The CSV ZIP keeps the stage name it always had
+        with stage("export_zip" if export_format == "csv" else f"export_{export_format}"):
+            names = exporter.export_archive(self._export_tables(), stream)
+        logger.info(f"Exported {len(names)} dataframes as {export_format}")
+        return names
+
+    def export_dfs_to_zip(self, zip_stream: BinaryIO) -> List[str]:
+        """
+        Export the stored processed dataframes as CSV files inside a ZIP written to zip_stream.
+        Returns the names of the files in the ZIP.
+        """
+        return self.export_dfs_to_archive(zip_stream, "csv")
+
     def display_summary(self):
         """
         Displays a summary of the current processed dataframes.
@@ -209,3 +561,31 @@ class PDFMarketParser:
 
         for df in self._current_processed_dfs.values():
             logger.info(f"{df.name}: {len(df)} rows")
+
+
+@lru_cache(maxsize=1)
+def section_pool() -> Executor:
+    """
+    The process pool parse_all runs sections in by default, one worker per section, started on first use and
+    shared by every parser of the process. Its workers preload the PDF libraries as they start.
+    """
+    return ProcessPoolExecutor(
+        max_workers=len(PDFMarketParser.SECTIONS), mp_context=multiprocessing.get_context("spawn"),
+        initializer=partial(preload, ["camelot", *PDF_LIBRARIES]),
+    )
+
+
+def _parse_section_task(pdf: Union[str, bytes], year: Optional[int], cache: Optional[ExtractionCache],
+                        backend: ExtractionBackend, section: str, page: int,
+                        page_index: Optional[PageIndex] = None) -> Tuple[Dict[str, pd.DataFrame], List[StageTiming]]:
+    """
+    One section of parse_all, in a worker: the section's cleaned dataframes and the timings of its stages.
+    page_index is the parent's, when it has located the sections already.
+    """
+    parser = PDFMarketParser(io.BytesIO(pdf) if isinstance(pdf, bytes) else pdf, year=year, cache=cache,
+                             backend=backend)
+    parser._page_index = page_index
+    with record_stages() as stages:
+        # Single pass over one page: its layout is analysed straight from the document, as in parse_pages
+        parser._parse_sections([parser._section(section, page)], single_pass=True)
+    return parser._current_processed_dfs, stages
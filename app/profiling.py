@@ -0,0 +1,118 @@
+import cProfile
+import marshal
+import resource
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+
+class StageTiming(NamedTuple):
+    """
+    One stage of a parse: its wall time, the peak RSS of the process during the stage and how far above the
+    RSS at the start of the stage that peak went.
+    """
+    stage: str
+    seconds: float
+    peak_rss_bytes: int
+    rss_growth_bytes: int
+
+
+_stages: ContextVar[Optional[List[StageTiming]]] = ContextVar("stages", default=None)
+
+
+def _proc_status_bytes(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def rss_bytes() -> int:
+    return _proc_status_bytes("VmRSS") or 0
+
+
+def peak_rss_bytes() -> int:
+    """
+    Peak RSS of the process since the last reset_peak_rss(). Falls back to ru_maxrss without /proc, which
+    can't be reset and, after a spawn, starts from the parent's peak.
+    """
+    peak = _proc_status_bytes("VmHWM")
+    # ru_maxrss is in KiB on Linux
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_peak_rss() -> None:
+    # Linux 4.0+: writing 5 to clear_refs resets VmHWM to the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+@contextmanager
+def record_stages() -> Iterator[List[StageTiming]]:
+    """
+    Collects the timings of every stage() run inside the block (in the same thread or task) into the list.
+    """
+    stages: List[StageTiming] = []
+    token = _stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _stages.reset(token)
+
+
+def extend_stages(timings: Iterable[StageTiming]) -> None:
+    """
+    Adds timings measured elsewhere (e.g. in another process) to the stages being recorded, if any.
+    """
+    stages = _stages.get()
+    if stages is not None:
+        stages.extend(timings)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times the block as stage name and tracks its memory high-water mark, when inside record_stages(). Outside,
+    it costs a context variable lookup. The peak is process-wide and reset when a stage starts, so stages
+    shouldn't nest, and stages of concurrent requests in one process see each other's allocations.
+    """
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+    start_rss = rss_bytes()
+    reset_peak_rss()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        peak = peak_rss_bytes()
+        stages.append(StageTiming(name, time.perf_counter() - start, peak, max(0, peak - start_rss)))
+
+
+@contextmanager
+def profiled(enabled: bool) -> Iterator[List[bytes]]:
+    """
+    Runs the block under cProfile when enabled. The list receives the stats marshalled as pstats reads them
+    (what Profile.dump_stats writes), so they can be sent back from a worker process and saved as a .prof file.
+    """
+    stats: List[bytes] = []
+    if not enabled:
+        yield stats
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield stats
+    finally:
+        profiler.disable()
+        profiler.create_stats()
+        stats.append(marshal.dumps(profiler.stats))
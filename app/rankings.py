@@ -0,0 +1,23 @@
+from typing import Tuple
+
+import pandas as pd
+
+# Metric as printed in the report -> its market_snapshot column
+METRICS = {"1M": "m1", "3M": "m3", "6M": "m6", "12M": "m12", "YTD": "ytd", "QTD": "qtd"}
+
+
+def top_bottom(df: pd.DataFrame, metric: str = "12M", n: int = 3) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    The n rows of df with the highest metric, best first, and the n with the lowest, worst last (the head and
+    tail of a descending sort). Rows whose metric isn't numeric are left out, and the metric column of the
+    returned rows is numeric.
+
+    Uses partial selection (nlargest/nsmallest), linear in the number of rows, instead of sorting all of them.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {list(METRICS)}")
+    values = pd.to_numeric(df[metric], errors="coerce").reset_index(drop=True)
+    largest, smallest = values.nlargest(n), values.nsmallest(n)[::-1]
+    top = df.iloc[largest.index].assign(**{metric: largest.to_numpy()})
+    bottom = df.iloc[smallest.index].assign(**{metric: smallest.to_numpy()})
+    return top, bottom
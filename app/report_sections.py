@@ -0,0 +1,160 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class StoreTarget:
+    """
+    Where the rows of a cleaned table are stored: the database table, the column each dataframe column goes to,
+    the columns identifying a row and the columns with the same value for every row (e.g. the market_type of a
+    market table). bulk_writer turns it into the TableSpec of the table's model. view_columns renames columns
+    in the read-only view of these rows alone, where there is one (the old per-market tables).
+    """
+    table: str
+    column_map: Dict[str, str]
+    conflict_cols: Tuple[str, ...]
+    fixed_values: Dict[str, str] = field(default_factory=dict)
+    view_columns: Dict[str, str] = field(default_factory=dict)
+
+    def source_column(self, column: str) -> Optional[str]:
+        """
+        The dataframe column stored in column, None if none is.
+        """
+        return next((src for src, dst in self.column_map.items() if dst == column), None)
+
+
+@dataclass(frozen=True)
+class ReportTable:
+    """
+    One cleaned dataframe of a section. name names the dataframe (and its CSV file); title is the first cell of
+    the row that starts the table in sections holding several titled tables. Tables without a store target are
+    exported but not stored.
+    """
+    name: str
+    title: Optional[str] = None
+    store: Optional[StoreTarget] = None
+
+
+@dataclass(frozen=True)
+class SectionSpec:
+    """
+    Everything the parser needs to find, extract and clean one section of the report.
+
+    The section's page is the first one showing min_anchors of its anchors (all of them by default). Its raw
+    table is either split into titled tables, each starting with a row whose first cell is the table's title and
+    holds its header, or, when columns is given, read from the first row showing min_anchors of those columns
+    on. Every table is then cleaned the same way: numeric_columns coerced (thousand separators removed),
+    date_columns parsed with their format and moved to the report year (they print no year), and rows without
+    a value in required_column dropped. Typed exports (Parquet, Arrow) store numeric_columns as float32,
+    date_columns as datetime64 and categorical_columns as categories.
+
+    Backends other than Camelot are checked against the rest: every table present and non-empty,
+    complete_columns without missing values and column_patterns matched by every value. Their raw tables are
+    scored on how many score_columns values parse and how many tables have width columns.
+    """
+    name: str
+    anchors: Tuple[str, ...]
+    camelot_params: Dict[str, object]
+    tables: Tuple[ReportTable, ...]
+    required_column: str
+    columns: Tuple[str, ...] = ()
+    min_anchors: Optional[int] = None
+    numeric_columns: Tuple[str, ...] = ()
+    date_columns: Dict[str, str] = field(default_factory=dict)
+    categorical_columns: Tuple[str, ...] = ()
+    complete_columns: Tuple[str, ...] = ()
+    column_patterns: Dict[str, str] = field(default_factory=dict)
+    score_columns: Tuple[str, ...] = ()
+    width: int = 8
+
+    @property
+    def titles(self) -> Tuple[str, ...]:
+        return tuple(table.title for table in self.tables if table.title is not None)
+
+
+MARKET_COLUMNS = {"1M": "m1", "3M": "m3", "6M": "m6", "12M": "m12", "YTD": "ytd", "QTD": "qtd"}
+MARKET_PERIOD_COLS = tuple(MARKET_COLUMNS)
+
+
+def market_table(title: str, market_type: str, level_col: str, instrument_view_col: str,
+                 level_view_col: str) -> ReportTable:
+    """
+    A "Markets at a glance" table: instruments by title, a price, yield or spread level and the period returns,
+    stored in market_snapshot under market_type. The view named after market_type shows its instrument and
+    level as instrument_view_col and level_view_col.
+    """
+    name = title.lower().replace(" ", "_").replace("(", "").replace(")", "")
+    return ReportTable(name, title, StoreTarget(
+        "market_snapshot", {title: "instrument", level_col: "level", **MARKET_COLUMNS},
+        ("market_type", "instrument", "week"), {"market_type": market_type},
+        {"instrument": instrument_view_col, "level": level_view_col},
+    ))
+
+
+MARKETS_AT_A_GLANCE = SectionSpec(
+    name="markets_at_a_glance",
+    tables=(
+        market_table("Equities", "equities", "Price", "equity", "price"),
+        market_table("Rates (government bonds)", "rates", "Yield (%)", "rate", "yield_percent"),
+        market_table("Credit", "credit", "OAS (bp)", "credit", "oas_bp"),
+        market_table("Commodities", "commodities", "Price", "commodity", "price"),
+        market_table("Exchange rates", "exchange_rates", "Price", "exchange_rate", "price"),
+    ),
+    anchors=("Markets at a glance", "Equities", "Rates (government bonds)", "Credit", "Commodities",
+             "Exchange rates"),
+    camelot_params={"flavor": "stream", "row_tol": 10},
+    numeric_columns=(*MARKET_PERIOD_COLS, "Price", "Yield (%)", "OAS (bp)"),
+    # We assume the YTD column will contain non-null data
+    required_column="YTD",
+    complete_columns=MARKET_PERIOD_COLS,
+    score_columns=MARKET_PERIOD_COLS,
+)
+
+MAJOR_EVENTS_COLS = (
+    "Date", "Time", "Country", "Indicator/Event", "Period", "UniCredit Estimates", "Consensus (Bloomberg)", "Previous"
+)
+
+MAJOR_EVENTS = SectionSpec(
+    name="major_events",
+    tables=(ReportTable("major_events", store=StoreTarget(
+        "major_events",
+        {
+            "Date": "date",
+            "Time": "time",
+            "Country": "country",
+            "Indicator/Event": "indicator_event",
+            "Period": "period",
+            "UniCredit Estimates": "unicredit_estimates",
+            "Consensus (Bloomberg)": "consensus_bloomberg",
+            "Previous": "previous",
+        },
+        # We define "uniqueness" per country AND indicator
+        ("country", "indicator_event", "week"),
+    )),),
+    anchors=MAJOR_EVENTS_COLS,
+    min_anchors=5,
+    columns=MAJOR_EVENTS_COLS,
+    # Tolerance values are VERY finnicky. The whole process can break very easily with small layout
+    # changes in the source pdf docs.
+    camelot_params={"flavor": "stream", "row_tol": 11},
+    numeric_columns=("UniCredit Estimates", "Consensus (Bloomberg)", "Previous"),
+    date_columns={"Date": "%a, %d %b"},
+    categorical_columns=("Country",),
+    # We ensure we don't keep any null/empty values in the Indicator/Event column
+    required_column="Indicator/Event",
+    complete_columns=("Date",),
+    # Misaligned columns show up as text in the short, fixed-format ones
+    column_patterns={"Time": r"(\d{1,2}:\d{2})?", "Country": r"[A-Za-z]{0,4}"},
+    score_columns=("UniCredit Estimates", "Consensus (Bloomberg)", "Previous"),
+)
+
+# Every section of the report, in the order their dataframes are stored. Parsing another part of the report
+# takes a SectionSpec here (and a model for its StoreTarget's table, unless it goes to an existing one).
+REPORT_SECTIONS: Dict[str, SectionSpec] = {section.name: section for section in (MARKETS_AT_A_GLANCE, MAJOR_EVENTS)}
+
+# The tables stored in market_snapshot, keyed by their market_type
+MARKET_TABLES: Dict[str, ReportTable] = {
+    table.store.fixed_values["market_type"]: table
+    for section in REPORT_SECTIONS.values() for table in section.tables
+    if table.store is not None and table.store.table == "market_snapshot"
+}
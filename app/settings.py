@@ -0,0 +1,5 @@
+# Paths shared by the API and the command line runs. Kept free of imports, so scripts that only need a path
+# don't load the API (and FastAPI) to get it.
+OUTPUT_PATH = "/data/output"
+INPUT_PATH = "/data/input"
+PDF_PATH = f"{INPUT_PATH}/241025 Unicredit Macro & Markets Weekly Focus - python.pdf"
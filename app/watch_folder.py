@@ -0,0 +1,473 @@
+"""
+Ingestion service: watches a folder for new weekly PDFs and parses, exports and stores each one as it lands.
+
+    python watch_folder.py [--input-dir /data/input] [--output-dir /data/output] [--workers N] [--settle 2]
+        [--state-file /data/watch_state.json] [--metrics-port 9108] [--polling]
+
+New files are picked up with inotify (polling the folder where it isn't available, or with --polling, e.g. on
+network mounts that don't deliver events) and only queued once their size and mtime have been stable for
+--settle seconds, so half-copied PDFs are never parsed. Queued PDFs go to a pool of --workers parser processes;
+every result is exported to <output-dir>/<pdf name>/ by the worker and stored by this process, under the week of
+the report. What was done with each file is kept in --state-file, so a restart doesn't reprocess anything, and
+a file is only processed again when it changes. PDFs already in the ingestion ledger are skipped without
+parsing. Queue depth, in-flight PDFs and per-file latency are served in the Prometheus text format on
+--metrics-port.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import logging
+import multiprocessing
+import os
+import select
+import signal
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from batch_run import ParseResult, parse_pdf
+from database import get_session_factory
+from extraction_backends import BACKENDS
+from extraction_cache import file_sha256
+from history_store import history_store_from_env
+from ingestion_ledger import is_ingested, report_week, store_document
+from metrics import PipelineMetrics
+from profiling import StageTiming
+from settings import INPUT_PATH, OUTPUT_PATH
+
+logger = logging.getLogger(__name__)
+
+# (size, mtime_ns) of a file: a PDF is only queued once it stops changing
+Signature = Tuple[int, int]
+
+# inotify(7) events and flags
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+STORED = "stored"
+ALREADY_INGESTED = "already_ingested"
+FAILED = "failed"
+
+
+def is_watched(name: str) -> bool:
+    # Hidden files are the temporary copies of rsync and most upload tools
+    return name.lower().endswith(".pdf") and not name.startswith(".")
+
+
+def file_signature(path: str) -> Optional[Signature]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def folder_signatures(directory: str) -> Dict[str, Signature]:
+    signatures = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if is_watched(entry.name) and entry.is_file():
+                stat = entry.stat()
+                signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+class PollingWatcher:
+    """
+    Lists the folder every interval and reports the PDFs that appeared or changed since the last listing.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._seen = folder_signatures(directory)
+
+    def changes(self, timeout: float) -> Set[str]:
+        time.sleep(timeout)
+        current = folder_signatures(self.directory)
+        changed = {name for name, signature in current.items() if self._seen.get(name) != signature}
+        self._seen = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    Reports the PDFs created, written, closed or moved into the folder, from inotify through libc (Linux only).
+    Raises OSError where inotify isn't available.
+    """
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            inotify_init1, inotify_add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except (OSError, AttributeError) as e:
+            raise OSError(f"inotify is not available: {e}") from None
+        self._fd = inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if inotify_add_watch(self._fd, os.fsencode(directory), self.MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"Can't watch {directory}")
+
+    def changes(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        changed: Set[str] = set()
+        while readable:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0"))
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped, any file may have changed
+                    changed.update(folder_signatures(self.directory))
+                elif is_watched(name):
+                    changed.add(name)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher(directory: str, polling: bool = False):
+    if not polling:
+        try:
+            return InotifyWatcher(directory)
+        except OSError as e:
+            logger.warning(f"{e}, polling {directory} instead")
+    return PollingWatcher(directory)
+
+
+class Debouncer:
+    """
+    Holds back the files that changed until their signature has been the same for settle seconds, so files
+    still being copied aren't read half-written. Empty files are held back too.
+    """
+
+    def __init__(self, directory: str, settle: float):
+        self.directory = directory
+        self.settle = settle
+        # name -> signature, when it last changed, when the file was first seen
+        self._pending: Dict[str, Tuple[Optional[Signature], float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, names: Set[str], now: float) -> None:
+        for name in names:
+            _, _, first_seen = self._pending.get(name, (None, now, now))
+            self._pending[name] = (None, now, first_seen)
+
+    def next_deadline(self) -> Optional[float]:
+        return min((changed_at + self.settle for _, changed_at, _ in self._pending.values()), default=None)
+
+    def ready(self, now: float) -> List[Tuple[str, Signature, float]]:
+        """
+        The files that have settled, with their signature and when they were first seen.
+        """
+        settled = []
+        for name, (signature, changed_at, first_seen) in list(self._pending.items()):
+            current = file_signature(os.path.join(self.directory, name))
+            if current is None:
+                del self._pending[name]
+            elif current != signature:
+                self._pending[name] = (current, now, first_seen)
+            elif now - changed_at >= self.settle and current[0] > 0:
+                del self._pending[name]
+                settled.append((name, current, first_seen))
+        return settled
+
+
+class WatchState:
+    """
+    What the daemon did with every file of the folder, in a JSON file written atomically after each change.
+    A file counts as processed as long as its signature is the one recorded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.files = json.load(f)["files"]
+            except (OSError, ValueError, KeyError) as e:
+                # The ingestion ledger still keeps what was stored from being stored twice
+                logger.warning(f"Ignoring unreadable state file {path}: {e}")
+
+    def is_processed(self, name: str, signature: Signature) -> bool:
+        entry = self.files.get(name)
+        return entry is not None and (entry["size"], entry["mtime_ns"]) == tuple(signature)
+
+    def record(self, name: str, signature: Signature, status: str, **details) -> None:
+        self.files[name] = {"size": signature[0], "mtime_ns": signature[1], "status": status, **details}
+        self.save()
+
+    def forget_missing(self, names: Set[str]) -> None:
+        """
+        Drops the entries of files that are no longer in the folder, so the state doesn't grow forever.
+        """
+        missing = set(self.files) - names
+        if missing:
+            for name in missing:
+                del self.files[name]
+            self.save()
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"files": self.files}, f, indent=1)
+        os.replace(temp_path, self.path)
+
+
+def _default_executor(max_workers: int) -> Executor:
+    # The metrics server thread is already running: forked workers could inherit its locks held
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+@dataclass
+class QueuedPdf:
+    name: str
+    signature: Signature
+    pdf_hash: str
+    first_seen: float
+    queued_at: float
+    started_at: Optional[float] = None
+
+
+class WatchFolder:
+    """
+    The daemon: feeds settled PDFs of input_dir to at most workers parser processes, in the order they settled,
+    and stores the results as they come back (this process is the only database writer, as in batch_run).
+    PDFs waiting for a worker make up the queue depth.
+    """
+
+    def __init__(self, input_dir: str, output_dir: str, state: WatchState, watcher=None, workers: int = 1,
+                 settle: float = 2.0, poll_interval: float = 1.0, backend: str = "camelot",
+                 year: Optional[int] = None,
+                 session_factory: Optional[Callable] = None, history_store=None,
+                 executor_factory: Callable[[int], Executor] = _default_executor,
+                 metrics: Optional[PipelineMetrics] = None):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.state = state
+        self.watcher = watcher if watcher is not None else open_watcher(input_dir)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.backend = backend
+        self.year = year
+        self.session_factory = session_factory or get_session_factory()
+        self.history_store = history_store
+        self.metrics = metrics or PipelineMetrics()
+        self.debouncer = Debouncer(input_dir, settle)
+        self.queue: Deque[QueuedPdf] = deque()
+        self.in_flight: Dict[Future, QueuedPdf] = {}
+        self._executor = executor_factory(workers)
+
+    def gauges(self) -> Dict[str, Tuple[str, float]]:
+        return {
+            "watch_queue_depth": ("Settled PDFs waiting for a parser worker.", len(self.queue)),
+            "watch_in_flight": ("PDFs being parsed.", len(self.in_flight)),
+            "watch_settling": ("Changed files waiting to settle before they are queued.", len(self.debouncer)),
+        }
+
+    def scan(self) -> None:
+        """
+        Picks up what landed while the daemon was down: every file of the folder goes through the debouncer,
+        and those already processed are dropped when they settle.
+        """
+        names = set(folder_signatures(self.input_dir))
+        self.state.forget_missing(names)
+        self.debouncer.touch(names, time.monotonic())
+
+    def run(self, stop: threading.Event) -> None:
+        self.scan()
+        try:
+            while not stop.is_set():
+                self.step()
+            # PDFs being parsed are finished and recorded, the queue is picked up again by the next start
+            while self.in_flight:
+                self._collect(wait=True)
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self.watcher.close()
+
+    def step(self) -> None:
+        now = time.monotonic()
+        self.debouncer.touch(self.watcher.changes(self._timeout(now)), time.monotonic())
+        for name, signature, first_seen in self.debouncer.ready(time.monotonic()):
+            self._enqueue(name, signature, first_seen)
+        self._collect()
+        self._submit()
+
+    def _timeout(self, now: float) -> float:
+        timeout = self.poll_interval
+        deadline = self.debouncer.next_deadline()
+        if deadline is not None:
+            timeout = min(timeout, max(deadline - now, 0.0))
+        if self.in_flight:
+            # Results are stored by this loop, don't leave them waiting on a quiet folder
+            timeout = min(timeout, 0.1)
+        return timeout
+
+    def _enqueue(self, name: str, signature: Signature, first_seen: float) -> None:
+        if self.state.is_processed(name, signature):
+            return
+        pdf_path = os.path.join(self.input_dir, name)
+        pdf_hash = file_sha256(pdf_path)
+        if any(item.pdf_hash == pdf_hash for item in (*self.queue, *self.in_flight.values())):
+            return
+        with self.session_factory() as session:
+            ingested = is_ingested(session, pdf_hash)
+        if ingested:
+            logger.info(f"'{name}' was already ingested, skipping")
+            self.state.record(name, signature, ALREADY_INGESTED, sha256=pdf_hash)
+            self.metrics.count_document("watch", ALREADY_INGESTED)
+            return
+        self.queue.append(QueuedPdf(name, signature, pdf_hash, first_seen, time.monotonic()))
+        logger.info(f"Queued '{name}' ({len(self.queue)} waiting)")
+
+    def _submit(self) -> None:
+        while self.queue and len(self.in_flight) < self.workers:
+            item = self.queue.popleft()
+            item.started_at = time.monotonic()
+            output_dir = os.path.join(self.output_dir, os.path.splitext(item.name)[0])
+            future = self._executor.submit(
+                parse_pdf, os.path.join(self.input_dir, item.name), year=self.year, backend=self.backend,
+                output_dir=output_dir,
+            )
+            self.in_flight[future] = item
+
+    def _collect(self, wait: bool = False) -> None:
+        for future in [future for future in self.in_flight if wait or future.done()]:
+            item = self.in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died
+                result = ParseResult(pdf_path=os.path.join(self.input_dir, item.name),
+                                     error=f"{type(e).__name__}: {e}")
+            self._finish(item, result)
+
+    def _finish(self, item: QueuedPdf, result: ParseResult) -> None:
+        status = FAILED
+        if result.error is None:
+            try:
+                with self.session_factory() as session:
+                    stored = store_document(session, result.dfs, item.pdf_hash, result.report_date, item.name)
+                if stored is not None and self.history_store is not None:
+                    self.history_store.append(result.dfs, report_week(result.report_date))
+                status = STORED if stored is not None else ALREADY_INGESTED
+            except Exception as e:
+                result.error = f"Storing failed: {type(e).__name__}: {e}"
+
+        done = time.monotonic()
+        latency = done - item.first_seen
+        self.metrics.observe_stages([
+            *result.stages,
+            StageTiming("watch_queue_wait", item.started_at - item.queued_at, 0, 0),
+            StageTiming("watch_latency", latency, 0, 0),
+        ])
+        self.metrics.count_document("watch", status)
+        details = {"sha256": item.pdf_hash, "latency_seconds": round(latency, 3)}
+        if result.report_date is not None:
+            details["report_date"] = result.report_date.isoformat()
+        if result.error is not None:
+            details["error"] = result.error
+        # Failed files are recorded too: they are only retried once they change (e.g. a complete copy lands)
+        self.state.record(item.name, item.signature, status, **details)
+
+        if result.error is None:
+            logger.info(f"Ingested '{item.name}' in {latency:.2f}s after it landed "
+                        f"(queued {item.started_at - item.queued_at:.2f}s, parsed {result.elapsed:.2f}s)")
+        else:
+            logger.error(f"Failed '{item.name}' after {latency:.2f}s: {result.error}")
+
+
+def serve_metrics(port: int, render: Callable[[], str]) -> ThreadingHTTPServer:
+    """
+    Serves render() on GET /metrics from a background thread.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--input-dir", default=INPUT_PATH)
+    arg_parser.add_argument("--output-dir", default=OUTPUT_PATH)
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of parser processes")
+    arg_parser.add_argument("--settle", type=float, default=2.0,
+                            help="Seconds a file must stay unchanged before it is queued")
+    arg_parser.add_argument("--poll-interval", type=float, default=1.0)
+    arg_parser.add_argument("--polling", action="store_true", help="Poll the folder instead of using inotify")
+    arg_parser.add_argument("--state-file", default="/data/watch_state.json")
+    arg_parser.add_argument("--metrics-port", type=int, default=9108, help="0 disables the metrics endpoint")
+    arg_parser.add_argument("--backend", choices=sorted(BACKENDS), default="camelot")
+    arg_parser.add_argument("--year", type=int,
+                            help="Year of the event dates, placed around each report's own date by default")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    daemon = WatchFolder(
+        args.input_dir, args.output_dir, WatchState(args.state_file),
+        watcher=open_watcher(args.input_dir, args.polling), workers=args.workers, settle=args.settle,
+        poll_interval=args.poll_interval, backend=args.backend, year=args.year,
+        history_store=history_store_from_env(),
+    )
+    server = None
+    if args.metrics_port:
+        server = serve_metrics(args.metrics_port, lambda: daemon.metrics.render(gauges=daemon.gauges()))
+    logger.info(f"Watching {args.input_dir} with {type(daemon.watcher).__name__}, {args.workers} workers")
+    try:
+        daemon.run(stop)
+    finally:
+        if server is not None:
+            server.shutdown()
+    logger.info("Stopped")
+
+
+if __name__ == "__main__":
+    main()
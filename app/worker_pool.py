@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """
+    Raised when a job is submitted while the pool already holds max_pending jobs.
+    """
+
+
+def _default_executor(max_workers: int, initializer: Optional[Callable[[], None]] = None) -> Executor:
+    # Spawned workers don't inherit the event loop and sockets of the API process
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"), initializer=initializer
+    )
+
+
+def _noop() -> None:
+    pass
+
+
+class BoundedWorkerPool:
+    """
+    Runs blocking work off the event loop in a worker pool, with back-pressure: at most max_pending jobs
+    (running plus queued) are accepted, anything above that is rejected straight away instead of piling
+    up in the executor's unbounded queue. initializer runs once in every worker as it starts, e.g. to preload
+    what jobs need.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int,
+                 executor_factory: Callable[[int, Optional[Callable[[], None]]], Executor] = _default_executor,
+                 initializer: Optional[Callable[[], None]] = None):
+        if max_pending < max_workers:
+            raise ValueError("max_pending must be at least max_workers")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor_factory = executor_factory
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def is_saturated(self) -> bool:
+        return self._pending >= self.max_pending
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = self._executor_factory(self.max_workers, self.initializer)
+            if self.initializer is not None:
+                # Workers are spawned as jobs arrive: an empty job per worker starts them (and their initializer)
+                # now, in the background, rather than on the first uploads
+                for _ in range(self.max_workers):
+                    self._executor.submit(_noop)
+            logger.info(f"Started worker pool with {self.max_workers} workers, {self.max_pending} max pending jobs")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, func: Callable, *args, **kwargs) -> asyncio.Future:
+        """
+        Schedules the job and returns an awaitable future. The slot is taken synchronously, so callers can
+        submit from a request handler and await the result later (or never) without racing other requests.
+        """
+        if self._executor is None:
+            raise RuntimeError("Worker pool has not been started")
+        if self.is_saturated():
+            raise PoolSaturatedError(f"{self._pending} jobs already pending")
+
+        self._pending += 1
+        future = asyncio.wrap_future(self._executor.submit(partial(func, *args, **kwargs)))
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: asyncio.Future) -> None:
+        self._pending -= 1
+
+    async def run(self, func: Callable, *args, **kwargs):
+        return await self.submit(func, *args, **kwargs)
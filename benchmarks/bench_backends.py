@@ -0,0 +1,100 @@
+"""
+Latency and output equality of each extraction backend, on every PDF in data/input (or the given PDFs).
+
+    python benchmarks/bench_backends.py [PDF ...] [--repeat 3]
+
+Each document goes through PDFMarketParser.parse_pages with the extraction cache disabled. The word_boxes
+row says whether its own tables passed validation or the parser fell back to Camelot, and whether the
+cleaned dataframes are identical to the Camelot ones.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import warnings
+from typing import Dict, Optional
+
+import pandas as pd
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from extraction_backends import CamelotBackend, WordBoxBackend  # noqa: E402
+from pdf_tables_parser import PDFMarketParser  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+
+class CountingCamelotBackend(CamelotBackend):
+    def __init__(self):
+        self.calls = 0
+
+    def read_tables(self, pdf, page_params, targets=None):
+        self.calls += 1
+        return super().read_tables(pdf, page_params, targets)
+
+
+def parse(pdf_path: str, backend_name: str):
+    """
+    Cleaned dataframes (or the error) and whether the parser had to fall back to Camelot.
+    """
+    if backend_name == "camelot":
+        parser = PDFMarketParser(pdf_path=pdf_path, backend=CamelotBackend())
+    else:
+        parser = PDFMarketParser(pdf_path=pdf_path, backend=WordBoxBackend())
+        parser.fallback_backend = CountingCamelotBackend()
+    try:
+        parser.parse_pages()
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", False
+    fell_back = isinstance(parser.fallback_backend, CountingCamelotBackend) and parser.fallback_backend.calls > 0
+    return parser._current_processed_dfs, None, fell_back
+
+
+def best_time(pdf_path: str, backend_name: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(pdf_path, backend_name)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def same_output(expected: Optional[Dict[str, pd.DataFrame]], actual: Optional[Dict[str, pd.DataFrame]]) -> str:
+    if expected is None or actual is None:
+        return "n/a"
+    if list(expected) != list(actual):
+        return "no (tables differ)"
+    for name, df in expected.items():
+        try:
+            pd.testing.assert_frame_equal(df, actual[name])
+        except AssertionError:
+            return f"no ({name})"
+    return "yes"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="*")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    pdf_paths = args.pdfs or sorted(glob.glob(os.path.join(APP_DIR, "..", "data", "input", "*.pdf")))
+
+    print(f"{'document':<60} {'backend':<11} {'time':>8} {'speed-up':>9}  {'path':<10} {'same as camelot'}")
+    for pdf_path in pdf_paths:
+        name = os.path.basename(pdf_path)
+        reference, reference_error, _ = parse(pdf_path, "camelot")
+        reference_time = best_time(pdf_path, "camelot", args.repeat)
+        print(f"{name:<60} {'camelot':<11} {reference_time:>7.2f}s {'':>9}  "
+              f"{'failed' if reference_error else 'camelot':<10} {reference_error or ''}")
+
+        dfs, error, fell_back = parse(pdf_path, "word_boxes")
+        fast_time = best_time(pdf_path, "word_boxes", args.repeat)
+        path = "failed" if error else ("fallback" if fell_back else "fast")
+        print(f"{'':<60} {'word_boxes':<11} {fast_time:>7.2f}s {reference_time / fast_time:>8.1f}x  "
+              f"{path:<10} {error or same_output(reference, dfs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Micro-benchmark of the section cleaners on synthetic raw Camelot tables, the loop-based cleaners the parser
+used to have versus the vectorized PDFMarketParser._clean_section every section goes through.
+
+    python benchmarks/bench_cleaners.py [--rows 10000 20000 50000] [--preamble 200] [--repeat 3]
+
+The synthetic tables are shaped like the real pages (five titled blocks for "Markets at a glance", a run of
+noise rows before the header for "Major events"), only much longer. Both implementations must produce the
+same frames (up to the row labels), which is checked before timing.
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+from functools import partial
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from pdf_tables_parser import PDFMarketParser  # noqa: E402
+from report_sections import MAJOR_EVENTS, MAJOR_EVENTS_COLS, MARKETS_AT_A_GLANCE  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+MAAG_HEADERS = {
+    "Equities": ["Price", "1M", "3M", "6M", "12M", "YTD", "QTD"],
+    "Rates (government bonds)": ["Yield (%)", "1M", "3M", "6M", "12M", "YTD", "QTD"],
+    "Credit": ["OAS (bp)", "1M", "3M", "6M", "12M", "YTD", "QTD"],
+    "Commodities": ["Price", "1M", "3M", "6M", "12M", "YTD", "QTD"],
+    "Exchange rates": ["Price", "1M", "3M", "6M", "12M", "YTD", "QTD"],
+}
+
+
+def make_raw_maag_table(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    block_rows = rows // len(MAAG_HEADERS)
+    data = [["Markets at a glance", "", "", "", "", "", "", "", ""]]
+    for title, headers in MAAG_HEADERS.items():
+        data.append([title, *headers, ""])
+        for i in range(block_rows):
+            values = rng.normal(0, 10, len(headers))
+            row = [f"{title} {i}", f"{abs(values[0]) * 1000:,.1f}", *(f"{v:.1f}" for v in values[1:])]
+            if i % 50 == 0:
+                row[-2] = ""  # no YTD, dropped by the cleaner
+            data.append([*row, ""])
+    return pd.DataFrame(data)
+
+
+def make_raw_major_events_table(rows: int, preamble: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = [[f"Note {i}", "", "", "", "", "", "", "Source: UniCredit Research"] for i in range(preamble)]
+    data.append(list(MAJOR_EVENTS_COLS))
+    dates = pd.date_range("2025-01-06", periods=max(rows // 20, 1), freq="D")
+    for i in range(rows):
+        date = dates[i // 20].strftime("%a, %d %b") if i % 20 == 0 else ""
+        event = f"Event {i}" if i % 25 else ""
+        values = rng.normal(0, 5, 3)
+        data.append([date, "10:00", "EMU", event, "Oct", *(f"{v:.1f}" for v in values)])
+    return pd.DataFrame(data)
+
+
+def legacy_clean_markets_at_a_glance(raw_table: pd.DataFrame) -> List[pd.DataFrame]:
+    title_indexes = raw_table.index[raw_table[0].isin(MARKETS_AT_A_GLANCE.titles)].tolist()
+    title_indexes.append(len(raw_table))
+
+    split_tables = []
+    for i in range(len(title_indexes)-1):
+        start, end = title_indexes[i], title_indexes[i+1]
+        split_tables.append(raw_table.iloc[start:end].reset_index(drop=True))
+
+    cleaned_dfs = []
+    for df in split_tables:
+        cols_to_keep = [col for col in df.columns if df.at[0, col].strip() != ""]
+        df = df[cols_to_keep]
+        df.columns = df.iloc[0]
+        df = df.iloc[1:].reset_index(drop=True)
+        for col in MARKETS_AT_A_GLANCE.numeric_columns:
+            if col in df.columns:
+                df[col] = df[col].astype(str).str.replace(",", "", regex=False)
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        df = df[df["YTD"].notnull()]
+        cleaned_dfs.append(df)
+    return cleaned_dfs
+
+
+def legacy_clean_major_events(raw_table: pd.DataFrame, year: int = 2025) -> List[pd.DataFrame]:
+    major_events_df = raw_table.copy()
+    header_row_idx = None
+    for idx, row in major_events_df.iterrows():
+        matches = sum(
+            any(str(cell).lower().strip().find(h.lower()) != -1 for cell in row)
+            for h in MAJOR_EVENTS_COLS
+        )
+        if matches >= 5:
+            header_row_idx = idx
+            break
+    if header_row_idx is None:
+        raise RuntimeError("Could not find header row!")
+
+    major_events_df = major_events_df.iloc[header_row_idx+1:].reset_index(drop=True)
+    major_events_df.columns = list(MAJOR_EVENTS_COLS)
+    major_events_df["Date"] = major_events_df["Date"].replace("", np.nan)
+    major_events_df["Date"] = pd.to_datetime(major_events_df["Date"], format="%a, %d %b", errors="coerce")
+    major_events_df["Date"] = major_events_df["Date"].apply(lambda dt: dt.replace(year=year) if pd.notnull(dt) else dt)
+    major_events_df["Date"] = major_events_df["Date"].ffill()
+    cols_to_convert = ["UniCredit Estimates", "Consensus (Bloomberg)", "Previous"]
+    major_events_df[cols_to_convert] = major_events_df[cols_to_convert].apply(pd.to_numeric, errors="coerce")
+    major_events_df = major_events_df[major_events_df['Indicator/Event'].str.strip() != ''].reset_index(drop=True)
+    return [major_events_df]
+
+
+def best_time(func: Callable, *args, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def assert_same_frames(expected: List[pd.DataFrame], actual: List[pd.DataFrame]) -> None:
+    assert len(expected) == len(actual), f"{len(expected)} != {len(actual)} tables"
+    for expected_df, actual_df in zip(expected, actual):
+        pd.testing.assert_frame_equal(expected_df.reset_index(drop=True), actual_df)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 20_000, 50_000])
+    arg_parser.add_argument("--preamble", type=int, default=200, help="Noise rows before the major events header")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    parser = PDFMarketParser(pdf_path="synthetic.pdf")
+    cases = [
+        ("markets at a glance", make_raw_maag_table, (), legacy_clean_markets_at_a_glance,
+         partial(parser._clean_section, MARKETS_AT_A_GLANCE)),
+        ("major events", make_raw_major_events_table, (args.preamble,), legacy_clean_major_events,
+         partial(parser._clean_section, MAJOR_EVENTS)),
+    ]
+
+    print(f"{'section':<22} {'rows':>8} {'loops':>10} {'vectorized':>11} {'speed-up':>9}")
+    for section, make_table, make_args, legacy, vectorized in cases:
+        for rows in args.rows:
+            raw_table = make_table(rows, *make_args)
+            assert_same_frames(legacy(raw_table), vectorized(raw_table, 0))
+
+            old = best_time(legacy, raw_table, repeat=args.repeat)
+            new = best_time(vectorized, raw_table, 0, repeat=args.repeat)
+            print(f"{section:<22} {rows:>8} {old * 1000:>8.1f}ms {new * 1000:>9.1f}ms {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
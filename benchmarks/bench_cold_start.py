@@ -0,0 +1,103 @@
+"""
+Cold start of the command line runs and the API: how long a fresh interpreter takes to import each entry point
+(wall time and python -X importtime, with its heaviest direct imports), how long `uvicorn main:app` takes to
+answer /health, and the latency of the first uploads a fresh API serves.
+
+    python benchmarks/bench_cold_start.py [--modules simple_run batch_run main] [--repeat 5] [--top 8]
+        [--pdf PDF] [--uploads 3] [--settle 0] [--no-api]
+
+Every import is timed in a new process (best of --repeat). The API part reuses run_suite.api_server (one
+worker, extraction cache disabled), so the first upload includes whatever the worker still has to load; with
+--settle, the workers have time to warm up in the background first.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_suite import APP_DIR, INPUT_DIR, api_server, post_pdf  # noqa: E402
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(module: str) -> Tuple[float, float, Dict[str, float]]:
+    """
+    Wall time of a process that only imports module, the import time reported by -X importtime and the
+    cumulative import time of each direct import of the module, in seconds.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    total = 0.0
+    direct: Dict[str, float] = {}
+    children: Dict[str, float] = {}
+    # Modules are listed after their own imports, each level of nesting indented by two more spaces
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1e6, len(match.group(3)), match.group(4)
+        if depth == 3:
+            children[name] = cumulative
+        elif depth == 1:
+            total += cumulative
+            if name == module:
+                direct = children
+            children = {}
+    return wall, total, direct
+
+
+def profile_module(module: str, repeat: int, top: int) -> None:
+    runs = [import_profile(module) for _ in range(repeat)]
+    wall, total, direct = min(runs, key=lambda run: run[0])
+    print(f"{module:<12} {wall:>7.2f}s process {total:>7.2f}s imports")
+    for name, seconds in sorted(direct.items(), key=lambda item: -item[1])[:top]:
+        print(f"{'':<12}   {seconds:>6.3f}s  {name}")
+
+
+def profile_api(pdf_path: str, uploads: int, settle: float) -> None:
+    with tempfile.TemporaryDirectory(prefix="bench_cold_start_") as work_dir:
+        start = time.perf_counter()
+        with api_server("", work_dir) as url:
+            boot = time.perf_counter() - start
+            print(f"{'uvicorn':<12} {boot:>7.2f}s until /health answers")
+            time.sleep(settle)
+            latencies: List[float] = []
+            for _ in range(uploads):
+                upload_start = time.perf_counter()
+                post_pdf(url, pdf_path)
+                latencies.append(time.perf_counter() - upload_start)
+    print(f"{'':<12} uploads after boot: " + ", ".join(f"{latency:.2f}s" for latency in latencies))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--modules", nargs="*", default=["simple_run", "batch_run", "main"])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=8, help="Heaviest direct imports to list per module")
+    arg_parser.add_argument("--pdf", default=os.path.join(
+        INPUT_DIR, "241025 Unicredit Macro & Markets Weekly Focus - python.pdf"
+    ))
+    arg_parser.add_argument("--uploads", type=int, default=3)
+    arg_parser.add_argument("--settle", type=float, default=0.0,
+                            help="Seconds to wait after /health answers, to let the workers warm up")
+    arg_parser.add_argument("--no-api", action="store_true")
+    args = arg_parser.parse_args()
+
+    for module in args.modules:
+        profile_module(module, args.repeat, args.top)
+    if not args.no_api:
+        profile_api(args.pdf, args.uploads, args.settle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Output formats of the parsed tables: for every PDF in data/input and synthetic documents of growing size, the
+size of each format's files and of its /process-pdf/ archive, the time to write them, and the time a
+downstream consumer takes to load them back into dataframes with the same dtypes.
+
+    python benchmarks/bench_export_formats.py [pdfs ...] [--scales 1 8 32] [--repeat 20] [--backend word_boxes]
+
+Loading the CSVs includes what a consumer has to do to get the types back (parse the dates, categories and
+float32 metrics), since CSV only stores text. Synthetic documents of scale k have 40k major events (see
+synthetic_reports.py), so the major_events table grows with k while the market tables stay small.
+"""
+import argparse
+import glob
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from typing import Callable, Dict
+
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "app"))
+
+from extraction_backends import BACKENDS  # noqa: E402
+from exporters import EXPORTERS, ExportTable, exporter_for, read_bundle  # noqa: E402
+from pdf_tables_parser import PDFMarketParser  # noqa: E402
+from synthetic_reports import ReportSpec, generate_report  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+INPUT_DIR = os.path.join(BENCHMARKS_DIR, "..", "data", "input")
+
+
+def median_time(func: Callable[[], None], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def read_csv_typed(path: str, table: ExportTable) -> pd.DataFrame:
+    return pd.read_csv(path, parse_dates=list(table.date_columns),
+                       dtype={**{column: "category" for column in table.categorical_columns},
+                              **{column: "float32" for column in table.numeric_columns if column in table.df}})
+
+
+def load_tables(export_format: str, output_dir: str, tables: Dict[str, ExportTable]) -> Dict[str, pd.DataFrame]:
+    if export_format == "bundle":
+        return read_bundle(os.path.join(output_dir, "tables.arrow"))
+    if export_format == "csv":
+        return {name: read_csv_typed(os.path.join(output_dir, f"{name}.csv"), table) for name, table in tables.items()}
+    read = pd.read_parquet if export_format == "parquet" else pd.read_feather
+    return {name: read(os.path.join(output_dir, f"{name}.{EXPORTERS[export_format].extension}")) for name in tables}
+
+
+def bench_document(label: str, pdf, repeat: int, backend: str) -> None:
+    parser = PDFMarketParser(pdf_path=pdf, backend=BACKENDS[backend]())
+    try:
+        parser.parse_pages()
+    except Exception as e:
+        print(f"{label}: parse failed: {type(e).__name__}: {e}")
+        return
+    tables = parser._export_tables()
+    rows = sum(len(table.df) for table in tables.values())
+    print(f"{label} ({rows} rows in {len(tables)} tables)")
+    print(f"  {'format':<8} {'files':>10} {'archive':>10} {'write':>10} {'load':>10}")
+    for export_format in EXPORTERS:
+        exporter = exporter_for(export_format)
+        with tempfile.TemporaryDirectory(prefix="bench_export_") as output_dir:
+            paths = exporter.export(tables, output_dir, "tables")
+            size = sum(os.path.getsize(path) for path in paths)
+            archive = io.BytesIO()
+            exporter.export_archive(tables, archive)
+            write = median_time(lambda: exporter.export(tables, output_dir, "tables"), repeat)
+            load = median_time(lambda: load_tables(export_format, output_dir, tables), repeat)
+        print(f"  {export_format:<8} {size / 1024:>8.1f}KB {len(archive.getvalue()) / 1024:>8.1f}KB "
+              f"{write * 1000:>8.2f}ms {load * 1000:>8.2f}ms")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="*", help="Defaults to the PDFs in data/input")
+    arg_parser.add_argument("--scales", type=int, nargs="*", default=[1, 8, 32],
+                            help="Sizes of the synthetic documents, in multiples of 20 pages and 40 events")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    arg_parser.add_argument("--backend", choices=sorted(BACKENDS), default="word_boxes")
+    args = arg_parser.parse_args()
+
+    for pdf_path in args.pdfs or sorted(glob.glob(os.path.join(INPUT_DIR, "*.pdf"))):
+        bench_document(os.path.basename(pdf_path), pdf_path, args.repeat, args.backend)
+    for scale in args.scales:
+        pdf = generate_report(ReportSpec(pages=20 * scale, events=40 * scale, seed=scale)).pdf
+        bench_document(f"synthetic x{scale}", io.BytesIO(pdf), args.repeat, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Top/bottom ranking benchmarks: partial selection (rankings.top_bottom, nlargest/nsmallest) versus the full sort
+consolidate_and_export_top_bottom_markets used to do, on synthetic consolidated universes, and the SQL window
+path (market_queries.rank_weeks) versus loading every week's rows and ranking them in pandas.
+
+    python benchmarks/bench_rankings.py [--rows 1000 100000 1000000] [--n 3] [--repeat 5]
+    python benchmarks/bench_rankings.py --weeks 520 --instruments 200 [--database-url postgresql://...]
+
+Both sides must select the same rows, which is checked before timing. The SQL part defaults to a throwaway
+SQLite file as a stand-in for Postgres; against Postgres the tables must already exist (alembic upgrade head)
+and the benchmark weeks are deleted afterwards.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from bulk_writer import store_parsed_dfs  # noqa: E402
+from market_queries import rank_weeks  # noqa: E402
+from models import Base, MarketSnapshot  # noqa: E402
+from rankings import top_bottom  # noqa: E402
+
+FIRST_WEEK = datetime(1990, 1, 1)
+
+
+def make_universe(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    A consolidated performance table as consolidate_and_export_top_bottom_markets builds it, metrics as text
+    the way the cleaner can leave them, with a few unparseable values.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"Market": [f"Synthetic market {i}" for i in range(rows)]})
+    for col in ["1M", "3M", "6M", "12M", "YTD", "QTD"]:
+        df[col] = rng.normal(0, 10, rows).round(1)
+    df["Market Type"] = rng.choice(["Equities", "Credit", "Commodities"], rows)
+    df.loc[rng.choice(rows, rows // 100, replace=False), "12M"] = np.nan
+    return df
+
+
+def full_sort(df: pd.DataFrame, metric: str, n: int):
+    df = df.assign(**{metric: pd.to_numeric(df[metric], errors="coerce")}).dropna(subset=[metric])
+    sorted_df = df.sort_values(metric, ascending=False)
+    return sorted_df.head(n), sorted_df.tail(n)
+
+
+def best_time(func: Callable, *args, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_in_memory(rows_list, n: int, repeat: int) -> None:
+    print(f"{'rows':>9} {'full sort':>11} {'partial':>11} {'speed-up':>9}")
+    for rows in rows_list:
+        df = make_universe(rows)
+        (sorted_top, sorted_bottom), (top, bottom) = full_sort(df, "12M", n), top_bottom(df, "12M", n)
+        # Ties may resolve differently, the selected values must not
+        assert sorted_top["12M"].tolist() == top["12M"].tolist()
+        assert sorted_bottom["12M"].tolist() == bottom["12M"].tolist()
+
+        old = best_time(full_sort, df, "12M", n, repeat=repeat)
+        new = best_time(top_bottom, df, "12M", n, repeat=repeat)
+        print(f"{rows:>9} {old * 1000:>9.2f}ms {new * 1000:>9.2f}ms {old / new:>8.1f}x")
+
+
+def pandas_rank_weeks(session, n: int) -> pd.DataFrame:
+    rows = session.execute(select(MarketSnapshot.week, MarketSnapshot.instrument, MarketSnapshot.m12)).all()
+    df = pd.DataFrame(rows, columns=["week", "instrument", "12M"]).dropna(subset=["12M"])
+    df = df.sort_values(["week", "12M"], ascending=[True, False])
+    return pd.concat([df.groupby("week").head(n), df.groupby("week").tail(n)])
+
+
+def bench_sql(database_url, weeks: int, instruments: int, n: int, repeat: int) -> None:
+    tmp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(database_url or f"sqlite:///{tmp_dir.name}/bench.sqlite3")
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    week_starts = [FIRST_WEEK + timedelta(weeks=i) for i in range(weeks)]
+    for i, week in enumerate(week_starts):
+        df = make_universe(instruments, seed=i).drop(columns="Market Type").rename(
+            columns={"Market": "Equities"}).assign(Price=1.0)
+        store_parsed_dfs(session, {"equities": df}, week)
+
+    try:
+        ranked = rank_weeks(session, "12M", n)
+        assert len(ranked) == len(pandas_rank_weeks(session, n)) == 2 * n * weeks
+        old = best_time(pandas_rank_weeks, session, n, repeat=repeat)
+        new = best_time(rank_weeks, session, "12M", n, repeat=repeat)
+        print(f"{weeks} weeks x {instruments} instruments on {engine.dialect.name}: load and sort in pandas "
+              f"{old * 1000:.1f}ms, window functions {new * 1000:.1f}ms ({old / new:.1f}x)")
+    finally:
+        if database_url:
+            session.execute(delete(MarketSnapshot).where(MarketSnapshot.week.between(week_starts[0], week_starts[-1])))
+            session.commit()
+        session.close()
+        tmp_dir.cleanup()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    arg_parser.add_argument("--n", type=int, default=3)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--weeks", type=int, default=520, help="Weeks stored for the SQL benchmark, 0 to skip")
+    arg_parser.add_argument("--instruments", type=int, default=200, help="Instruments per stored week")
+    arg_parser.add_argument("--database-url")
+    args = arg_parser.parse_args()
+
+    bench_in_memory(args.rows, args.n, args.repeat)
+    if args.weeks:
+        bench_sql(args.database_url, args.weeks, args.instruments, args.n, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Peak RSS of one /process-pdf/ request body, comparing the old temp-file flow with the in-memory export.
+
+    python benchmarks/bench_request_memory.py [--pdf PATH] [--requests 3]
+
+Each mode runs in a fresh interpreter with the extraction cache disabled. The reported figure is the growth
+of the process high-water mark (ru_maxrss) while handling the requests, after imports and a warm-up parse,
+so it isolates what the request itself allocates on top of the parser.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PDF = os.path.join(BENCH_DIR, "..", "data", "input", "241025 Unicredit Macro & Markets Weekly Focus - python.pdf")
+
+CHILD = r'''
+import io, os, resource, shutil, sys, tempfile, warnings, zipfile
+warnings.filterwarnings("ignore")
+sys.path.insert(0, os.path.join(sys.argv[1], "..", "app"))
+os.environ["EXTRACTION_CACHE_DIR"] = ""
+from pdf_tables_parser import PDFMarketParser
+from pdf_processing import process_pdf_to_zip
+
+mode, pdf_path, n_requests = sys.argv[2], sys.argv[3], int(sys.argv[4])
+with open(pdf_path, "rb") as f:
+    upload = f.read()
+
+
+def temp_file_flow(content):
+    # The handler before the in-memory export: upload and CSVs on disk, ZIP read back and copied twice
+    temp_dir = tempfile.mkdtemp()
+    try:
+        pdf_path = os.path.join(temp_dir, "upload.pdf")
+        with open(pdf_path, "wb") as buffer:
+            buffer.write(content)
+        parser = PDFMarketParser(pdf_path=pdf_path)
+        parser.parse_pages()
+        generated_files = parser.export_dfs_to_csv(temp_dir)
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for file_path in generated_files:
+                zip_file.write(file_path, os.path.relpath(file_path, temp_dir))
+        zip_buffer.seek(0)
+        return io.BytesIO(zip_buffer.read()).read()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def in_memory_flow(content):
+    zip_bytes = process_pdf_to_zip(content)
+    return b"".join(zip_bytes[i:i + 65536] for i in range(0, len(zip_bytes), 65536))
+
+
+flow = temp_file_flow if mode == "temp-files" else in_memory_flow
+flow(upload)
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+for _ in range(n_requests):
+    flow(upload)
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(baseline, peak)
+'''
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pdf", default=DEFAULT_PDF)
+    arg_parser.add_argument("--requests", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    print(f"{'mode':<12} {'after warm-up':>14} {'peak':>10} {'growth':>10}")
+    for mode in ["temp-files", "in-memory"]:
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, BENCH_DIR, mode, args.pdf, str(args.requests)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        baseline, peak = (int(value) / 1024 for value in output[-2:])
+        print(f"{mode:<12} {baseline:>12.1f}MB {peak:>8.1f}MB {peak - baseline:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cost and outcome of picking row_tol automatically, on every PDF in data/input (or the given PDFs).
+
+    python benchmarks/bench_row_tol.py [PDF ...]
+
+Each document is parsed three ways with the extraction cache disabled: Camelot with the fixed row_tol of
+each section, camelot_auto_row_tol with an empty memo (full search over the candidates, all extracted from
+a single layout analysis) and camelot_auto_row_tol again with the memo of the first run (one extraction per
+page). The picked row_tol values are reported along with whether the output matches the fixed row_tol one.
+"""
+import argparse
+import glob
+import logging
+import os
+import re
+import sys
+import time
+import warnings
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from bench_backends import same_output  # noqa: E402
+from extraction_backends import AutoRowTolCamelotBackend, CamelotBackend  # noqa: E402
+from pdf_tables_parser import PDFMarketParser  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+
+class PickLog(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.picks = []
+
+    def emit(self, record):
+        match = re.match(r"Picked row_tol=(\d+) .* for page (\d+)", record.getMessage())
+        if match:
+            self.picks.append(f"p{match[2]}={match[1]}")
+
+
+def timed_parse(pdf_path: str, backend):
+    parser = PDFMarketParser(pdf_path=pdf_path, backend=backend)
+    start = time.perf_counter()
+    try:
+        parser.parse_pages()
+    except Exception as e:
+        return None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return parser._current_processed_dfs, time.perf_counter() - start, None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="*")
+    args = arg_parser.parse_args()
+    pdf_paths = args.pdfs or sorted(glob.glob(os.path.join(APP_DIR, "..", "data", "input", "*.pdf")))
+
+    pick_log = PickLog()
+    backend_logger = logging.getLogger("extraction_backends")
+    backend_logger.addHandler(pick_log)
+    backend_logger.setLevel(logging.INFO)
+
+    print(f"{'document':<60} {'run':<10} {'time':>8}  {'row_tol':<12} {'same as fixed row_tol'}")
+    for pdf_path in pdf_paths:
+        name = os.path.basename(pdf_path)
+        reference, fixed_time, error = timed_parse(pdf_path, CamelotBackend())
+        print(f"{name:<60} {'fixed':<10} {fixed_time:>7.2f}s  {'':<12} {error or ''}")
+
+        backend = AutoRowTolCamelotBackend()
+        for run in ("search", "memo"):
+            pick_log.picks.clear()
+            dfs, elapsed, error = timed_parse(pdf_path, backend)
+            picks = " ".join(pick_log.picks) or "memo"
+            print(f"{'':<60} {run:<10} {elapsed:>7.2f}s  {picks:<12} {error or same_output(reference, dfs)}")
+
+
+if __name__ == "__main__":
+    main()
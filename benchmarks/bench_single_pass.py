@@ -0,0 +1,70 @@
+"""
+Wall-clock time per document of the two-call parse (parse_markets_at_a_glance + parse_major_events_next_week,
+one camelot.read_pdf each) versus the single-pass PDFMarketParser.parse_pages.
+
+    python benchmarks/bench_single_pass.py [PDF ...] [--repeat 3]
+
+Defaults to the PDFs in data/input. The extraction cache is disabled for both modes.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import warnings
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from pdf_tables_parser import PDFMarketParser  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+
+def two_calls(pdf_path: str) -> None:
+    parser = PDFMarketParser(pdf_path=pdf_path)
+    parser.parse_markets_at_a_glance()
+    parser.parse_major_events_next_week()
+
+
+def single_pass(pdf_path: str) -> None:
+    PDFMarketParser(pdf_path=pdf_path).parse_pages()
+
+
+def time_modes(pdf_path: str, repeat: int):
+    """
+    Best wall-clock and CPU time of each mode, alternating the two modes on every round so that
+    machine noise hits both alike.
+    """
+    timings = {two_calls: [], single_pass: []}
+    for _ in range(repeat):
+        for func, func_timings in timings.items():
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            func(pdf_path)
+            func_timings.append((time.perf_counter() - wall_start, time.process_time() - cpu_start))
+    return [min(func_timings) for func_timings in timings.values()]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="*")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    pdf_paths = args.pdfs or sorted(glob.glob(os.path.join(APP_DIR, "..", "data", "input", "*.pdf")))
+
+    print(f"{'document':<60} {'two calls':>10} {'single':>10} {'saved':>16} {'saved (cpu)':>12}")
+    for pdf_path in pdf_paths:
+        name = os.path.basename(pdf_path)
+        try:
+            (old_wall, old_cpu), (new_wall, new_cpu) = time_modes(pdf_path, args.repeat)
+        except Exception as e:
+            # Layout failures still raise in both modes
+            print(f"{name:<60} failed: {type(e).__name__}: {e}")
+            continue
+        print(
+            f"{name:<60} {old_wall:>9.2f}s {new_wall:>9.2f}s "
+            f"{old_wall - new_wall:>9.2f}s ({100 * (old_wall - new_wall) / old_wall:>3.0f}%) {old_cpu - new_cpu:>11.2f}s"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Concurrent load test for the /process-pdf/ endpoint of a running API.
+
+    python benchmarks/load_test_api.py --url http://localhost:8000 --concurrency 8 --requests 32
+
+Uploads the PDF from a pool of client threads while a separate thread keeps polling /health, then prints
+throughput and latency percentiles for both. A healthy event loop keeps /health in the milliseconds even
+while every worker is busy parsing. Run it against two builds of the API (e.g. before/after a change) with
+EXTRACTION_CACHE_DIR= set on the server, so every upload really goes through Camelot. With --persist, every
+upload is also stored in the server's database (see benchmarks/load_test_persist.py for the database alone).
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+DEFAULT_PDF = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "data", "input",
+    "241025 Unicredit Macro & Markets Weekly Focus - python.pdf"
+)
+
+
+def encode_multipart(fields: dict, file_field: str, file_name: str, file_bytes: bytes) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{file_name}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'.encode()
+    )
+    parts.append(file_bytes)
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def post_pdf(url: str, body: bytes, content_type: str, timeout: float) -> Tuple[int, float]:
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def poll_health(url: str, stop: threading.Event, latencies: List[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=60) as response:
+                response.read()
+        except OSError:
+            pass
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.1)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--url", default="http://localhost:8000")
+    arg_parser.add_argument("--pdf", default=DEFAULT_PDF)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--requests", type=int, default=32)
+    arg_parser.add_argument("--timeout", type=float, default=600)
+    arg_parser.add_argument("--persist", action="store_true", help="Send persist=true with every upload")
+    args = arg_parser.parse_args()
+
+    with open(args.pdf, "rb") as f:
+        body, content_type = encode_multipart({"persist": "true"} if args.persist else {}, "file", os.path.basename(args.pdf), f.read())
+
+    health_latencies: List[float] = []
+    stop = threading.Event()
+    health_thread = threading.Thread(target=poll_health, args=(f"{args.url}/health", stop, health_latencies))
+    health_thread.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(
+            lambda _: post_pdf(f"{args.url}/process-pdf/", body, content_type, args.timeout), range(args.requests)
+        ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    health_thread.join()
+
+    ok_latencies = [latency for status, latency in results if status == 200]
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"{args.requests} uploads, concurrency {args.concurrency}, {elapsed:.1f}s total")
+    print(f"status codes:       {dict(sorted(statuses.items()))}")
+    print(f"throughput:         {len(ok_latencies) / elapsed * 60:.1f} PDFs/min")
+    print(f"upload latency:     p50 {percentile(ok_latencies, 50):.2f}s  p95 {percentile(ok_latencies, 95):.2f}s")
+    print(f"/health latency:    p50 {percentile(health_latencies, 50) * 1000:.0f}ms  "
+          f"p95 {percentile(health_latencies, 95) * 1000:.0f}ms  max {max(health_latencies) * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
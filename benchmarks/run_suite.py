@@ -0,0 +1,286 @@
+"""
+Benchmark suite for the parse pipeline: times parse_markets_at_a_glance, parse_major_events_next_week,
+consolidate_and_export_top_bottom_markets, export_dfs_to_csv and the /process-pdf/ endpoint on every PDF in
+data/input and on synthetic documents of growing size, and writes the results as JSON so runs on different
+commits can be compared.
+
+    python benchmarks/run_suite.py [--scales 1 2 4] [--repeat 5] [--backend camelot] [--no-api] [--output FILE]
+    python benchmarks/run_suite.py --compare OLD.json NEW.json [--threshold 0.1]
+
+Results go to benchmarks/results/<date>-<commit>.json by default. Everything runs offline: the synthetic
+documents are built locally, the extraction cache is disabled, and the endpoint is served by a local uvicorn
+with a throwaway SQLite database. A synthetic document of scale k (see synthetic_reports.py) has 20k pages and
+40k major events, so both the page scan and the table extraction grow with k. Benchmarks that fail on a
+document (e.g. a layout the parser can't handle yet) are recorded with their error instead of a timing.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pypdfium2 as pdfium
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCHMARKS_DIR, "..", "app")
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from extraction_backends import BACKENDS  # noqa: E402
+from load_test_api import encode_multipart  # noqa: E402
+from pdf_tables_parser import PDFMarketParser  # noqa: E402
+from synthetic_reports import ReportSpec, generate_report  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+INPUT_DIR = os.path.join(BENCHMARKS_DIR, "..", "data", "input")
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+
+def page_count(pdf_path: str) -> int:
+    document = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(document)
+    finally:
+        document.close()
+
+
+def git_commit() -> Dict[str, Optional[str]]:
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *args], cwd=BENCHMARKS_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+def measure(func: Callable[[], None], repeat: int) -> dict:
+    """
+    Times func repeat times. A failure stops the rounds and is recorded instead.
+    """
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": len(timings),
+    }
+
+
+def parser_benchmarks(pdf_path: str, backend: str, repeat: int) -> Dict[str, dict]:
+    def new_parser() -> PDFMarketParser:
+        return PDFMarketParser(pdf_path=pdf_path, backend=BACKENDS[backend]())
+
+    results = {}
+    for method in ("parse_markets_at_a_glance", "parse_major_events_next_week"):
+        # A fresh parser per round, so every round locates the sections again as a new upload would
+        results[method] = measure(lambda: getattr(new_parser(), method)(), repeat)
+
+    parsed = new_parser()
+    try:
+        parsed.parse_pages()
+    except Exception as e:
+        error = {"error": f"parse_pages: {type(e).__name__}: {e}"}
+        return {**results, "consolidate_and_export_top_bottom_markets": error, "export_dfs_to_csv": error}
+
+    output_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        results["consolidate_and_export_top_bottom_markets"] = measure(
+            lambda: parsed.consolidate_and_export_top_bottom_markets(output_dir), repeat
+        )
+        results["export_dfs_to_csv"] = measure(lambda: parsed.export_dfs_to_csv(output_dir), repeat)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def api_server(backend: str, work_dir: str) -> Iterator[str]:
+    """
+    The API on a local port, with one worker, no extraction cache, history or profiles, and a SQLite database
+    and job directory in work_dir. Yields its base URL once /health answers.
+    """
+    port = free_port()
+    env = {
+        **os.environ,
+        "PDF_WORKERS": "1",
+        "EXTRACTION_BACKEND": backend,
+        "EXTRACTION_CACHE_DIR": "",
+        "HISTORY_DIR": "",
+        "PROFILE_DIR": "",
+        "JOBS_DIR": os.path.join(work_dir, "jobs"),
+        "DATABASE_URL": f"sqlite:///{os.path.join(work_dir, 'bench.sqlite3')}",
+    }
+    log_path = os.path.join(work_dir, "server.log")
+    log = open(log_path, "wb")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                with urllib.request.urlopen(f"{url}/health", timeout=5):
+                    break
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    with open(log_path) as f:
+                        raise RuntimeError(f"The API did not start:\n{f.read()}")
+                time.sleep(0.2)
+        yield url
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        log.close()
+
+
+def post_pdf(url: str, pdf_path: str) -> None:
+    with open(pdf_path, "rb") as f:
+        body, content_type = encode_multipart({}, "file", os.path.basename(pdf_path), f.read())
+    request = urllib.request.Request(f"{url}/process-pdf/", data=body, headers={"Content-Type": content_type},
+                                     method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=600) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"HTTP {e.code}: {e.read().decode(errors='replace')}") from None
+
+
+def run_suite(pdf_paths: List[str], backend: str, repeat: int, api: bool) -> dict:
+    documents = {
+        os.path.basename(path): {"pages": page_count(path), "bytes": os.path.getsize(path)} for path in pdf_paths
+    }
+    results = []
+    for path in pdf_paths:
+        name = os.path.basename(path)
+        print(f"{name} ({documents[name]['pages']} pages)", flush=True)
+        for benchmark, result in parser_benchmarks(path, backend, repeat).items():
+            results.append({"benchmark": benchmark, "document": name, **result})
+            print(f"  {format_result(benchmark, result)}", flush=True)
+
+    if api:
+        with tempfile.TemporaryDirectory(prefix="bench_suite_api_") as work_dir, api_server(backend, work_dir) as url:
+            # The first request also pays for starting the worker process
+            measure(lambda: post_pdf(url, pdf_paths[0]), 1)
+            print("/process-pdf/", flush=True)
+            for path in pdf_paths:
+                result = measure(lambda: post_pdf(url, path), repeat)
+                results.append({"benchmark": "process_pdf_endpoint", "document": os.path.basename(path), **result})
+                print(f"  {format_result(os.path.basename(path), result)}", flush=True)
+
+    return {
+        "meta": {
+            **git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": backend,
+            "repeat": repeat,
+        },
+        "documents": documents,
+        "results": results,
+    }
+
+
+def format_result(label: str, result: dict) -> str:
+    if "error" in result:
+        return f"{label:<60} failed: {result['error']}"
+    return f"{label:<60} {result['median'] * 1000:>10.1f}ms median {result['min'] * 1000:>10.1f}ms min"
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> None:
+    """
+    Prints the median of every benchmark in both runs, flagging changes beyond threshold (a fraction).
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    old_results = {(r["benchmark"], r["document"]): r for r in old["results"]}
+
+    print(f"old: {old['meta']['commit']} ({old['meta']['date']})  new: {new['meta']['commit']} ({new['meta']['date']})")
+    print(f"{'benchmark':<42} {'document':<60} {'old':>10} {'new':>10} {'ratio':>7}")
+    for result in new["results"]:
+        key = (result["benchmark"], result["document"])
+        before = old_results.get(key, {})
+        if "median" not in before or "median" not in result:
+            status = "new" if not before else "failed" if "error" in result or "error" in before else ""
+            print(f"{key[0]:<42} {key[1]:<60} {status:>31}")
+            continue
+        ratio = result["median"] / before["median"]
+        flag = "  slower" if ratio > 1 + threshold else "  faster" if ratio < 1 - threshold else ""
+        print(f"{key[0]:<42} {key[1]:<60} {before['median'] * 1000:>8.1f}ms {result['median'] * 1000:>8.1f}ms "
+              f"{ratio:>6.2f}x{flag}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="*", help="Defaults to the PDFs in data/input")
+    arg_parser.add_argument("--scales", type=int, nargs="*", default=[1, 2, 4],
+                            help="Sizes of the synthetic documents, in multiples of 20 pages and 40 events")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--backend", choices=sorted(BACKENDS), default="camelot")
+    arg_parser.add_argument("--no-api", action="store_true", help="Skip the /process-pdf/ benchmark")
+    arg_parser.add_argument("--output")
+    arg_parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    arg_parser.add_argument("--threshold", type=float, default=0.1)
+    args = arg_parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare, args.threshold)
+        return
+
+    pdf_paths = args.pdfs or sorted(glob.glob(os.path.join(INPUT_DIR, "*.pdf")))
+    with tempfile.TemporaryDirectory(prefix="bench_suite_docs_") as synthetic_dir:
+        for scale in args.scales:
+            synthetic_path = os.path.join(synthetic_dir, f"synthetic_x{scale}.pdf")
+            with open(synthetic_path, "wb") as f:
+                f.write(generate_report(ReportSpec(pages=20 * scale, events=40 * scale, seed=scale)).pdf)
+            pdf_paths.append(synthetic_path)
+        report = run_suite(pdf_paths, args.backend, args.repeat, not args.no_api)
+
+    output_path = args.output
+    if output_path is None:
+        commit = (report["meta"]["commit"] or "nogit")[:10]
+        output_path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%dT%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Synthetic weekly reports for scale and load tests: PDFs laid out like the "Markets at a glance" page and the
+major events table of the real reports, with configurable row and page counts and layout perturbations, written
+by hand (standard Helvetica, no PDF library needed) so they can be generated anywhere.
+
+    python benchmarks/synthetic_reports.py OUTPUT_DIR [--count 10] [--pages 20] [--instruments 8] [--events 40]
+        [--column-shift 0] [--row-spacing 1] [--baseline-jitter 0] [--split-header] [--seed 0]
+
+The perturbations reproduce what breaks the parser on real documents: column_shift spreads (or squeezes) the
+metric columns, row_spacing scales the line height (camelot merges rows closer than its row_tol, splits cells
+spaced further apart), baseline_jitter moves every cell up or down at random, and split_header puts the second
+line of the major events header in a row of its own, as in document_december_2023.pdf. Sections hold any
+number of rows: pages grow taller instead of overflowing. generate_report also returns the tables the parser
+should read from the document, to check a parse.
+"""
+import argparse
+import os
+import random
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 60
+FONT_SIZE = 8
+LINE_HEIGHT = 13
+
+MARKET_TABLES = {
+    # title: (value column, base instrument names, typical value)
+    "Equities": ("Price", ["MSCI World (USD)", "MSCI EM (USD)", "S&P 500", "Nasdaq Composite", "Euro STOXX 50",
+                           "DAX", "MSCI Italy"], 5000),
+    "Rates (government bonds)": ("Yield (%)", ["1-3Y US", "7-10Y US", "1-3Y Germany", "7-10Y Germany",
+                                               "1-3Y Italy", "7-10Y Italy"], 3),
+    "Credit": ("OAS (bp)", ["iBoxx Non-Financials (EUR)", "iBoxx Financials (EUR)", "iBoxx High Yield NFI (EUR)",
+                            "EM hard currency* (USD)"], 150),
+    "Commodities": ("Price", ["Oil (Brent, USD bbl)", "Gold (USD oz)", "Bloomberg Commodity Index"], 500),
+    "Exchange rates": ("Price", ["EUR-USD", "EUR-GBP", "EUR-CHF", "EUR-JPY", "EUR-NOK", "EUR-SEK"], 10),
+}
+PERIOD_COLS = ["1M", "3M", "6M", "12M", "YTD", "QTD"]
+# Left edge of the name column, right edges of the value and period columns
+MARKET_COLUMNS = [45, 250, 290, 335, 380, 425, 470, 515]
+
+EVENT_COLS = [
+    "Date", "Time", "Country", "Indicator/Event", "Period", "UniCredit Estimates", "Consensus (Bloomberg)", "Previous"
+]
+# Left edges of the text columns, right edges of the three numeric ones
+EVENT_COLUMNS = [45, 130, 170, 210, 370, 455, 510, 565]
+EVENT_COUNTRIES = ["US", "GE", "UK", "FR", "IT", "SP", "JN", "CH", "EMU", "CZ", "PO", "HU"]
+EVENT_INDICATORS = [
+    "Real GDP (% qoq)", "Harmonized CPI (% yoy)", "Unemployment Rate (%)", "Retail Sales (% mom)",
+    "Industrial Production (% mom)", "PMI Manufacturing (index)", "Consumer Confidence (index)",
+    "JOLTS Job Openings (thousands)", "Housing Starts (thousands)", "Trade Balance (EUR bn)",
+]
+
+FILLER_WORDS = [
+    "growth", "inflation", "central", "bank", "yields", "spreads", "equity", "outlook", "policy", "euro", "area",
+    "fiscal", "labour", "demand", "energy", "prices", "credit", "risk", "cycle", "easing", "sentiment", "supply",
+]
+
+# Helvetica advance widths (per 1000 units of font size) of the characters right-aligned numbers use
+HELVETICA_WIDTHS = {**dict.fromkeys("0123456789", 556), ".": 278, ",": 278, "-": 333, " ": 278}
+
+
+@dataclass
+class Layout:
+    """
+    Perturbations of the reference layout, see the module docstring. The defaults parse like the real reports.
+    """
+    column_shift: float = 0.0
+    row_spacing: float = 1.0
+    baseline_jitter: float = 0.0
+    split_header: bool = False
+
+
+@dataclass
+class ReportSpec:
+    """
+    A synthetic report: pages in total, the (1-based) pages of the two sections, instruments per market table,
+    events in the major events table and the week of the report (its Friday dates every page).
+    """
+    pages: int = 20
+    markets_at_a_glance_page: int = 2
+    major_events_page: int = 3
+    instruments: int = 8
+    events: int = 40
+    week: date = date(2025, 10, 20)
+    layout: Layout = field(default_factory=Layout)
+    seed: int = 0
+
+
+@dataclass
+class SyntheticReport:
+    """
+    The PDF and the tables the parser should extract from it, named and shaped like PDFMarketParser's cleaned
+    dataframes (the event dates are in the year of the report week).
+    """
+    pdf: bytes
+    tables: Dict[str, pd.DataFrame]
+
+
+class _Page:
+    """
+    Text drawn on one page, top-down: y is measured from the top edge.
+    """
+
+    def __init__(self):
+        self.runs: List[Tuple[float, float, str, str]] = []
+
+    def text(self, x: float, y: float, text: str, font: str = "F1") -> None:
+        if text:
+            self.runs.append((x, y, text, font))
+
+    def right_text(self, right: float, y: float, text: str) -> None:
+        width = sum(HELVETICA_WIDTHS.get(char, 556) for char in text) * FONT_SIZE / 1000
+        self.text(right - width, y, text)
+
+    @property
+    def height(self) -> float:
+        return max([PAGE_HEIGHT, *(y + MARGIN for _, y, _, _ in self.runs)])
+
+    def content(self) -> bytes:
+        height = self.height
+        lines = []
+        for x, y, text, font in self.runs:
+            escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            lines.append(f"BT /{font} {FONT_SIZE} Tf {x:.2f} {height - y:.2f} Td ({escaped}) Tj ET")
+        return "\n".join(lines).encode("latin-1")
+
+
+def _write_pdf(pages: List[_Page]) -> bytes:
+    """
+    A PDF 1.4 file with one Flate-compressed content stream per page and the two standard fonts it uses.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # The page tree, once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for page in pages:
+        stream = zlib.compress(page.content())
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> "
+            b"/Contents %d 0 R >>" % (PAGE_WIDTH, round(page.height), len(objects))
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), len(pages))
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+def _number(value: float, decimals: int = 1) -> str:
+    return f"{value:,.{decimals}f}"
+
+
+def _instrument_names(base_names: List[str], count: int) -> List[str]:
+    return [
+        base_names[i] if i < len(base_names) else f"{base_names[i % len(base_names)]} {i // len(base_names) + 1}"
+        for i in range(count)
+    ]
+
+
+def _markets_at_a_glance(spec: ReportSpec, rng: random.Random) -> Tuple[_Page, Dict[str, pd.DataFrame]]:
+    layout = spec.layout
+    page = _Page()
+    line = LINE_HEIGHT * layout.row_spacing
+    columns = [x + layout.column_shift * i for i, x in enumerate(MARKET_COLUMNS)]
+
+    def jitter() -> float:
+        return rng.uniform(-layout.baseline_jitter, layout.baseline_jitter)
+
+    y = MARGIN
+    page.text(columns[0], y, "Markets at a glance", font="F2")
+    tables = {}
+    for title, (value_col, base_names, typical_value) in MARKET_TABLES.items():
+        if title in ("Equities", "Commodities"):
+            y += line
+            page.right_text(columns[1], y, "Current")
+            page.text(columns[3], y, "Total return (%)" if title == "Equities" else "Price change (%)")
+        y += line
+        page.text(columns[0], y, title, font="F2")
+        page.right_text(columns[1], y, value_col)
+        for right, period in zip(columns[2:], PERIOD_COLS):
+            page.right_text(right, y, period)
+
+        rows = []
+        for name in _instrument_names(base_names, spec.instruments):
+            y += line
+            value = round(typical_value * rng.uniform(0.5, 1.5), 2)
+            periods = [round(rng.gauss(0, 3 * (i + 1) ** 0.5), 1) for i in range(len(PERIOD_COLS))]
+            page.text(columns[0], y + jitter(), name)
+            page.right_text(columns[1], y + jitter(), _number(value, 2 if value < 100 else 0))
+            for right, period_value in zip(columns[2:], periods):
+                page.right_text(right, y + jitter(), _number(period_value))
+            rows.append([name, round(value, 2 if value < 100 else 0), *periods])
+        df = pd.DataFrame(rows, columns=[title, value_col, *PERIOD_COLS])
+        tables[title.lower().replace(" ", "_").replace("(", "").replace(")", "")] = df
+
+    y += line
+    page.text(columns[0], y, "Returns are shown in domestic currency")
+    page.text(columns[4], y, "Source: Bloomberg, Group Investment Strategy")
+    return page, tables
+
+
+def _major_events(spec: ReportSpec, rng: random.Random) -> Tuple[_Page, pd.DataFrame]:
+    layout = spec.layout
+    page = _Page()
+    line = LINE_HEIGHT * layout.row_spacing
+    columns = [x + layout.column_shift * i for i, x in enumerate(EVENT_COLUMNS)]
+
+    def jitter() -> float:
+        return rng.uniform(-layout.baseline_jitter, layout.baseline_jitter)
+
+    y = MARGIN
+    page.text(columns[0], y, "Major data releases and economic events of the week ahead", font="F2")
+    # Two-line header cells; close enough to be read as one row unless split_header
+    y += 2 * line
+    second_line = y + (LINE_HEIGHT * 1.4 if layout.split_header else FONT_SIZE)
+    first_day, last_day = spec.week, spec.week + timedelta(days=6)
+    headers = [
+        ("Date", f"{first_day:%d %b} - {last_day:%d %b %Y}"), ("Time", "(CET)"), ("Country", ""),
+        ("Indicator/Event", ""), ("Period", ""),
+    ]
+    for x, (first, second) in zip(columns, headers):
+        page.text(x, y, first, font="F2")
+        page.text(x, second_line, second, font="F2")
+    for right, (first, second) in zip(columns[5:], [("UniCredit", "estimates"), ("Consensus", "(Bloomberg)"),
+                                                    ("Previous", "")]):
+        page.text(right - 45, y, first, font="F2")
+        page.text(right - 45, second_line, second, font="F2")
+    y = second_line
+
+    days = sorted(rng.randrange(5) for _ in range(spec.events))
+    rows = []
+    previous_day = None
+    for day_offset in days:
+        y += line
+        day = spec.week + timedelta(days=day_offset)
+        minutes = rng.randrange(7 * 60, 22 * 60, 5)
+        values = [
+            None if rng.random() < 0.2 else round(rng.gauss(2, 5), 1) for _ in range(3)
+        ]
+        row = [day if day != previous_day else None, f"{minutes // 60:02d}:{minutes % 60:02d}",
+               rng.choice(EVENT_COUNTRIES), rng.choice(EVENT_INDICATORS), f"{day - timedelta(days=30):%b}", *values]
+        if row[0] is not None:
+            page.text(columns[0], y + jitter(), f"{day:%a, %d %b}")
+        for x, text in zip(columns[1:5], row[1:5]):
+            page.text(x, y + jitter(), text)
+        for right, value in zip(columns[5:], values):
+            if value is not None:
+                page.right_text(right, y + jitter(), _number(value))
+        previous_day = day
+        rows.append(row)
+
+    events = pd.DataFrame(rows, columns=EVENT_COLS)
+    events["Date"] = pd.to_datetime(events["Date"]).ffill()
+    return page, events
+
+
+def _filler_page(rng: random.Random) -> _Page:
+    page = _Page()
+    for line in range(50):
+        words = [rng.choice(FILLER_WORDS) for _ in range(12)]
+        page.text(MARGIN, MARGIN + line * LINE_HEIGHT, " ".join(words))
+    return page
+
+
+def _add_page_header(page: _Page, number: int, week: date) -> None:
+    page.text(MARGIN, MARGIN / 2, "Macro & Markets Weekly Focus", font="F2")
+    page.text(PAGE_WIDTH - 2 * MARGIN - 30, MARGIN / 2, f"{week + timedelta(days=4):%d %B %Y}")
+    page.text(PAGE_WIDTH - MARGIN, page.height - MARGIN / 2, str(number))
+
+
+def generate_report(spec: Optional[ReportSpec] = None) -> SyntheticReport:
+    spec = spec or ReportSpec()
+    if spec.pages < max(spec.markets_at_a_glance_page, spec.major_events_page) \
+            or spec.markets_at_a_glance_page == spec.major_events_page:
+        raise ValueError("Both sections need a page of their own within the report")
+    rng = random.Random(spec.seed)
+    markets_page, tables = _markets_at_a_glance(spec, rng)
+    events_page, events = _major_events(spec, rng)
+    tables["major_events"] = events
+
+    pages = []
+    for number in range(1, spec.pages + 1):
+        if number == spec.markets_at_a_glance_page:
+            pages.append(markets_page)
+        elif number == spec.major_events_page:
+            pages.append(events_page)
+        else:
+            pages.append(_filler_page(rng))
+        _add_page_header(pages[-1], number, spec.week)
+    return SyntheticReport(_write_pdf(pages), tables)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("output_dir")
+    arg_parser.add_argument("--count", type=int, default=1)
+    arg_parser.add_argument("--pages", type=int, default=20)
+    arg_parser.add_argument("--instruments", type=int, default=8, help="Rows per market table")
+    arg_parser.add_argument("--events", type=int, default=40)
+    arg_parser.add_argument("--column-shift", type=float, default=0.0)
+    arg_parser.add_argument("--row-spacing", type=float, default=1.0)
+    arg_parser.add_argument("--baseline-jitter", type=float, default=0.0)
+    arg_parser.add_argument("--split-header", action="store_true")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    layout = Layout(args.column_shift, args.row_spacing, args.baseline_jitter, args.split_header)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for i in range(args.count):
+        spec = ReportSpec(pages=args.pages, instruments=args.instruments, events=args.events,
+                          week=ReportSpec.week + timedelta(weeks=i), layout=layout, seed=args.seed + i)
+        path = os.path.join(args.output_dir, f"synthetic_{spec.week:%Y%m%d}.pdf")
+        with open(path, "wb") as f:
+            f.write(generate_report(spec).pdf)
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, create_compatibility_views
+
+WEEK = datetime(2025, 10, 20)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    create_compatibility_views(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+def make_equities_df(price: float = 3707.0):
+    return pd.DataFrame({
+        "Equities": ["MSCI World (USD)", "S&P 500"],
+        "Price": [price, 5810.0],
+        "1M": [0.4, 1.6], "3M": [6.6, 8.0], "6M": [13.2, 15.9],
+        "12M": [36.4, 40.8], "YTD": [18.9, 23.2], "QTD": [-0.4, np.nan],
+    })
+
+def make_major_events_df():
+    return pd.DataFrame({
+        "Date": pd.to_datetime(["2025-10-28", "2025-10-29"]),
+        "Time": ["15:30", "08:00"],
+        "Country": ["US", "GE"],
+        "Indicator/Event": ["Dallas Fed Manuf. Activity (index)", "GfK Consumer Confidence"],
+        "Period": ["Oct", "Nov"],
+        "UniCredit Estimates": [np.nan, -18.0],
+        "Consensus (Bloomberg)": [-9.0, -20.5],
+        "Previous": [-9.0, -21.2],
+    })
+
+def make_major_events_table_df():
+    data = [
+        ['test', '', '', '', '', '', '', 'dsjfhdijkshfiudshf'],
+        ['Date', 'Time', 'Country', 'Indicator/Event', 'Period', 'UniCredit Estimates', 'Consensus (Bloomberg)', 'Previous'],
+        ['Mon, 01 Jan', '10:00', 'ES', 'Event 1', 'Q1', '1.1', '1.2', '1.3'],
+        ['Wed, 03 Jan', '12:00', 'FR', 'Event 2', 'Q2', '2.1', '2.2', '2.3'],
+    ]
+    return pd.DataFrame(data)
+
+def make_maag_table_df():
+    data = [
+        ['Equities', 'Price', '1M', '3M', '6M', '12M', 'YTD', 'QTD'],
+        ['S&P 500', '5,810', '1.6', '8.0', '15.9', '40.8', '23.2', '0.9'],
+        ['Nasdaq Composite', '18,415', '1.9', '7.4', '18.4', '44.8', '23.4', '1.3'],
+    ]
+    return pd.DataFrame(data)
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from app.batch_run import ParseResult, collect_pdf_paths, parse_pdf, run_batch
+
+
+def test_collect_pdf_paths_expands_directories_and_globs(tmp_path):
+    for name in ["b.pdf", "a.pdf", "notes.txt"]:
+        (tmp_path / name).write_bytes(b"")
+
+    from_dir = collect_pdf_paths([str(tmp_path)])
+    from_glob = collect_pdf_paths([str(tmp_path / "*.pdf"), str(tmp_path / "a.pdf")])
+
+    assert from_dir == [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")]
+    assert from_glob == from_dir
+
+def test_parse_pdf_returns_error_instead_of_raising():
+    with patch("app.batch_run.PDFMarketParser.parse_pages", side_effect=RuntimeError("broken")):
+        result = parse_pdf("broken.pdf")
+
+    assert result.dfs == {}
+    assert result.error == "RuntimeError: broken"
+
+def fake_parse_pdf(pdf_path, *args):
+    if "broken" in pdf_path:
+        return ParseResult(pdf_path=pdf_path, error="ValueError: no tables")
+    return ParseResult(pdf_path=pdf_path, elapsed=0.01)
+
+def test_run_batch_collects_failures_without_stopping():
+    pdf_paths = ["a.pdf", "broken_1.pdf", "b.pdf", "broken_2.pdf", "c.pdf"]
+    with patch("app.batch_run._parse_pool", ThreadPoolExecutor), \
+            patch("app.batch_run.parse_pdf", side_effect=fake_parse_pdf):
+        summary = run_batch(pdf_paths, workers=2, store=False)
+
+    assert sorted(result.pdf_path for result in summary.parsed) == ["a.pdf", "b.pdf", "c.pdf"]
+    assert sorted(result.pdf_path for result in summary.failed) == ["broken_1.pdf", "broken_2.pdf"]
+    assert all(result.error == "ValueError: no tables" for result in summary.failed)
+    assert summary.elapsed > 0
+    assert summary.pdfs_per_minute == 60 * 5 / summary.elapsed
+
+def test_run_batch_exports_each_pdf_to_its_own_directory(tmp_path):
+    with patch("app.batch_run._parse_pool", ThreadPoolExecutor), \
+            patch("app.batch_run.parse_pdf", side_effect=fake_parse_pdf) as mock_parse:
+        run_batch(["in/a.pdf", "in/b.pdf"], store=False, output_dir=str(tmp_path))
+
+    assert sorted(call.args[-1] for call in mock_parse.call_args_list) == [str(tmp_path / "a"), str(tmp_path / "b")]
@@ -0,0 +1,95 @@
+import csv
+import pytest
+import pandas as pd
+from unittest.mock import MagicMock
+from sqlalchemy.exc import IntegrityError
+from app.models import Equities, MajorEvents, MarketSnapshot
+from app.bulk_ingest import COPY_NULL, _copy_rows, ingest_documents, stage_documents
+from app.bulk_writer import TABLE_SPECS, dataframe_to_records, frame_to_records, store_parsed_dfs
+from tests.conftest import WEEK, make_equities_df, make_major_events_df
+
+
+def test_records_convert_nan_to_none_and_add_week():
+    records = dataframe_to_records(make_equities_df(), TABLE_SPECS["equities"], WEEK)
+    assert records[1]["market_type"] == "equities"
+    assert records[1]["instrument"] == "S&P 500"
+    assert records[1]["qtd"] is None
+    assert all(record["week"] == WEEK for record in records)
+
+def test_records_keep_last_row_of_duplicated_key():
+    df = pd.concat([make_equities_df(price=1.0), make_equities_df(price=2.0)])
+    records = dataframe_to_records(df, TABLE_SPECS["equities"], WEEK)
+    assert len(records) == 2
+    assert records[0]["level"] == 2.0
+
+def test_store_inserts_then_updates_same_week(session):
+    store_parsed_dfs(session, {"equities": make_equities_df(), "major_events": make_major_events_df()}, WEEK)
+    store_parsed_dfs(session, {"equities": make_equities_df(price=4000.0)}, WEEK)
+
+    assert session.query(MarketSnapshot).count() == 2
+    # Readers of the old table see the same rows through its view
+    assert session.query(Equities).filter(Equities.equity == "MSCI World (USD)").one().price == 4000.0
+    assert session.query(MajorEvents).count() == 2
+
+def test_store_skips_unknown_dataframes(session):
+    written = store_parsed_dfs(session, {"unknown": make_equities_df()}, WEEK)
+    assert written == {}
+
+def test_ingest_documents_merges_every_document_in_one_transaction(session):
+    engine = session.get_bind()
+    next_week = WEEK + pd.Timedelta(days=7).to_pytimedelta()
+    store_parsed_dfs(session, {"equities": make_equities_df()}, WEEK)
+
+    written = ingest_documents(engine, [
+        ({"equities": make_equities_df(3710.0), "major_events": make_major_events_df()}, WEEK),
+        ({"equities": make_equities_df(3720.0)}, next_week),
+        # A later document with the same key wins
+        ({"equities": make_equities_df(3730.0)}, next_week),
+    ])
+
+    assert written == {"market_snapshot": 4, "major_events": 2}
+    session.expire_all()
+    prices = {row.week: row.price for row in session.query(Equities).filter(Equities.equity == "MSCI World (USD)")}
+    assert prices == {WEEK: 3710.0, next_week: 3730.0}
+    assert session.query(MajorEvents).filter(MajorEvents.country == "GE").one().unicredit_estimates == -18.0
+
+def test_ingest_documents_stores_nothing_when_a_document_fails(session):
+    # Country is NOT NULL, so the major events merge fails after the market rows were merged
+    broken = make_major_events_df().assign(Country=[None, "GE"])
+    with pytest.raises(IntegrityError):
+        ingest_documents(session.get_bind(), [
+            ({"equities": make_equities_df()}, WEEK), ({"major_events": broken}, WEEK),
+        ])
+    assert session.query(MarketSnapshot).count() == 0
+
+def make_events_with_empty_strings():
+    return make_major_events_df().assign(Time=["", "08:00"], Country=["", "GE"], Period=["Oct", None])
+
+def event_values(session):
+    return sorted((row.time, row.country, row.period) for row in session.query(MajorEvents))
+
+def test_backfill_stores_empty_strings_like_per_document_writes(session):
+    store_parsed_dfs(session, {"major_events": make_events_with_empty_strings()}, WEEK)
+    per_document = event_values(session)
+    session.query(MajorEvents).delete()
+    session.commit()
+
+    ingest_documents(session.get_bind(), [({"major_events": make_events_with_empty_strings()}, WEEK)])
+
+    session.expire_all()
+    assert event_values(session) == per_document == [("", "", "Oct"), ("08:00", "GE", None)]
+
+def test_copy_loads_empty_strings_as_empty_and_missing_values_as_null():
+    _, rows = stage_documents([({"major_events": make_events_with_empty_strings()}, WEEK)])["major_events"]
+    connection = MagicMock()
+    _copy_rows(connection, "stage_major_events", rows)
+
+    sql, buffer = connection.connection.cursor.return_value.copy_expert.call_args.args
+    assert f"NULL '{COPY_NULL}'" in sql
+    # As COPY reads it: only the NULL marker is NULL, every other field is its text
+    copied = [dict(zip(rows.columns, (None if field == COPY_NULL else field for field in record)))
+              for record in csv.reader(buffer)]
+    text_columns = ["time", "country", "period"]
+    assert [[record[col] for col in text_columns] for record in copied] == \
+           [[record[col] for col in text_columns] for record in frame_to_records(rows)]
+    assert copied[0]["unicredit_estimates"] is None
@@ -0,0 +1,36 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.bulk_writer import store_parsed_dfs_async
+from app.database import async_database_url, pool_options
+from app.models import Base, MarketSnapshot
+from tests.conftest import WEEK, make_equities_df
+
+
+def test_async_database_url_swaps_in_the_asyncio_driver():
+    assert async_database_url("postgresql://user:pass@db:5432/markets_weekly") == \
+        "postgresql+asyncpg://user:pass@db:5432/markets_weekly"
+    assert async_database_url("sqlite:////data/markets.sqlite3") == "sqlite+aiosqlite:////data/markets.sqlite3"
+    assert async_database_url("postgresql+asyncpg://db/markets") == "postgresql+asyncpg://db/markets"
+
+def test_pool_options_only_apply_to_server_databases():
+    assert pool_options("sqlite+aiosqlite://") == {}
+    assert pool_options("postgresql+asyncpg://db/markets")["pool_pre_ping"] is True
+
+def test_store_parsed_dfs_async_upserts_through_an_async_session(tmp_path):
+    pytest.importorskip("aiosqlite")
+
+    async def store_twice():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'markets.sqlite3'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine)() as session:
+            await store_parsed_dfs_async(session, {"equities": make_equities_df()}, WEEK)
+            written = await store_parsed_dfs_async(session, {"equities": make_equities_df(price=4000.0)}, WEEK)
+            levels = await session.run_sync(lambda s: [row.level for row in s.query(MarketSnapshot).order_by("id")])
+        await engine.dispose()
+        return written, levels
+
+    written, levels = asyncio.run(store_twice())
+    assert written == {"equities": 2}
+    assert levels == [4000.0, 5810.0]
@@ -0,0 +1,69 @@
+import io
+import zipfile
+import numpy as np
+import pandas as pd
+import pytest
+from app.exporters import EXPORTERS, ExportTable, exporter_for, read_bundle
+from app.report_sections import MAJOR_EVENTS
+
+
+def make_tables():
+    events = pd.DataFrame({
+        "Date": pd.to_datetime(["2025-10-28", "2025-10-29"]),
+        "Time": ["15:30", "08:00"],
+        "Country": ["US", "GE"],
+        "Indicator/Event": ["Dallas Fed Manuf. Activity (index)", "GfK Consumer Confidence"],
+        "Previous": [-9.0, np.nan],
+    })
+    equities = pd.DataFrame({"Equities": ["S&P 500", "Nasdaq, Composite"], "Price": [5810.0, np.nan],
+                             "12M": [40.8, 44.8]})
+    return {
+        "major_events": ExportTable(events, ("Previous",), tuple(MAJOR_EVENTS.date_columns),
+                                    MAJOR_EVENTS.categorical_columns),
+        "equities": ExportTable(equities, ("Price", "12M")),
+    }
+
+def assert_typed(dfs):
+    events = dfs["major_events"]
+    assert events["Date"].dtype == "datetime64[ns]"
+    assert isinstance(events["Country"].dtype, pd.CategoricalDtype)
+    assert list(events["Country"]) == ["US", "GE"]
+    assert events["Previous"].dtype == np.float32 and np.isnan(events.at[1, "Previous"])
+    assert list(dfs["equities"]["Equities"]) == ["S&P 500", "Nasdaq, Composite"]
+    assert dfs["equities"]["12M"].dtype == np.float32
+
+@pytest.mark.parametrize("export_format, read", [
+    ("parquet", pd.read_parquet),
+    ("arrow", pd.read_feather),
+])
+def test_typed_formats_keep_the_schema(tmp_path, export_format, read):
+    paths = exporter_for(export_format).export(make_tables(), str(tmp_path), "tables")
+
+    assert paths == [f"{tmp_path}/major_events.{export_format}", f"{tmp_path}/equities.{export_format}"]
+    assert_typed({name: read(path) for name, path in zip(["major_events", "equities"], paths)})
+
+def test_bundle_holds_every_table_in_one_file(tmp_path):
+    exporter = exporter_for("bundle")
+    [path] = exporter.export(make_tables(), str(tmp_path), "tables")
+    stream = io.BytesIO()
+    names = exporter.export_archive(make_tables(), stream)
+
+    assert path == f"{tmp_path}/tables.arrow" and names == ["major_events", "equities"]
+    assert_typed(read_bundle(path))
+    assert_typed(read_bundle(stream.getvalue()))
+
+def test_archives_are_zips_of_the_table_files(tmp_path):
+    for export_format in ("csv", "parquet", "arrow"):
+        exporter = EXPORTERS[export_format]()
+        stream = io.BytesIO()
+        names = exporter.export_archive(make_tables(), stream)
+        exporter.export(make_tables(), str(tmp_path), "tables")
+
+        with zipfile.ZipFile(stream) as zip_file:
+            assert zip_file.namelist() == names == [f"major_events.{exporter.extension}",
+                                                    f"equities.{exporter.extension}"]
+            assert zip_file.read(names[1]) == (tmp_path / names[1]).read_bytes()
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="Unknown export format"):
+        exporter_for("xlsx")
@@ -0,0 +1,103 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import pandas as pd
+from app.extraction_backends import TextBox, WordBoxBackend
+from app.pdf_tables_parser import PDFMarketParser
+from app.report_sections import MARKETS_AT_A_GLANCE
+from tests.conftest import make_maag_table_df, make_major_events_table_df
+
+
+def make_line(top, *cells):
+    return [TextBox(text, left, top - 6, right, top) for text, left, right in cells]
+
+def test_word_boxes_grid_aligns_cells_into_columns():
+    boxes = (
+        make_line(800, ("Weekly report", 30, 120))
+        + make_line(700, ("Equities ", 37, 66), ("Price ", 186, 203), ("1M ", 248, 260), ("YTD", 482, 496))
+        + make_line(690, ("S&P 500 ", 37, 67), ("5,810 ", 184, 203), ("-", 246.6, 248.6), ("1.6 ", 249.4, 259.5),
+                    ("23.2", 481, 496))
+        # Missing 1M value, the YTD still lands in its own column
+        + make_line(680, ("DAX ", 37, 50), ("19,427 ", 180, 203), ("16.0", 482, 496))
+        + make_line(20, ("page 2", 290, 310))
+    )
+
+    grid = WordBoxBackend()._grid(boxes)
+
+    assert grid.values.tolist() == [
+        ["Equities", "Price", "1M", "YTD"],
+        ["S&P 500", "5,810", "-1.6", "23.2"],
+        ["DAX", "19,427", "", "16.0"],
+    ]
+
+def test_word_boxes_backend_falls_back_to_camelot_on_invalid_output():
+    parser = PDFMarketParser(pdf_path="test.pdf", year=2025, backend=WordBoxBackend())
+    # Right header, but the event names spill into the Country column: fails validation
+    invalid_table = make_major_events_table_df()
+    invalid_table[2] = invalid_table[3]
+
+    with patch.object(WordBoxBackend, "read_table", return_value=invalid_table), \
+            patch("extraction_backends.camelot.read_pdf") as mock_read:
+        mock_tables = MagicMock()
+        mock_tables.n = 1
+        mock_tables.__getitem__.return_value.df = make_major_events_table_df()
+        mock_read.return_value = mock_tables
+
+        parser.parse_major_events_next_week(page=3)
+
+    mock_read.assert_called_once()
+    assert list(parser._current_processed_dfs["major_events"]["Country"]) == ["ES", "FR"]
+
+def test_camelot_errors_are_not_swallowed_without_fallback():
+    parser = PDFMarketParser(pdf_path="test.pdf", year=2025)
+    with patch("extraction_backends.camelot.read_pdf") as mock_read:
+        mock_read.return_value = MagicMock(n=0)
+        with pytest.raises(Exception, match="Unexpected number of tables"):
+            parser.parse_major_events_next_week(page=3)
+    assert "major_events" not in parser._current_processed_dfs
+
+def make_full_maag_table_df():
+    block = make_maag_table_df().values.tolist()
+    data = []
+    for title in MARKETS_AT_A_GLANCE.titles:
+        data += [[title, *block[0][1:]], *block[1:]]
+    return pd.DataFrame(data)
+
+def make_merged_major_events_table_df():
+    # What a too large row_tol does: both events end up on one row
+    data = make_major_events_table_df().values.tolist()
+    merged = [" ".join(cells).strip() for cells in zip(data[2], data[3])]
+    return pd.DataFrame(data[:2] + [merged])
+
+def test_auto_row_tol_picks_nearest_best_candidate_and_memoizes_it():
+    # Same module as the parser's CamelotBackend, so it's recognised as Camelot (no fallback)
+    from extraction_backends import AutoRowTolCamelotBackend
+    backend = AutoRowTolCamelotBackend()
+    layouts = {
+        page: MagicMock(page=page, rotation="", dimensions=(595.0, 842.0), horizontal_text=[
+            MagicMock(x0=40.2, y0=700.4, get_text=MagicMock(return_value=f"{anchor}\n"))
+            for anchor in ("Equities", "Date", "Time")
+        ]) for page in (2, 3)
+    }
+
+    def extract(layout, pdf_path, **kwargs):
+        tables = MagicMock()
+        tables.n = 1
+        if layout.page == 2:
+            tables.__getitem__.return_value.df = make_full_maag_table_df()
+        elif kwargs["row_tol"] <= 8:
+            tables.__getitem__.return_value.df = make_major_events_table_df()
+        else:
+            tables.__getitem__.return_value.df = make_merged_major_events_table_df()
+        return tables
+
+    with patch("extraction_backends.load_page_layouts", return_value=layouts), \
+            patch("extraction_backends.extract_tables", side_effect=extract) as mock_extract:
+        parser = PDFMarketParser(pdf_path="test.pdf", year=2025, backend=backend)
+        parser.parse_pages(2, 3)
+        assert list(parser._current_processed_dfs["major_events"]["Country"]) == ["ES", "FR"]
+
+        # Same layout in the next report: the memoized row_tol is used straight away
+        mock_extract.reset_mock()
+        PDFMarketParser(pdf_path="test.pdf", year=2025, backend=backend).parse_pages(2, 3)
+
+    assert [call.kwargs["row_tol"] for call in mock_extract.call_args_list] == [10, 8]
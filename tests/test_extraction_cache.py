@@ -0,0 +1,63 @@
+import io
+import os
+import pandas as pd
+from unittest.mock import MagicMock, patch
+from app.extraction_cache import ExtractionCache, RAW_TABLE_NAME, file_sha256
+from app.pdf_tables_parser import PDFMarketParser
+from tests.conftest import make_major_events_table_df
+
+
+def test_get_returns_stored_frames_in_order(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+    raw = pd.DataFrame([["a", "b"], ["c", "d"]])
+    cleaned = pd.DataFrame({"x": [1.0, 2.0]})
+    cache.put("key", {"zeta": cleaned, RAW_TABLE_NAME: raw})
+
+    cached = cache.get("key")
+
+    assert list(cached) == ["zeta", RAW_TABLE_NAME]
+    pd.testing.assert_frame_equal(cached[RAW_TABLE_NAME], raw)
+    pd.testing.assert_frame_equal(cached["zeta"], cleaned)
+
+def test_get_returns_none_on_miss(tmp_path):
+    assert ExtractionCache(str(tmp_path / "missing")).get("key") is None
+
+def test_evict_removes_least_recently_used_entry(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+    df = pd.DataFrame({"x": range(100)})
+    cache.put("old", {"df": df})
+    cache.put("new", {"df": df})
+    os.utime(tmp_path / "old", (0, 0))
+
+    cache.max_bytes = 1
+    cache.evict()
+    assert cache.get("old") is None
+
+def test_parser_reuses_cached_tables(tmp_path):
+    pdf_path = tmp_path / "doc.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 test")
+    cache = ExtractionCache(str(tmp_path / "cache"))
+
+    with patch("extraction_backends.camelot.read_pdf") as mock_read:
+        mock_tables = MagicMock()
+        mock_tables.n = 1
+        mock_tables.__getitem__.side_effect = lambda _: MagicMock(df=make_major_events_table_df())
+        mock_read.return_value = mock_tables
+
+        first = PDFMarketParser(pdf_path=str(pdf_path), year=2025, cache=cache)
+        first.parse_major_events_next_week(page=3)
+        second = PDFMarketParser(pdf_path=str(pdf_path), year=2025, cache=cache)
+        second.parse_major_events_next_week(page=3)
+
+    assert mock_read.call_count == 1
+    pd.testing.assert_frame_equal(
+        first._current_processed_dfs["major_events"], second._current_processed_dfs["major_events"]
+    )
+
+def test_file_sha256_same_for_path_and_file_object(tmp_path):
+    pdf_path = tmp_path / "doc.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 test" * 1000)
+    pdf_file = io.BytesIO(pdf_path.read_bytes())
+
+    assert file_sha256(str(pdf_path)) == file_sha256(pdf_file)
+    assert pdf_file.tell() == 0
@@ -0,0 +1,44 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from app.history_store import HistoryStore, as_printed
+from tests.conftest import make_equities_df
+
+
+def test_append_partitions_by_table_and_year_and_replaces_reingested_weeks(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append({"equities": make_equities_df(3700.0)}, datetime(2024, 12, 30))
+    store.append({"equities": make_equities_df(3707.0)}, datetime(2025, 1, 6))
+    # Same report again, with a correction
+    written = store.append({"equities": make_equities_df(3708.5), "unknown": pd.DataFrame()}, datetime(2025, 1, 6))
+
+    assert written == {"equities": 2}
+    assert sorted(os.listdir(tmp_path / "equities")) == [".lock", "year=2024", "year=2025"]
+    df = store.query("equities", instrument="MSCI World (USD)")
+    assert df["week"].tolist() == [date(2024, 12, 30), date(2025, 1, 6)]
+    assert df["price"].tolist() == [3700.0, 3708.5]
+    assert df.columns.tolist() == ["instrument", "week", "price", "m1", "m3", "m6", "m12", "ytd", "qtd"]
+
+def test_query_filters_instrument_and_week_range(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    for week in pd.date_range("2024-11-04", "2025-02-24", freq="W-MON"):
+        store.append({"equities": make_equities_df()}, week.to_pydatetime())
+
+    df = store.query("equities", instrument="S&P 500", start=date(2024, 12, 20), end=date(2025, 1, 13))
+
+    assert df["instrument"].unique().tolist() == ["S&P 500"]
+    assert df["week"].tolist() == [date(2024, 12, 23), date(2024, 12, 30), date(2025, 1, 6), date(2025, 1, 13)]
+    # Missing values stay missing, printed values come back exactly
+    assert df["qtd"].isna().all() and (df["m12"] == 40.8).all()
+    assert store.query("equities", instrument="DAX").empty
+    assert len(store.query("equities", start=date(2025, 2, 1))) == 2 * 4
+
+def test_query_of_empty_store_has_the_table_columns(tmp_path):
+    df = HistoryStore(str(tmp_path)).query("credit", start=date(2020, 1, 1))
+    assert df.empty and "oas_bp" in df.columns
+
+def test_as_printed_recovers_decimals_from_float32():
+    values = np.array([1.08, 5810.3, -2.8, 0.0, np.nan, 19427.12], dtype="float32")
+    assert as_printed(values)[[0, 1, 2, 3, 5]].tolist() == [1.08, 5810.3, -2.8, 0.0, 19427.12]
+    assert np.isnan(as_printed(values)[4])
@@ -0,0 +1,85 @@
+import io
+import pytest
+from datetime import date, datetime
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.batch_run import new_documents
+from app.bulk_ingest import ingest_documents
+from app.extraction_backends import WordBoxBackend
+from app.ingestion_ledger import ingested_hashes, new_ledger_entry, report_week, store_document
+from app.models import Base, IngestedDocument, MajorEvents, MarketSnapshot
+from app.pdf_tables_parser import PDFMarketParser
+from benchmarks.synthetic_reports import ReportSpec, generate_report
+from tests.conftest import make_equities_df, make_major_events_df
+
+REPORT_DATE = date(2024, 10, 25)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+def test_report_week_is_the_monday_of_the_report():
+    assert report_week(REPORT_DATE) == datetime(2024, 10, 21)
+
+def test_store_document_uses_the_report_week_and_skips_ingested_documents(session):
+    dfs = {"equities": make_equities_df(), "major_events": make_major_events_df()}
+
+    written = store_document(session, dfs, "a" * 64, REPORT_DATE, "weekly.pdf")
+    again = store_document(session, dfs, "a" * 64, REPORT_DATE, "weekly.pdf")
+
+    assert written == {"equities": 2, "major_events": 2}
+    assert again is None
+    assert set(session.scalars(select(MarketSnapshot.week))) == {datetime(2024, 10, 21)}
+    [entry] = session.scalars(select(IngestedDocument)).all()
+    assert (entry.pdf_hash, entry.report_date, entry.rows_written) == ("a" * 64, REPORT_DATE, 4)
+
+def test_store_document_writes_only_rows_that_changed(session):
+    store_document(session, {"equities": make_equities_df(), "major_events": make_major_events_df()}, "a" * 64,
+                   REPORT_DATE)
+    # A corrected edition of the same report: one price changed, the events are the same
+    written = store_document(session, {"equities": make_equities_df(price=3710.0),
+                                       "major_events": make_major_events_df()}, "b" * 64, REPORT_DATE)
+
+    assert written == {"equities": 1, "major_events": 0}
+    levels = session.scalars(select(MarketSnapshot.level).order_by(MarketSnapshot.id)).all()
+    assert levels == [3710.0, 5810.0]
+    assert ingested_hashes(session, ["a" * 64, "b" * 64, "c" * 64]) == {"a" * 64, "b" * 64}
+
+def test_backfill_records_its_documents_in_the_ledger(engine, session):
+    entry = new_ledger_entry("a" * 64, REPORT_DATE, "weekly.pdf", rows_written=2)
+    ingest_documents(engine, [({"equities": make_equities_df()}, entry.week)], [entry])
+
+    assert ingested_hashes(session, ["a" * 64]) == {"a" * 64}
+
+def test_new_documents_skips_ingested_and_duplicate_pdfs(tmp_path, session):
+    paths = []
+    for name, content in [("old.pdf", b"%PDF old"), ("new.pdf", b"%PDF new"), ("new_copy.pdf", b"%PDF new")]:
+        (tmp_path / name).write_bytes(content)
+        paths.append(str(tmp_path / name))
+    new, _ = new_documents(session, paths[:1])
+    store_document(session, {"equities": make_equities_df()}, new[paths[0]], REPORT_DATE)
+
+    new, skipped = new_documents(session, paths)
+
+    assert list(new) == [paths[1]]
+    assert skipped == [paths[0], paths[2]]
+
+def test_report_from_another_year_is_stored_with_its_own_event_dates(session):
+    report = generate_report(ReportSpec(pages=4, events=12, week=date(2023, 12, 4)))
+    parser = PDFMarketParser(pdf_path=io.BytesIO(report.pdf), backend=WordBoxBackend())
+    parser.parse_pages()
+
+    store_document(session, parser._current_processed_dfs, parser.pdf_hash, parser.report_date)
+
+    rows = session.execute(select(MajorEvents.date, MajorEvents.week)).all()
+    assert {week for _, week in rows} == {datetime(2023, 12, 4)}
+    assert {event_date.date() for event_date, _ in rows} <= {date(2023, 12, day) for day in range(4, 11)}
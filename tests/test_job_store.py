@@ -0,0 +1,98 @@
+import sqlite3
+import time
+from unittest.mock import patch
+from app.job_store import DONE, FAILED, QUEUED, RUNNING, JobStore
+
+
+def create(store: JobStore, tmp_path, content_hash: str = "abc", major_events_page: int = 3, owner: str = None):
+    return store.find_or_create(content_hash, "doc.pdf", 2, major_events_page, str(tmp_path), owner)
+
+def test_duplicate_upload_attaches_to_in_flight_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job, created = create(store, tmp_path)
+    store.mark_running(job.id)
+    duplicate, duplicate_created = create(store, tmp_path)
+
+    assert created and not duplicate_created
+    assert duplicate.id == job.id
+    assert duplicate.status == RUNNING
+
+def test_finished_or_different_jobs_are_not_reused(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job, _ = create(store, tmp_path)
+    other_pages, other_created = create(store, tmp_path, major_events_page=4)
+    store.mark_done(job.id, str(tmp_path / "result.zip"))
+    rerun, rerun_created = create(store, tmp_path)
+
+    assert other_created and other_pages.id != job.id
+    assert rerun_created and rerun.id != job.id
+    assert rerun.status == QUEUED
+
+def test_jobs_with_located_pages_attach_to_each_other(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job, _ = store.find_or_create("abc", "doc.pdf", None, None, str(tmp_path))
+    duplicate, duplicate_created = store.find_or_create("abc", "doc.pdf", None, None, str(tmp_path))
+    explicit, explicit_created = create(store, tmp_path)
+
+    assert not duplicate_created and duplicate.id == job.id
+    assert explicit_created and explicit.id != job.id
+
+def test_to_dict_reports_timings_without_paths(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job, _ = create(store, tmp_path)
+    store.mark_running(job.id)
+    store.mark_done(job.id, str(tmp_path / "result.zip"))
+
+    job_dict = store.get(job.id).to_dict()
+
+    assert job_dict["status"] == DONE
+    assert "pdf_path" not in job_dict and "result_path" not in job_dict
+    assert job_dict["running_seconds"] >= 0
+    assert job_dict["finished_at"].endswith("+00:00")
+
+def test_only_jobs_of_gone_owners_are_reaped(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    alive, _ = create(store, tmp_path, "a", owner="worker-1")
+    gone, _ = create(store, tmp_path, "b", owner="worker-2")
+    never_seen, _ = create(store, tmp_path, "c", owner="worker-3")
+    without_owner, _ = create(store, tmp_path, "d")
+    store.mark_running(alive.id)
+    with patch("app.job_store.time.time", return_value=time.time() - 120):
+        store.heartbeat("worker-2")
+    store.heartbeat("worker-1")
+
+    reaped = store.reap_orphans(60, "Interrupted")
+
+    assert reaped == 3
+    assert store.get(alive.id).status == RUNNING
+    for job in (gone, never_seen, without_owner):
+        assert store.get(job.id).status == FAILED and store.get(job.id).error == "Interrupted"
+    assert "owner" not in store.get(alive.id).to_dict()
+
+def test_release_fails_the_jobs_of_its_owner_only(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    mine, _ = create(store, tmp_path, "a", owner="worker-1")
+    theirs, _ = create(store, tmp_path, "b", owner="worker-2")
+    store.heartbeat("worker-1")
+    store.heartbeat("worker-2")
+
+    assert store.release("worker-1", "Shutting down") == 1
+    assert store.get(mine.id).status == FAILED and store.get(theirs.id).status == QUEUED
+
+def test_job_tables_without_owners_are_migrated(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    with sqlite3.connect(db_path) as connection:
+        connection.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, filename TEXT NOT NULL, "
+            "markets_at_a_glance_page INTEGER, major_events_page INTEGER, status TEXT NOT NULL, "
+            "pdf_path TEXT NOT NULL, result_path TEXT, error TEXT, created_at REAL NOT NULL, started_at REAL, "
+            "finished_at REAL)"
+        )
+        connection.execute(
+            "INSERT INTO jobs VALUES ('old', 'abc', 'doc.pdf', 2, 3, 'running', 'x.pdf', NULL, NULL, 0, 0, NULL)"
+        )
+    store = JobStore(db_path)
+    job, created = create(store, tmp_path, "def", owner="worker-1")
+
+    assert created and store.get(job.id).owner == "worker-1"
+    assert store.get("old").owner is None
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+from unittest.mock import patch
+from app.lazy_imports import LazyModule
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    lazy_json = LazyModule("json")
+    assert lazy_json.dumps([1]) == "[1]"
+    with patch.object(lazy_json, "dumps", return_value="patched"):
+        assert lazy_json.dumps([1]) == "patched"
+    assert lazy_json.dumps([1]) == "[1]"
+
+def imported_packages(module: str) -> set:
+    code = f"import sys; sys.path.insert(0, 'app'); import {module}; print(' '.join(m.split('.')[0] for m in sys.modules))"
+    return set(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split())
+
+def test_api_and_cli_start_without_the_libraries_they_dont_use():
+    api = imported_packages("main")
+    cli = imported_packages("simple_run")
+
+    assert "fastapi" in api and not {"camelot", "pdfminer"} & api
+    assert not {"fastapi", "main", "camelot", "pdfminer"} & cli
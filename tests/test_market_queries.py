@@ -0,0 +1,47 @@
+import pandas as pd
+from datetime import timedelta
+from app.bulk_writer import store_parsed_dfs
+from app.market_queries import latest_week, rank_weeks, top_bottom_markets
+from app.rankings import top_bottom
+from tests.conftest import WEEK, make_equities_df
+
+
+def make_commodities_df(m12):
+    commodities = make_equities_df().rename(columns={"Equities": "Commodities"})
+    commodities["Commodities"] = ["Brent", "Gold"]
+    commodities["12M"] = m12
+    return commodities
+
+def test_top_bottom_markets_ranks_across_market_types(session):
+    store_parsed_dfs(session, {"equities": make_equities_df(), "commodities": make_commodities_df([-12.5, 51.0])}, WEEK)
+    store_parsed_dfs(session, {"commodities": make_commodities_df([90.0, 90.0])}, WEEK - timedelta(days=7))
+
+    df = top_bottom_markets(session, WEEK, metric="12M", n=2)
+
+    assert df[df["rank_group"] == "top"][["market_type", "instrument"]].values.tolist() == [
+        ["commodities", "Gold"], ["equities", "S&P 500"]]
+    assert df[df["rank_group"] == "bottom"]["instrument"].tolist() == ["Brent", "MSCI World (USD)"]
+    assert df["12M"].tolist() == [51.0, 40.8, -12.5, 36.4]
+    assert latest_week(session) == WEEK
+
+def test_rank_weeks_ranks_each_week(session):
+    weeks = [WEEK - timedelta(days=7), WEEK]
+    store_parsed_dfs(session, {"equities": make_equities_df(), "commodities": make_commodities_df([-1.0, 0.0])}, weeks[0])
+    store_parsed_dfs(session, {"equities": make_equities_df(), "commodities": make_commodities_df([-1.0, 50.0])}, WEEK)
+
+    df = rank_weeks(session, metric="12M", n=1)
+
+    assert df["week"].tolist() == [weeks[0], weeks[0], WEEK, WEEK]
+    assert df["rank_group"].tolist() == ["top", "bottom"] * 2
+    assert df["instrument"].tolist() == ["S&P 500", "Brent", "Gold", "Brent"]
+    assert df[df["week"] == WEEK]["12M"].tolist() == [50.0, -1.0]
+
+def test_top_bottom_matches_head_and_tail_of_a_full_sort():
+    df = pd.concat([make_equities_df(), make_equities_df().assign(Equities=["A", "B"])], ignore_index=True)
+    df["12M"] = ["36.4", "n/a", 50.0, -3.0]
+
+    top, bottom = top_bottom(df, metric="12M", n=2)
+
+    assert top["Equities"].tolist() == ["A", "MSCI World (USD)"]
+    assert top["12M"].tolist() == [50.0, 36.4]
+    assert bottom["Equities"].tolist() == ["MSCI World (USD)", "B"]
@@ -0,0 +1,44 @@
+import marshal
+from app.metrics import PipelineMetrics
+from app.profiling import StageTiming, profiled, record_stages, stage
+
+
+def test_stages_are_only_recorded_inside_record_stages():
+    with stage("ignored"):
+        pass
+    with record_stages() as stages:
+        with stage("extract.camelot"):
+            data = bytearray(32 * 1024 * 1024)
+        with stage("export_zip"):
+            pass
+    del data
+
+    assert [timing.stage for timing in stages] == ["extract.camelot", "export_zip"]
+    assert stages[0].rss_growth_bytes >= 16 * 1024 * 1024
+    assert all(timing.seconds >= 0 and timing.peak_rss_bytes > 0 for timing in stages)
+
+def test_render_prometheus_histograms_and_counters():
+    metrics = PipelineMetrics(buckets=(0.1, 1.0))
+    metrics.observe_stages([StageTiming("extract.camelot", 0.5, 300, 100), StageTiming("extract.camelot", 2.0, 200, 50)])
+    metrics.count_document("process_pdf", "ok")
+
+    lines = metrics.render(gauges={"pdf_worker_pool_pending": ("Pending PDFs.", 2)}).splitlines()
+
+    assert lines[:2] == ["# HELP pdf_stage_duration_seconds Wall time of each stage of the PDF pipeline.",
+                         "# TYPE pdf_stage_duration_seconds histogram"]
+    assert 'pdf_stage_duration_seconds_bucket{stage="extract.camelot",le="0.1"} 0' in lines
+    assert 'pdf_stage_duration_seconds_bucket{stage="extract.camelot",le="1.0"} 1' in lines
+    assert 'pdf_stage_duration_seconds_bucket{stage="extract.camelot",le="+Inf"} 2' in lines
+    assert 'pdf_stage_duration_seconds_sum{stage="extract.camelot"} 2.5' in lines
+    assert 'pdf_stage_duration_seconds_count{stage="extract.camelot"} 2' in lines
+    assert 'pdf_stage_peak_rss_bytes{stage="extract.camelot"} 300' in lines
+    assert 'pdf_documents_total{endpoint="process_pdf",status="ok"} 1' in lines
+    assert lines[-1] == "pdf_worker_pool_pending 2.0"
+
+def test_profiled_returns_loadable_stats_only_when_enabled():
+    with profiled(False) as stats:
+        sum(range(10))
+    assert stats == []
+    with profiled(True) as stats:
+        sum(range(10))
+    assert any(function == "<built-in method builtins.sum>" for _, _, function in marshal.loads(stats[0]))
@@ -0,0 +1,42 @@
+from datetime import date
+from unittest.mock import patch
+from app.extraction_cache import ExtractionCache
+from app.page_index import PageIndex, normalise_text
+from app.pdf_tables_parser import PDFMarketParser
+from app.report_sections import MAJOR_EVENTS, MARKETS_AT_A_GLANCE
+
+
+def test_normalise_text_joins_wrapped_headers():
+    assert normalise_text("Consensus \r\n(Bloomberg)  Previous\n") == "consensus (bloomberg) previous"
+
+def test_page_index_frame_round_trip_keeps_missing_sections():
+    index = PageIndex(page_count=21, pages={"markets_at_a_glance": 2, "major_events": None})
+    assert PageIndex.from_frame(index.to_frame()) == index
+    dated = PageIndex(page_count=21, pages={"markets_at_a_glance": 2}, report_date=date(2024, 10, 25))
+    assert PageIndex.from_frame(dated.to_frame()) == dated
+
+def test_section_matchers():
+    maag_text = normalise_text("Markets at a glance\nEquities Price\nRates (government bonds)\nCredit\nCommodities\n"
+                               "Exchange rates")
+    events_text = normalise_text("Date Time Country Indicator/Event Period UniCredit \nestimates Previous")
+
+    assert PDFMarketParser._is_section_page(MARKETS_AT_A_GLANCE, maag_text)
+    assert not PDFMarketParser._is_section_page(MARKETS_AT_A_GLANCE,
+                                                normalise_text("Contents: Markets at a glance, page 2"))
+    assert PDFMarketParser._is_section_page(MAJOR_EVENTS, events_text)
+    assert not PDFMarketParser._is_section_page(MAJOR_EVENTS, maag_text)
+
+def test_located_pages_are_cached_per_document(tmp_path):
+    pdf_path = tmp_path / "doc.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 test")
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    index = PageIndex(page_count=25, pages={"markets_at_a_glance": 4, "major_events": 5})
+
+    with patch("app.pdf_tables_parser.build_page_index", return_value=index) as mock_build, \
+            patch.object(PDFMarketParser, "_parse_sections") as mock_parse:
+        PDFMarketParser(pdf_path=str(pdf_path), cache=cache).parse_pages()
+        located = PDFMarketParser(pdf_path=str(pdf_path), cache=cache).locate_sections()
+
+    mock_build.assert_called_once()
+    assert located.to_dict() == index.to_dict()
+    assert [page for _, page, _, _ in mock_parse.call_args.args[0]] == [4, 5]
@@ -1,47 +1,45 @@
+import io
+import threading
+import zipfile
 import pytest
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 from app.pdf_tables_parser import PDFMarketParser
+from app.page_index import PageIndex
+from app.report_sections import MAJOR_EVENTS, ReportTable, SectionSpec
+from tests.conftest import make_maag_table_df, make_major_events_table_df
 
 
 @pytest.fixture
 def parser():
-    return PDFMarketParser(pdf_path="test.pdf")
-
-def make_major_events_table_df():
-    data = [
-        ['test', '', '', '', '', '', '', 'dsjfhdijkshfiudshf'],
-        ['Date', 'Time', 'Country', 'Indicator/Event', 'Period', 'UniCredit Estimates', 'Consensus (Bloomberg)', 'Previous'],
-        ['Mon, 01 Jan', '10:00', 'ES', 'Event 1', 'Q1', '1.1', '1.2', '1.3'],
-        ['Wed, 03 Jan', '12:00', 'FR', 'Event 2', 'Q2', '2.1', '2.2', '2.3'],
-    ]
-    return pd.DataFrame(data)
+    return PDFMarketParser(pdf_path="test.pdf", year=2025)
 
 def test_parse_raises_exception_on_unexpected_number_of_tables_maag(parser):
-    with patch("app.pdf_tables_parser.camelot.read_pdf") as mock_read:
+    with patch("extraction_backends.camelot.read_pdf") as mock_read:
         mock_tables = MagicMock()
         mock_tables.n = 2
         mock_read.return_value = mock_tables
         with pytest.raises(Exception):
-            parser.parse_markets_at_a_glance()
+            parser.parse_markets_at_a_glance(page=2)
 
 def test_parse_raises_exception_on_unexpected_number_of_tables_major_events(parser):
-    with patch("app.pdf_tables_parser.camelot.read_pdf") as mock_read:
+    with patch("extraction_backends.camelot.read_pdf") as mock_read:
         mock_tables = MagicMock()
         mock_tables.n = 48
         mock_read.return_value = mock_tables
         with pytest.raises(Exception):
-            parser.parse_major_events_next_week()
+            parser.parse_major_events_next_week(page=3)
 
 def test_current_processed_dfs_grows_by_one_with_parses(parser):
-    with patch("app.pdf_tables_parser.camelot.read_pdf") as mock_read:
+    with patch("extraction_backends.camelot.read_pdf") as mock_read:
         mock_tables = MagicMock()
         mock_tables.n = 1
         mock_tables.__getitem__.return_value.df = make_major_events_table_df()
         mock_read.return_value = mock_tables
 
         initial_len = len(parser._current_processed_dfs)
-        parser.parse_major_events_next_week()
+        parser.parse_major_events_next_week(page=3)
         final_len = len(parser._current_processed_dfs)
 
         assert final_len == initial_len + 1
@@ -61,3 +59,130 @@ def test_export_raises_value_error_on_empty_output_path(parser):
     with patch("app.pdf_tables_parser.logger"):
         with pytest.raises(ValueError):
             parser.export_dfs_to_csv("")
+
+def test_parse_pages_analyses_layout_once_with_per_section_row_tol(parser):
+    raw_tables = {2: make_maag_table_df(), 3: make_major_events_table_df()}
+    with patch("extraction_backends.load_page_layouts") as mock_layouts, \
+            patch("extraction_backends.extract_tables") as mock_extract:
+        mock_layouts.return_value = {page: MagicMock(page=page, rotation="") for page in raw_tables}
+
+        def extract(layout, pdf_path, **kwargs):
+            tables = MagicMock()
+            tables.n = 1
+            tables.__getitem__.return_value.df = raw_tables[layout.page]
+            return tables
+        mock_extract.side_effect = extract
+
+        parser.parse_pages(2, 3)
+
+    mock_layouts.assert_called_once()
+    assert mock_layouts.call_args.args[0] == "test.pdf" and set(mock_layouts.call_args.args[1]) == {2, 3}
+    assert [call.kwargs["row_tol"] for call in mock_extract.call_args_list] == [10, 11]
+    assert list(parser._current_processed_dfs) == ["equities", "major_events"]
+    assert parser._current_processed_dfs["equities"].at[0, "Price"] == 5810
+
+def test_registered_section_is_located_and_parsed_from_its_spec(parser):
+    forecasts = SectionSpec(
+        name="fx_forecasts",
+        anchors=("FX forecasts", "EUR-USD"),
+        camelot_params={"flavor": "stream", "row_tol": 12},
+        tables=(ReportTable("fx_forecasts", title="FX forecasts"),),
+        numeric_columns=("Spot", "4Q25"),
+        required_column="4Q25",
+    )
+    raw_tables = {
+        2: make_maag_table_df(),
+        3: make_major_events_table_df(),
+        7: pd.DataFrame([["FX forecasts", "Spot", "4Q25"], ["EUR-USD", "1.16", "1.18"], ["Source: ...", "", ""]]),
+    }
+    index = PageIndex(page_count=9, pages={"markets_at_a_glance": 2, "major_events": 3, "fx_forecasts": 7})
+    with patch.dict("report_sections.REPORT_SECTIONS", {"fx_forecasts": forecasts}), \
+            patch.object(PDFMarketParser, "SECTIONS", [*PDFMarketParser.SECTIONS, "fx_forecasts"]), \
+            patch("app.pdf_tables_parser.build_page_index", return_value=index), \
+            patch("extraction_backends.load_page_layouts") as mock_layouts, \
+            patch("extraction_backends.extract_tables") as mock_extract:
+        mock_layouts.side_effect = lambda pdf, pages: {page: MagicMock(page=page, rotation="") for page in pages}
+
+        def extract(layout, pdf_path, **kwargs):
+            return MagicMock(n=1, **{"__getitem__.return_value.df": raw_tables[layout.page]})
+        mock_extract.side_effect = extract
+
+        parser.parse_pages()
+
+    assert [call.kwargs["row_tol"] for call in mock_extract.call_args_list] == [10, 11, 12]
+    assert list(parser._current_processed_dfs) == ["equities", "major_events", "fx_forecasts"]
+    forecasts_df = parser._current_processed_dfs["fx_forecasts"]
+    assert forecasts_df.to_dict("records") == [{"FX forecasts": "EUR-USD", "Spot": 1.16, "4Q25": 1.18}]
+
+def test_pages_are_given_per_section_in_registry_order(parser):
+    with patch.object(PDFMarketParser, "_parse_sections") as mock_parse, \
+            patch.object(PDFMarketParser, "_section", side_effect=lambda section, page: (section, page)):
+        parser.parse_pages(4)
+        with pytest.raises(TypeError, match="3 pages for the 2 sections"):
+            parser.parse_pages(4, 5, 6)
+
+    assert mock_parse.call_args.args[0] == [("markets_at_a_glance", 4), ("major_events", None)]
+
+def test_parse_all_merges_sections_in_order_and_keeps_errors_per_section(parser):
+    events_done = threading.Event()
+    with patch("extraction_backends.load_page_layouts") as mock_layouts, \
+            patch("extraction_backends.extract_tables") as mock_extract:
+        mock_layouts.side_effect = lambda pdf, pages: {page: MagicMock(page=page, rotation="") for page in pages}
+
+        def extract(layout, pdf_path, **kwargs):
+            tables = MagicMock()
+            tables.n = 1
+            if layout.page == 2:
+                # "Markets at a glance" finishes last, its tables still come first
+                assert events_done.wait(5)
+                tables.__getitem__.return_value.df = make_maag_table_df()
+            else:
+                tables.__getitem__.return_value.df = make_major_events_table_df()
+                events_done.set()
+            return tables
+        mock_extract.side_effect = extract
+
+        with ThreadPoolExecutor(2) as executor:
+            assert parser.parse_all(2, 3, executor=executor) == {}
+        assert list(parser._current_processed_dfs) == ["equities", "major_events"]
+        assert [df.name for df in parser._current_processed_dfs.values()] == ["equities", "major_events"]
+
+        def extract_broken_events(layout, pdf_path, **kwargs):
+            return extract(layout, pdf_path) if layout.page == 2 else MagicMock(n=2)
+        mock_extract.side_effect = extract_broken_events
+        partial = PDFMarketParser(pdf_path="test.pdf", year=2025)
+        with ThreadPoolExecutor(2) as executor:
+            errors = partial.parse_all(2, 3, executor=executor)
+    assert list(errors) == ["major_events"] and "Unexpected number of tables" in str(errors["major_events"])
+    assert list(partial._current_processed_dfs) == ["equities"]
+
+def test_export_to_zip_matches_csv_export(parser, tmp_path):
+    df = pd.DataFrame({"Equities": ["S&P 500", "Nasdaq, Composite"], "Price": [5810.0, None]})
+    df.name = "equities"
+    parser._current_processed_dfs = {"equities": df}
+    zip_buffer = io.BytesIO()
+
+    with patch("app.pdf_tables_parser.logger"):
+        arcnames = parser.export_dfs_to_zip(zip_buffer)
+        parser.export_dfs_to_csv(str(tmp_path))
+
+    assert arcnames == ["equities.csv"]
+    with zipfile.ZipFile(zip_buffer) as zip_file:
+        assert zip_file.read("equities.csv") == (tmp_path / "equities.csv").read_bytes()
+
+def test_clean_major_events_finds_header_after_preamble_and_uses_report_year():
+    parser = PDFMarketParser(pdf_path="test.pdf", year=2024)
+    raw_table = make_major_events_table_df()
+    preamble = pd.DataFrame([[f"note {i}", "", "", "", "", "", "", ""] for i in range(100)])
+    raw_table = pd.concat([preamble, raw_table], ignore_index=True)
+
+    [major_events_df] = parser._clean_section(MAJOR_EVENTS, raw_table, page=3)
+
+    assert list(major_events_df["Indicator/Event"]) == ["Event 1", "Event 2"]
+    assert list(major_events_df["Date"]) == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-03")]
+    assert major_events_df.at[1, "Previous"] == 2.3
+
+def test_clean_major_events_raises_without_header_row(parser):
+    raw_table = make_major_events_table_df().drop(index=1).reset_index(drop=True)
+    with pytest.raises(RuntimeError):
+        parser._clean_section(MAJOR_EVENTS, raw_table, page=3)
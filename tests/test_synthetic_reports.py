@@ -0,0 +1,58 @@
+import io
+import pytest
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from app.exporters import read_bundle
+from app.extraction_backends import WordBoxBackend
+from app.pdf_tables_parser import PDFMarketParser
+from benchmarks.synthetic_reports import Layout, ReportSpec, generate_report
+
+
+def parse(pdf: bytes) -> PDFMarketParser:
+    parser = PDFMarketParser(pdf_path=io.BytesIO(pdf), backend=WordBoxBackend())
+    parser.parse_pages()
+    return parser
+
+def test_generated_report_parses_into_its_tables():
+    report = generate_report(ReportSpec(pages=12, markets_at_a_glance_page=5, major_events_page=9, instruments=12,
+                                        events=30, layout=Layout(column_shift=3, split_header=True)))
+    parser = parse(report.pdf)
+
+    assert parser.locate_sections().to_dict() == {
+        "page_count": 12, "markets_at_a_glance": 5, "major_events": 9, "report_date": date(2025, 10, 24)
+    }
+    assert list(parser._current_processed_dfs) == list(report.tables)
+    for name, expected in report.tables.items():
+        parsed = parser._current_processed_dfs[name].reset_index(drop=True)
+        pd.testing.assert_frame_equal(parsed, expected, check_dtype=False, check_names=False)
+
+@pytest.mark.parametrize("export_format", ["parquet", "arrow", "bundle"])
+def test_typed_exports_store_every_metric_as_float32(tmp_path, export_format):
+    report = generate_report(ReportSpec(pages=4, events=12))
+    parse(report.pdf).export_dfs(str(tmp_path), export_format)
+
+    if export_format == "bundle":
+        dfs = read_bundle(str(tmp_path / "tables.arrow"))
+    else:
+        read = pd.read_parquet if export_format == "parquet" else pd.read_feather
+        dfs = {name: read(tmp_path / f"{name}.{export_format}") for name in report.tables}
+    for name, expected in report.tables.items():
+        metrics = [column for column, dtype in expected.dtypes.items()
+                   if pd.api.types.is_float_dtype(dtype) or pd.api.types.is_integer_dtype(dtype)]
+        assert metrics
+        assert (dfs[name][metrics].dtypes == np.float32).all(), name
+
+def test_generation_is_deterministic_per_seed():
+    assert generate_report(ReportSpec(seed=3)).pdf == generate_report(ReportSpec(seed=3)).pdf
+    assert generate_report(ReportSpec(seed=3)).pdf != generate_report(ReportSpec(seed=4)).pdf
+
+@pytest.mark.parametrize("week", [date(2023, 12, 26), date(2023, 12, 29)])
+def test_event_dates_follow_the_report_across_new_year(week):
+    # Dated 30 Dec 2023 and 2 Jan 2024: the events of the week run over the new year either side of it
+    report = generate_report(ReportSpec(pages=4, events=14, week=week))
+    parser = parse(report.pdf)
+
+    parsed = parser._current_processed_dfs["major_events"]["Date"]
+    assert parser.report_date == week + timedelta(days=4)
+    assert list(parsed) == list(report.tables["major_events"]["Date"])
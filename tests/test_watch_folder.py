@@ -0,0 +1,82 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest.mock import patch
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.batch_run import ParseResult
+from app.models import Base, IngestedDocument
+from app.watch_folder import Debouncer, InotifyWatcher, PollingWatcher, WatchFolder, WatchState
+from tests.conftest import make_equities_df
+
+
+def open_inotify(directory):
+    try:
+        return InotifyWatcher(directory)
+    except OSError as e:
+        pytest.skip(str(e))
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+def fake_parse(pdf_path, year=2025, backend="camelot", output_dir=None):
+    return ParseResult(pdf_path=pdf_path, dfs={"equities": make_equities_df()}, report_date=date(2024, 10, 25))
+
+def new_daemon(input_dir, state_path, session_factory):
+    return WatchFolder(
+        str(input_dir), str(input_dir / "out"), WatchState(str(state_path)), watcher=PollingWatcher(str(input_dir)),
+        settle=0, poll_interval=0, session_factory=session_factory, executor_factory=ThreadPoolExecutor,
+    )
+
+def run_until_idle(daemon, steps=20):
+    daemon.scan()
+    for _ in range(steps):
+        daemon.step()
+    assert not daemon.queue and not daemon.in_flight and not len(daemon.debouncer)
+
+def test_debouncer_holds_back_files_until_they_settle(tmp_path):
+    pdf = tmp_path / "weekly.pdf"
+    pdf.write_bytes(b"%PDF-1.7 half")
+    debouncer = Debouncer(str(tmp_path), settle=2.0)
+
+    debouncer.touch({"weekly.pdf"}, now=0.0)
+    assert debouncer.ready(now=0.0) == []
+    pdf.write_bytes(b"%PDF-1.7 half written")
+    assert debouncer.ready(now=1.5) == []
+    assert debouncer.ready(now=3.0) == []
+    [(name, signature, first_seen)] = debouncer.ready(now=3.5)
+
+    assert (name, signature[0], first_seen) == ("weekly.pdf", len(b"%PDF-1.7 half written"), 0.0)
+    assert len(debouncer) == 0
+
+@pytest.mark.parametrize("open_watcher", [PollingWatcher, open_inotify])
+def test_watchers_report_new_and_changed_pdfs(tmp_path, open_watcher):
+    watcher = open_watcher(str(tmp_path))
+    (tmp_path / "weekly.pdf").write_bytes(b"%PDF-1.7")
+    (tmp_path / "notes.txt").write_bytes(b"notes")
+    (tmp_path / ".weekly.pdf.part").write_bytes(b"%PDF")
+
+    assert watcher.changes(0.2) == {"weekly.pdf"}
+    assert watcher.changes(0) == set()
+    watcher.close()
+
+def test_watch_folder_ingests_each_pdf_once_across_restarts(tmp_path, session_factory):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "weekly.pdf").write_bytes(b"%PDF-1.7 weekly")
+    (input_dir / "weekly_copy.pdf").write_bytes(b"%PDF-1.7 weekly")
+    state_path = tmp_path / "state.json"
+
+    with patch("app.watch_folder.parse_pdf", side_effect=fake_parse) as parse:
+        run_until_idle(new_daemon(input_dir, state_path, session_factory))
+        # The state file keeps the restarted daemon from even hashing them again
+        run_until_idle(new_daemon(input_dir, state_path, session_factory))
+
+    assert parse.call_count == 1
+    statuses = {name: entry["status"] for name, entry in WatchState(str(state_path)).files.items()}
+    assert sorted(statuses.values()) == ["already_ingested", "stored"]
+    with session_factory() as session:
+        assert session.scalars(select(IngestedDocument.rows_written)).all() == [2]
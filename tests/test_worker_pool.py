@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from app.worker_pool import BoundedWorkerPool, PoolSaturatedError
+
+
+def make_pool(max_workers: int = 1, max_pending: int = 2, initializer=None):
+    return BoundedWorkerPool(
+        max_workers, max_pending, initializer=initializer,
+        executor_factory=lambda n, initializer: ThreadPoolExecutor(n, initializer=initializer),
+    )
+
+def test_run_returns_result_off_the_event_loop():
+    pool = make_pool()
+    pool.start()
+    result = asyncio.run(pool.run(lambda x: (x * 2, threading.current_thread()), 21))
+    pool.shutdown()
+
+    assert result[0] == 42
+    assert result[1] is not threading.main_thread()
+    assert pool.pending == 0
+
+def test_run_rejects_jobs_above_max_pending():
+    pool = make_pool(max_workers=1, max_pending=2)
+    pool.start()
+    release = threading.Event()
+
+    async def submit_three():
+        jobs = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert pool.is_saturated()
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*jobs)
+
+    asyncio.run(submit_three())
+    pool.shutdown()
+    assert pool.pending == 0
+
+def test_max_pending_below_max_workers_is_rejected():
+    with pytest.raises(ValueError):
+        make_pool(max_workers=4, max_pending=2)
+
+def test_initializer_runs_when_the_pool_starts():
+    warmed_up = []
+    pool = make_pool(initializer=lambda: warmed_up.append(threading.current_thread()))
+    pool.start()
+    pool.shutdown()
+
+    assert len(warmed_up) == 1
+    assert warmed_up[0] is not threading.main_thread()